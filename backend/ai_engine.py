@@ -5,6 +5,9 @@ import json
 import logging
 from typing import Dict, List, Optional
 
+from src.services.keyword_matcher import get_category_matcher
+from src.services.arabic_text import AnalyzedText, split_sentences
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -309,30 +312,19 @@ class RevolutionaryAIEngine:
         }
     
     def _local_summary(self, content: str) -> str:
-        sentences = content.split('.')[:3]
+        sentences = split_sentences(content)[:3]
         return '. '.join(sentences) + '.'
     
     def _local_classification(self, content: str, title: str) -> str:
-        keywords = {
-            'POLITICS': ['سياسة', 'حكومة', 'رئيس', 'وزير', 'برلمان'],
-            'ECONOMY': ['اقتصاد', 'مالية', 'بورصة', 'استثمار', 'تجارة'],
-            'SYRIAN_AFFAIRS': ['سوريا', 'دمشق', 'حلب', 'سوري'],
-            'HEALTH': ['صحة', 'طبي', 'مستشفى', 'دواء', 'علاج']
-        }
-        
-        text = (title + ' ' + content).lower()
-        for category, words in keywords.items():
-            if any(word in text for word in words):
-                return category
-        return 'GENERAL'
+        return get_category_matcher().best_category(title + ' ' + content).upper()
     
     def _local_sentiment_analysis(self, content: str) -> float:
         positive_words = ['نجح', 'تطور', 'تحسن', 'إيجابي', 'ممتاز']
         negative_words = ['فشل', 'مشكلة', 'أزمة', 'سلبي', 'سيئ']
         
-        text = content.lower()
-        positive_count = sum(1 for word in positive_words if word in text)
-        negative_count = sum(1 for word in negative_words if word in text)
+        analyzed = AnalyzedText(content)
+        positive_count = analyzed.count_terms(positive_words)
+        negative_count = analyzed.count_terms(negative_words)
         
         if positive_count > negative_count:
             return 0.7
@@ -342,9 +334,7 @@ class RevolutionaryAIEngine:
             return 0.5
     
     def _local_keyword_extraction(self, content: str) -> List[str]:
-        # استخراج بسيط للكلمات المفتاحية
-        words = content.split()[:10]
-        return words[:5]
+        return AnalyzedText(content).keywords(limit=5)
     
     def _local_title_improvement(self, title: str) -> str:
         return title  # إرجاع العنوان كما هو
@@ -346,7 +346,7 @@ PHASE_FOUR_HTML = '''
         
         <div class="stats-grid">
             <div class="stat-card">
-                <div class="stat-number">{{ articles_count }}</div>
+                <div class="stat-number" id="articles-count">{{ articles_count }}</div>
                 <div>مقال منشور</div>
             </div>
             <div class="stat-card">
@@ -371,12 +371,12 @@ PHASE_FOUR_HTML = '''
             </div>
         </div>
         
-        <div class="articles-section">
+        <div class="articles-section" id="articles-section">
             <h2>📰 أحدث المقالات المتقدمة</h2>
             {% for article in articles %}
-            <div class="article-card">
+            <div class="article-card" data-article-id="{{ article.id }}">
                 <div class="article-title">{{ article.title }}</div>
-                <div>{{ article.summary }}</div>
+                <div class="article-summary">{{ article.summary }}</div>
                 <div class="ai-analysis">
                     <strong>تحليل الذكاء الاصطناعي:</strong> {{ article.ai_analysis }}
                 </div>
@@ -423,9 +423,37 @@ PHASE_FOUR_HTML = '''
             console.log('✅ متصل بنجاح بالمرحلة الرابعة');
         });
         
+        // يُحدَّث المقال المعني في مكانه أو يُضاف في أول القائمة، دون إعادة تحميل الصفحة
+        function applyArticleUpdate(data) {
+            const section = document.getElementById('articles-section');
+            let card = data.id ? section.querySelector('[data-article-id="' + data.id + '"]') : null;
+            if (!card) {
+                card = document.createElement('div');
+                card.className = 'article-card';
+                if (data.id) {
+                    card.dataset.articleId = data.id;
+                }
+                const title = document.createElement('div');
+                title.className = 'article-title';
+                const summary = document.createElement('div');
+                summary.className = 'article-summary';
+                card.append(title, summary);
+                section.insertBefore(card, section.querySelector('.article-card'));
+
+                const counter = document.getElementById('articles-count');
+                counter.textContent = (parseInt(counter.textContent, 10) || 0) + 1;
+            }
+            if (data.title !== undefined) {
+                card.querySelector('.article-title').textContent = data.title;
+            }
+            if (data.summary !== undefined && card.querySelector('.article-summary')) {
+                card.querySelector('.article-summary').textContent = data.summary;
+            }
+        }
+        
         socket.on('article_update', function(data) {
             console.log('📰 تحديث مقال:', data);
-            location.reload();
+            applyArticleUpdate(data);
         });
         
         socket.on('ai_analysis', function(data) {
@@ -462,7 +490,7 @@ def home():
         sources_count = cursor.fetchone()[0]
         
         cursor.execute('''
-            SELECT title, summary, views, likes, shares, ai_analysis, credibility_score, trending_score
+            SELECT title, summary, views, likes, shares, ai_analysis, credibility_score, trending_score, id
             FROM articles 
             ORDER BY published_at DESC 
             LIMIT 5
@@ -472,6 +500,7 @@ def home():
         articles = []
         for article_data in articles_data:
             articles.append({
+                'id': article_data[8],
                 'title': article_data[0],
                 'summary': article_data[1],
                 'views': article_data[2],
@@ -85,6 +85,9 @@ def init_revolutionary_database():
         )
     ''')
     
+    # فهرس لترتيب /api/articles حسب تاريخ النشر دون فرز الجدول كاملاً
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_articles_published_at ON articles (published_at)')
+    
     # جدول المصادر المتقدم
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS sources (
@@ -547,7 +550,7 @@ REVOLUTIONARY_INTEGRATED_HTML = '''
         <div class="status-grid">
             <div class="status-card">
                 <h3>📊 إحصائيات شاملة</h3>
-                <div class="stat-number">{{ articles_count }}</div>
+                <div class="stat-number" id="articles-count">{{ articles_count }}</div>
                 <div class="stat-label">مقال منشور</div>
             </div>
             
@@ -584,7 +587,7 @@ REVOLUTIONARY_INTEGRATED_HTML = '''
             </div>
         </div>
         
-        <div class="articles-section">
+        <div class="articles-section" id="articles-section">
             <h2>📰 أحدث المقالات الثورية</h2>
             {% for article in articles %}
             <div class="article-card">
@@ -642,10 +645,27 @@ REVOLUTIONARY_INTEGRATED_HTML = '''
             console.log('✅ متصل بنجاح مع الخادم');
         });
         
+        // يُضاف المقال الجديد إلى الصفحة بدل إعادة تحميلها كاملة
+        function prependArticle(data) {
+            const section = document.getElementById('articles-section');
+            const card = document.createElement('div');
+            card.className = 'article-card';
+            const title = document.createElement('div');
+            title.className = 'article-title';
+            title.textContent = data.title || '';
+            const summary = document.createElement('div');
+            summary.className = 'article-summary';
+            summary.textContent = data.summary || '';
+            card.append(title, summary);
+            section.insertBefore(card, section.querySelector('.article-card'));
+
+            const counter = document.getElementById('articles-count');
+            counter.textContent = (parseInt(counter.textContent, 10) || 0) + 1;
+        }
+        
         socket.on('article_published', function(data) {
             console.log('📰 مقال جديد:', data);
-            // تحديث الواجهة فورياً
-            location.reload();
+            prependArticle(data);
         });
         
         socket.on('ai_processed', function(data) {
@@ -777,40 +797,41 @@ def health_check():
     except Exception as e:
         return jsonify({'status': 'error', 'error': str(e)}), 500
 
+# أعمدة قائمة المقالات المسموح بطلبها عبر fields=، والمحتوى الكامل ليس منها
+ARTICLE_LIST_COLUMNS = (
+    'id', 'title', 'summary', 'category', 'sentiment_score', 'views', 'likes', 'shares',
+    'published_at', 'reading_time', 'featured', 'keywords', 'ai_processed'
+)
+
 @app.route('/api/articles')
 def get_articles():
-    """الحصول على جميع المقالات"""
+    """الحصول على صفحة من المقالات"""
     try:
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        
+        columns = list(ARTICLE_LIST_COLUMNS)
+        if request.args.get('fields'):
+            columns = [name.strip() for name in request.args['fields'].split(',') if name.strip()]
+            unknown = [name for name in columns if name not in ARTICLE_LIST_COLUMNS]
+            if unknown or not columns:
+                return jsonify({'error': f"Unknown fields: {', '.join(unknown)}", 'available': list(ARTICLE_LIST_COLUMNS)}), 400
+        
         conn = sqlite3.connect('golan24_revolutionary_integrated.db')
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT id, title, summary, category, sentiment_score, views, likes, shares,
-                   published_at, reading_time, featured, keywords, ai_processed
+        # أسماء الأعمدة من القائمة المسموحة فقط، فتركيبها في الاستعلام آمن
+        cursor.execute(f'''
+            SELECT {', '.join(columns)}
             FROM articles 
             ORDER BY published_at DESC
-        ''')
+            LIMIT ? OFFSET ?
+        ''', (limit, offset))
         
-        articles = []
-        for row in cursor.fetchall():
-            articles.append({
-                'id': row[0],
-                'title': row[1],
-                'summary': row[2],
-                'category': row[3],
-                'sentiment_score': row[4],
-                'views': row[5],
-                'likes': row[6],
-                'shares': row[7],
-                'published_at': row[8],
-                'reading_time': row[9],
-                'featured': row[10],
-                'keywords': row[11],
-                'ai_processed': row[12]
-            })
+        articles = [dict(zip(columns, row)) for row in cursor.fetchall()]
         
         conn.close()
-        return jsonify({'articles': articles, 'count': len(articles)})
+        return jsonify({'articles': articles, 'count': len(articles), 'limit': limit, 'offset': offset})
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
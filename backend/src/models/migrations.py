@@ -0,0 +1,97 @@
+import logging
+import os
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from .database import db
+from .news import NewsArticle
+
+logger = logging.getLogger(__name__)
+
+def _create_indexes(table, *names: str) -> Callable[[Connection], None]:
+    """Migration that creates exactly the named indexes of ``table``, those that are missing.
+
+    ``create_all`` only creates tables that do not exist yet, so indexes added
+    to an existing table are created here. Each migration names its own
+    indexes, so it does the same thing whenever it runs, whatever the model
+    declares by then.
+    """
+    indexes = {index.name: index for index in table.indexes}
+
+    def migrate(connection: Connection):
+        existing = {index['name'] for index in inspect(connection).get_indexes(table.name)}
+        for name in names:
+            if name not in existing:
+                logger.info(f"Creating index {name}")
+                indexes[name].create(bind=connection)
+    return migrate
+
+def _refresh_planner_statistics(connection: Connection):
+    # بدون إحصاءات يختار SQLite الفهارس على أساس تخمين، فيُجمع ANALYZE مرة بعد إضافة الفهارس
+    if connection.dialect.name in ('sqlite', 'postgresql'):
+        connection.execute(text('ANALYZE news_articles'))
+
+def _backfill_rollups(connection: Connection):
+    from ..services.rollups import rebuild
+    rebuild(connection)
+
+def _backfill_search_index(connection: Connection):
+    from ..services.search_index import get_search_index
+    search_index = get_search_index(connection.engine)
+    if search_index is not None:
+        # الجلسة تنضم إلى معاملة الترحيل فلا يُثبَّت شيء قبلها
+        search_index.backfill(Session(bind=connection))
+
+MIGRATIONS: List[Tuple[str, Callable[[Connection], None]]] = [
+    ('0001_news_article_hot_query_indexes', _create_indexes(
+        NewsArticle.__table__,
+        'ix_news_articles_published_at_id',
+        'ix_news_articles_status_published_at',
+        'ix_news_articles_category_status_published_at',
+        'ix_news_articles_window_stats',
+        'ix_news_articles_updated_at_views'
+    )),
+    ('0002_news_article_statistics', _refresh_planner_statistics),
+    ('0003_news_article_source_index', _create_indexes(NewsArticle.__table__, 'ix_news_articles_source_id')),
+    ('0004_news_analytics_rollups', _backfill_rollups),
+    ('0005_news_article_search_index', _backfill_search_index),
+]
+
+def run_migrations(engine: Engine) -> List[str]:
+    """Create missing tables, then apply each pending migration once, recording it in ``schema_migrations``.
+
+    Every migration is idempotent as well, so a partly applied run can simply
+    be repeated. The automation applies them before its first cycle; a
+    deployment that serves the API without it runs
+    ``python -m src.models.migrations`` from ``backend`` before starting.
+    """
+    db.metadata.create_all(bind=engine)
+    applied = []
+    with engine.begin() as connection:
+        connection.execute(text(
+            'CREATE TABLE IF NOT EXISTS schema_migrations (name VARCHAR(200) PRIMARY KEY, applied_at TIMESTAMP NOT NULL)'
+        ))
+        done = {row[0] for row in connection.execute(text('SELECT name FROM schema_migrations'))}
+
+    for name, migrate in MIGRATIONS:
+        if name in done:
+            continue
+        with engine.begin() as connection:
+            migrate(connection)
+            connection.execute(
+                text('INSERT INTO schema_migrations (name, applied_at) VALUES (:name, :applied_at)'),
+                {'name': name, 'applied_at': datetime.utcnow()}
+            )
+        logger.info(f"Applied migration {name}")
+        applied.append(name)
+    return applied
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    database_url = os.getenv('DATABASE_URL', 'sqlite:///news.db')
+    applied = run_migrations(create_engine(database_url))
+    print(f"Applied {len(applied)} migrations" if applied else "Database is up to date")
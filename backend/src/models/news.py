@@ -39,6 +39,21 @@ class NewsSource(db.Model):
 
 class NewsArticle(db.Model):
     __tablename__ = 'news_articles'
+    __table_args__ = (
+        # ترقيم المؤشر: ترتيب (published_at, id) تنازلياً يُقرأ من هذا الفهرس مباشرة
+        db.Index('ix_news_articles_published_at_id', 'published_at', 'id'),
+        # العاجل والرائج وفلاتر /articles: مساواة على الحالة (والفئة) ثم مدى على تاريخ النشر
+        db.Index('ix_news_articles_status_published_at', 'status', 'published_at'),
+        db.Index('ix_news_articles_category_status_published_at', 'category', 'status', 'published_at'),
+        # فهرس مغطٍّ لإحصاءات النافذة الزمنية في /analytics، والمقالات بلا تاريخ لا تدخل أي نافذة
+        db.Index('ix_news_articles_window_stats', 'published_at', 'views', 'category', 'source_id',
+                 sqlite_where=db.text('published_at IS NOT NULL'),
+                 postgresql_where=db.text('published_at IS NOT NULL')),
+        # المشاهدات الحديثة في /analytics/real-time، ومجموع المشاهدات في /stats دون قراءة الجدول
+        db.Index('ix_news_articles_updated_at_views', 'updated_at', 'views'),
+        # عدد المقالات لكل مصدر في /sources
+        db.Index('ix_news_articles_source_id', 'source_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.Text, nullable=False)
@@ -61,6 +76,25 @@ class NewsArticle(db.Model):
     ai_tags = db.Column(db.Text)
     sentiment_score = db.Column(db.Float)
 
+class RollupColumns:
+    """Pre-aggregated article and view counts for one time bucket, category and source.
+
+    Views are attributed to the bucket the article was published in, as the
+    analytics dashboard has always counted them.
+    """
+    
+    bucket = db.Column(db.DateTime, primary_key=True)
+    category = db.Column(db.Enum(NewsCategory), primary_key=True)
+    source_id = db.Column(db.Integer, primary_key=True)
+    articles = db.Column(db.Integer, nullable=False, default=0)
+    views = db.Column(db.Integer, nullable=False, default=0)
+
+class HourlyRollup(RollupColumns, db.Model):
+    __tablename__ = 'news_rollups_hourly'
+
+class DailyRollup(RollupColumns, db.Model):
+    __tablename__ = 'news_rollups_daily'
+
 class ScrapingLog(db.Model):
     __tablename__ = 'scraping_logs'
     
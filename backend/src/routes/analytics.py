@@ -1,67 +1,68 @@
 from flask import Blueprint, jsonify, request
 from sqlalchemy import func, desc
+from sqlalchemy.orm import load_only
 from datetime import datetime, timedelta
 from ..models.database import db
-from ..models.news import NewsArticle, NewsSource, NewsCategory, NewsStatus
+from ..models.news import DailyRollup, HourlyRollup, NewsArticle, NewsSource, NewsCategory, NewsStatus
+from ..services.response_cache import cached_response
+from ..services.rollups import day_bucket, hour_bucket
 
 analytics_bp = Blueprint('analytics', __name__)
 
 @analytics_bp.route('/', methods=['GET'])
+@cached_response()
 def get_analytics():
     try:
         time_range = request.args.get('time_range', '7days')
         
+        now = datetime.utcnow()
+        # نافذة 24 ساعة من الصفوف الساعية، وبقية النوافذ أيام كاملة من الصفوف اليومية
         if time_range == '24hours':
-            start_date = datetime.utcnow() - timedelta(hours=24)
-        elif time_range == '7days':
-            start_date = datetime.utcnow() - timedelta(days=7)
-        elif time_range == '30days':
-            start_date = datetime.utcnow() - timedelta(days=30)
-        elif time_range == '90days':
-            start_date = datetime.utcnow() - timedelta(days=90)
+            rollup = HourlyRollup
+            start_date = hour_bucket(now - timedelta(hours=24))
         else:
-            start_date = datetime.utcnow() - timedelta(days=7)
+            rollup = DailyRollup
+            days = {'7days': 7, '30days': 30, '90days': 90}.get(time_range, 7)
+            start_date = day_bucket(now) - timedelta(days=days - 1)
         
-        total_views = db.session.query(func.sum(NewsArticle.views)).filter(
-            NewsArticle.published_at >= start_date
-        ).scalar() or 0
+        in_window = rollup.bucket >= start_date
         
-        total_articles = NewsArticle.query.filter(
-            NewsArticle.published_at >= start_date
-        ).count()
+        daily_stats = db.session.query(
+            rollup.bucket,
+            func.sum(rollup.articles).label('articles'),
+            func.sum(rollup.views).label('views')
+        ).filter(in_window).group_by(rollup.bucket).order_by(rollup.bucket).all()
+        
+        total_views = sum(stat.views or 0 for stat in daily_stats)
+        total_articles = sum(stat.articles or 0 for stat in daily_stats)
         
         total_users = 8934
         avg_engagement = 4.2
         
-        daily_stats = db.session.query(
-            func.date(NewsArticle.published_at).label('date'),
-            func.count(NewsArticle.id).label('articles'),
-            func.sum(NewsArticle.views).label('views')
-        ).filter(
-            NewsArticle.published_at >= start_date
-        ).group_by(
-            func.date(NewsArticle.published_at)
-        ).order_by('date').all()
+        days_data = {}
+        for stat in daily_stats:
+            day = days_data.setdefault(stat.bucket.strftime('%Y-%m-%d'), {'articles': 0, 'views': 0})
+            day['articles'] += stat.articles or 0
+            day['views'] += stat.views or 0
         
         chart_data = []
-        for stat in daily_stats:
+        for date, stat in days_data.items():
             chart_data.append({
-                'date': stat.date.strftime('%Y-%m-%d') if hasattr(stat.date, 'strftime') else str(stat.date),
-                'articles': stat.articles,
-                'views': stat.views or 0,
-                'users': int(stat.views / 10) if stat.views else 0,
-                'engagement': round(4.0 + (stat.articles * 0.1), 1)
+                'date': date,
+                'articles': stat['articles'],
+                'views': stat['views'],
+                'users': int(stat['views'] / 10) if stat['views'] else 0,
+                'engagement': round(4.0 + (stat['articles'] * 0.1), 1)
             })
         
         category_stats = db.session.query(
-            NewsArticle.category,
-            func.count(NewsArticle.id).label('count')
-        ).filter(
-            NewsArticle.published_at >= start_date
-        ).group_by(NewsArticle.category).all()
+            rollup.category,
+            func.sum(rollup.articles).label('count')
+        ).filter(in_window).group_by(rollup.category).having(func.sum(rollup.articles) > 0).all()
         
         category_data = []
         colors = ['#3B82F6', '#10B981', '#F59E0B', '#8B5CF6', '#EF4444']
+        total_category_articles = sum(stat.count for stat in category_stats)
         for i, stat in enumerate(category_stats):
             category_name = {
                 NewsCategory.SYRIAN_AFFAIRS: 'الشأن السوري',
@@ -74,7 +75,6 @@ def get_analytics():
                 NewsCategory.GENERAL: 'عام'
             }.get(stat.category, 'أخرى')
             
-            total_category_articles = sum(s.count for s in category_stats)
             percentage = round((stat.count / total_category_articles) * 100, 1) if total_category_articles > 0 else 0
             
             category_data.append({
@@ -85,10 +85,10 @@ def get_analytics():
         
         source_stats = db.session.query(
             NewsSource.name,
-            func.count(NewsArticle.id).label('articles'),
-            func.sum(NewsArticle.views).label('views')
-        ).join(NewsArticle).filter(
-            NewsArticle.published_at >= start_date
+            func.sum(rollup.articles).label('articles'),
+            func.sum(rollup.views).label('views')
+        ).join(NewsSource, NewsSource.id == rollup.source_id).filter(
+            in_window
         ).group_by(NewsSource.name).order_by(desc('views')).limit(5).all()
         
         source_data = []
@@ -100,7 +100,10 @@ def get_analytics():
                 'engagement': round(4.0 + (stat.articles * 0.05), 1)
             })
         
-        top_articles = NewsArticle.query.filter(
+        # أكثر المقالات مشاهدة لا تُجمَّع مسبقاً، لكنها تُقرأ من الفهرس المغطي دون المحتوى
+        top_articles = NewsArticle.query.options(
+            load_only(NewsArticle.title, NewsArticle.views, NewsArticle.category)
+        ).filter(
             NewsArticle.published_at >= start_date
         ).order_by(desc(NewsArticle.views)).limit(10).all()
         
@@ -145,6 +148,7 @@ def get_analytics():
         return jsonify({'error': str(e)}), 500
 
 @analytics_bp.route('/real-time', methods=['GET'])
+@cached_response(ttl=10)
 def get_real_time_analytics():
     try:
         now = datetime.utcnow()
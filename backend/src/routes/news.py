@@ -1,11 +1,24 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from sqlalchemy import desc, func
+from sqlalchemy.orm import joinedload
 from datetime import datetime, timedelta
 from ..models.database import db
 from ..models.news import NewsArticle, NewsSource, NewsCategory, NewsStatus
+from ..services.search_index import get_search_index, highlight, parse_query
+from ..services.pagination import InvalidCursor, keyset_page, offset_page
+from ..services.article_fields import InvalidFields, parse_fields, projection, serialize
+from ..services.view_counter import get_view_counter
+from ..services.response_cache import cached_response
 
 news_bp = Blueprint('news', __name__)
 
+# الحقول الافتراضية لكل قائمة؛ fields= يختار غيرها، والمحتوى الكامل في /articles/<id> فقط
+ARTICLE_LIST_FIELDS = ('id', 'title', 'summary', 'image_url', 'author', 'category', 'status',
+                       'source', 'published_at', 'views', 'ai_processed')
+BREAKING_FIELDS = ('id', 'title', 'summary', 'published_at', 'source')
+TRENDING_FIELDS = ('id', 'title', 'views', 'published_at', 'source')
+SYRIAN_AFFAIRS_FIELDS = ('id', 'title', 'summary', 'image_url', 'source', 'published_at', 'views', 'ai_processed')
+
 @news_bp.route('/articles', methods=['GET'])
 def get_articles():
     try:
@@ -13,8 +26,10 @@ def get_articles():
         per_page = request.args.get('per_page', 10, type=int)
         category = request.args.get('category')
         status = request.args.get('status')
+        fields = parse_fields(request.args.get('fields'), ARTICLE_LIST_FIELDS)
         
-        query = NewsArticle.query
+        # الأعمدة المطلوبة فقط، والمصدر في الاستعلام نفسه بدل استعلام لكل مقال
+        query = NewsArticle.query.options(*projection(fields))
         
         if category:
             try:
@@ -30,34 +45,93 @@ def get_articles():
             except ValueError:
                 pass
         
-        query = query.order_by(desc(NewsArticle.published_at))
+        if 'cursor' in request.args:
+            items, pagination = keyset_page(
+                query, NewsArticle, min(max(1, per_page), 100),
+                token=request.args.get('cursor') or None,
+                include_total=request.args.get('include_total'),
+                count_key=('articles', category, status)
+            )
+        else:
+            items, pagination = offset_page(query, NewsArticle, page, per_page, [desc(NewsArticle.published_at)])
         
-        articles = query.paginate(
-            page=page, 
-            per_page=per_page, 
-            error_out=False
-        )
+        return jsonify({
+            'articles': [serialize(article, fields) for article in items],
+            'pagination': pagination
+        })
+    except (InvalidCursor, InvalidFields) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@news_bp.route('/articles/search', methods=['GET'])
+def search_articles():
+    try:
+        query_text = request.args.get('q', '').strip()
+        page = max(1, request.args.get('page', 1, type=int))
+        per_page = min(max(1, request.args.get('per_page', 10, type=int)), 50)
+        category = request.args.get('category')
+        status = request.args.get('status')
+        
+        if not query_text:
+            return jsonify({'error': 'Query parameter q is required'}), 400
+        
+        search_index = get_search_index(db.engine)
+        if search_index is None:
+            return jsonify({'error': 'Full-text search is not supported on this database'}), 501
+        
+        filters = {}
+        if category:
+            try:
+                filters['category'] = NewsCategory(category).name
+            except ValueError:
+                pass
+        
+        if status:
+            try:
+                filters['status'] = NewsStatus(status).name
+            except ValueError:
+                pass
+        
+        terms = parse_query(query_text)
+        hits, total = [], 0
+        if terms:
+            hits, total = search_index.search(
+                db.session, terms, limit=per_page, offset=(page - 1) * per_page, **filters
+            )
+        
+        articles = {}
+        if hits:
+            articles = {
+                article.id: article
+                for article in NewsArticle.query.options(joinedload(NewsArticle.source)).filter(
+                    NewsArticle.id.in_([article_id for article_id, _ in hits])
+                ).all()
+            }
+        results = [(articles[article_id], score) for article_id, score in hits if article_id in articles]
         
         return jsonify({
+            'query': query_text,
             'articles': [{
                 'id': article.id,
                 'title': article.title,
                 'summary': article.summary,
-                'content': article.content,
                 'image_url': article.image_url,
-                'author': article.author,
                 'category': article.category.value if article.category else None,
                 'status': article.status.value if article.status else None,
                 'source': article.source.name if article.source else None,
                 'published_at': article.published_at.isoformat() if article.published_at else None,
-                'views': article.views,
-                'ai_processed': True
-            } for article in articles.items],
+                'score': round(score, 4),
+                'highlights': {
+                    'title': highlight(article.title, terms),
+                    'content': highlight(article.content, terms, max_length=200)
+                }
+            } for article, score in results],
             'pagination': {
-                'page': articles.page,
-                'pages': articles.pages,
-                'per_page': articles.per_page,
-                'total': articles.total
+                'page': page,
+                'pages': (total + per_page - 1) // per_page,
+                'per_page': per_page,
+                'total': total
             }
         })
     except Exception as e:
@@ -66,10 +140,12 @@ def get_articles():
 @news_bp.route('/articles/<int:article_id>', methods=['GET'])
 def get_article(article_id):
     try:
-        article = NewsArticle.query.get_or_404(article_id)
+        article = NewsArticle.query.options(joinedload(NewsArticle.source)).get_or_404(article_id)
         
-        article.views += 1
-        db.session.commit()
+        # المشاهدة تُسجَّل في الذاكرة وتُكتب دفعةً واحدة لاحقاً، فالقراءة لا تفتح معاملة كتابة
+        view_counter = get_view_counter()
+        view_counter.ensure_flusher(current_app._get_current_object())
+        pending_views = view_counter.increment(article.id)
         
         return jsonify({
             'id': article.id,
@@ -82,7 +158,7 @@ def get_article(article_id):
             'status': article.status.value if article.status else None,
             'source': article.source.name if article.source else None,
             'published_at': article.published_at.isoformat() if article.published_at else None,
-            'views': article.views,
+            'views': (article.views or 0) + pending_views,
             'ai_processed': article.ai_processed,
             'ai_summary': article.ai_summary,
             'sentiment_score': article.sentiment_score
@@ -91,37 +167,33 @@ def get_article(article_id):
         return jsonify({'error': str(e)}), 500
 
 @news_bp.route('/articles/breaking', methods=['GET'])
+@cached_response()
 def get_breaking_news():
     try:
-        articles = NewsArticle.query.filter(
+        fields = parse_fields(request.args.get('fields'), BREAKING_FIELDS)
+        articles = NewsArticle.query.options(*projection(fields)).filter(
             NewsArticle.status == NewsStatus.BREAKING
         ).order_by(desc(NewsArticle.published_at)).limit(5).all()
         
-        return jsonify([{
-            'id': article.id,
-            'title': article.title,
-            'summary': article.summary,
-            'published_at': article.published_at.isoformat() if article.published_at else None,
-            'source': article.source.name if article.source else None
-        } for article in articles])
+        return jsonify([serialize(article, fields) for article in articles])
+    except InvalidFields as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @news_bp.route('/articles/trending', methods=['GET'])
+@cached_response()
 def get_trending_news():
     try:
-        articles = NewsArticle.query.filter(
+        fields = parse_fields(request.args.get('fields'), TRENDING_FIELDS)
+        articles = NewsArticle.query.options(*projection(fields, always=('published_at', 'views'))).filter(
             NewsArticle.status == NewsStatus.PUBLISHED,
             NewsArticle.published_at >= datetime.utcnow() - timedelta(days=7)
         ).order_by(desc(NewsArticle.views)).limit(10).all()
         
-        return jsonify([{
-            'id': article.id,
-            'title': article.title,
-            'views': article.views,
-            'published_at': article.published_at.isoformat() if article.published_at else None,
-            'source': article.source.name if article.source else None
-        } for article in articles])
+        return jsonify([serialize(article, fields) for article in articles])
+    except InvalidFields as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -130,41 +202,44 @@ def get_syrian_affairs():
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
+        fields = parse_fields(request.args.get('fields'), SYRIAN_AFFAIRS_FIELDS)
         
-        articles = NewsArticle.query.filter(
+        query = NewsArticle.query.options(*projection(fields)).filter(
             NewsArticle.category == NewsCategory.SYRIAN_AFFAIRS,
             NewsArticle.status == NewsStatus.PUBLISHED
-        ).order_by(desc(NewsArticle.published_at)).paginate(
-            page=page, 
-            per_page=per_page, 
-            error_out=False
         )
         
+        if 'cursor' in request.args:
+            items, pagination = keyset_page(
+                query, NewsArticle, min(max(1, per_page), 100),
+                token=request.args.get('cursor') or None,
+                include_total=request.args.get('include_total'),
+                count_key=('syrian_affairs',)
+            )
+        else:
+            items, pagination = offset_page(query, NewsArticle, page, per_page, [desc(NewsArticle.published_at)])
+        
         return jsonify({
-            'articles': [{
-                'id': article.id,
-                'title': article.title,
-                'summary': article.summary,
-                'image_url': article.image_url,
-                'source': article.source.name if article.source else None,
-                'published_at': article.published_at.isoformat() if article.published_at else None,
-                'views': article.views,
-                'ai_processed': True
-            } for article in articles.items],
-            'pagination': {
-                'page': articles.page,
-                'pages': articles.pages,
-                'per_page': articles.per_page,
-                'total': articles.total
-            }
+            'articles': [serialize(article, fields) for article in items],
+            'pagination': pagination
         })
+    except (InvalidCursor, InvalidFields) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @news_bp.route('/sources', methods=['GET'])
 def get_sources():
     try:
-        sources = NewsSource.query.filter(NewsSource.is_active == True).all()
+        # العدّ في قاعدة البيانات عبر GROUP BY بدل تحميل كل مقالات كل مصدر
+        sources = db.session.query(
+            NewsSource,
+            func.count(NewsArticle.id).label('articles_count')
+        ).outerjoin(
+            NewsArticle, NewsArticle.source_id == NewsSource.id
+        ).filter(
+            NewsSource.is_active == True
+        ).group_by(NewsSource.id).all()
         
         return jsonify([{
             'id': source.id,
@@ -172,19 +247,22 @@ def get_sources():
             'url': source.url,
             'country': source.country,
             'language': source.language,
-            'articles_count': len(source.articles)
-        } for source in sources])
+            'articles_count': articles_count
+        } for source, articles_count in sources])
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @news_bp.route('/stats', methods=['GET'])
+@cached_response()
 def get_stats():
     try:
-        today = datetime.utcnow().date()
+        today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
         
         total_articles = NewsArticle.query.count()
+        # مدى زمني بدل func.date() حتى يُستخدم فهرس published_at
         today_articles = NewsArticle.query.filter(
-            func.date(NewsArticle.published_at) == today
+            NewsArticle.published_at >= today,
+            NewsArticle.published_at < today + timedelta(days=1)
         ).count()
         total_views = db.session.query(func.sum(NewsArticle.views)).scalar() or 0
         active_sources = NewsSource.query.filter(NewsSource.is_active == True).count()
@@ -2,16 +2,26 @@ import openai
 import requests
 import json
 import re
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 import logging
 from datetime import datetime
 import hashlib
 import os
+import concurrent.futures
+import threading
+
+from .llm_cache import create_llm_cache
+from .ai_router import ProviderRouter
+from .keyword_matcher import get_category_matcher
+from .arabic_text import AnalyzedText, analyze, clean_content, split_sentences
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class MultiAIProcessor:
+    positive_words = ['إيجابي', 'ممتاز', 'نجح', 'تحسن', 'أفضل', 'مفيد', 'جيد']
+    negative_words = ['سلبي', 'فشل', 'مشكلة', 'خطأ', 'سيء', 'ضعيف', 'مخيب']
+
     def __init__(self):
         # تحميل مفاتيح API مع fallback values
         openai.api_key = os.getenv('OPENAI_API_KEY', '')
@@ -35,6 +45,28 @@ class MultiAIProcessor:
         if self.development_mode:
             logger.info("Running in development mode without API keys - using fallback methods")
         
+        # تنفيذ المهام الست لكل مقال بالتوازي مع مهلة قصوى لكل مقال
+        self.concurrent_processing = os.getenv('AI_CONCURRENT_PROCESSING', 'true').lower() == 'true'
+        # combined: طلب واحد يعيد JSON بكل الحقول، per_task: ست طلبات منفصلة
+        self.analysis_mode = os.getenv('AI_ANALYSIS_MODE', 'combined')
+        self.article_deadline = float(os.getenv('AI_ARTICLE_DEADLINE', '45'))
+        self.fact_check_quorum = int(os.getenv('FACT_CHECK_QUORUM', '3'))
+        self.response_cache = create_llm_cache()
+        self.request_timeout = float(os.getenv('AI_REQUEST_TIMEOUT', '30'))
+        self.router = ProviderRouter(timeout=self.request_timeout)
+        self._register_providers()
+        self.max_workers = int(os.getenv('AI_MAX_WORKERS', '16'))
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix='ai-task'
+        )
+        # مقالات الدفعة تعمل على مجمّع منفصل لأن مهام كل مقال تُرسل إلى المجمّع الأول
+        self.batch_workers = max(1, self.max_workers // len(self._article_tasks()))
+        self.batch_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.batch_workers,
+            thread_name_prefix='ai-batch'
+        )
+        
         self.perplexity_base_url = "https://api.perplexity.ai/chat/completions"
         self.gemini_base_url = "https://generativelanguage.googleapis.com/v1beta/models"
         self.cohere_base_url = "https://api.cohere.ai/v1/generate"
@@ -116,6 +148,27 @@ class MultiAIProcessor:
 
         الكلمات المفتاحية (مفصولة بفواصل):
         """
+        
+        self.combined_analysis_prompt = """
+        أنت محرر أخبار محترف. حلل المقال التالي وأعد كائن JSON واحداً فقط بدون أي نص إضافي، بالمفاتيح التالية:
+        - "summary": تلخيص في 2-3 جمل
+        - "rewritten_title": عنوان جديد بأسلوب صحفي احترافي
+        - "rewritten_content": المقال مُعاد كتابته مع الحفاظ على جميع الحقائق
+        - "category": واحدة فقط من: politics, economy, sports, syrian_affairs, international, technology, health, culture, general
+        - "sentiment_score": رقم من -1 (سلبي جداً) إلى 1 (إيجابي جداً)
+        - "bias_analysis": كائن {{"bias_detected": true/false, "analysis": "تحليل التوجه أو التحيز", "confidence": رقم من 0 إلى 1}}
+        - "tags": قائمة من 5-8 كلمات مفتاحية
+
+        العنوان: {title}
+        المحتوى: {content}
+
+        JSON:
+        """
+        
+        self.valid_categories = [
+            'politics', 'economy', 'sports', 'syrian_affairs', 
+            'international', 'technology', 'health', 'culture', 'general'
+        ]
 
     def call_openai_api(self, prompt: str, max_tokens: int = 500) -> Optional[str]:
         try:
@@ -123,26 +176,67 @@ class MultiAIProcessor:
                 logger.warning("OpenAI API key not configured")
                 return None
             
-            response = openai.Completion.create(
-                engine="text-davinci-003",
-                prompt=prompt,
-                max_tokens=max_tokens,
-                temperature=0.7,
-                top_p=1,
-                frequency_penalty=0,
-                presence_penalty=0
-            )
+            def request():
+                response = openai.Completion.create(
+                    engine="text-davinci-003",
+                    prompt=prompt,
+                    max_tokens=max_tokens,
+                    temperature=0.7,
+                    top_p=1,
+                    frequency_penalty=0,
+                    presence_penalty=0,
+                    request_timeout=self.request_timeout
+                )
+                return response.choices[0].text.strip()
             
-            return response.choices[0].text.strip()
+            return self._cached_call('openai', 'text-davinci-003', prompt, {'max_tokens': max_tokens, 'temperature': 0.7}, request)
             
         except Exception as e:
             logger.error(f"OpenAI API error: {str(e)}")
             return None
 
+    def _register_providers(self):
+        # مزودات توليد النص المتاحة للتوجيه؛ نموذج HuggingFace الحالي (DialoGPT) حواري وغير مناسب لمهام التحرير
+        providers = [
+            ('openai', openai.api_key, lambda prompt, max_tokens: self.call_openai_api(prompt, max_tokens)),
+            ('claude', self.claude_key, lambda prompt, max_tokens: self.call_claude_api(prompt)),
+            ('gemini', self.gemini_key, lambda prompt, max_tokens: self.call_gemini_api(prompt)),
+            ('perplexity', self.perplexity_key, lambda prompt, max_tokens: self.call_perplexity_api(prompt)),
+            ('mistral', self.mistral_key, lambda prompt, max_tokens: self._text_or_none(self.call_mistral_api(prompt), 'Mistral')),
+            ('cohere', self.cohere_key, lambda prompt, max_tokens: self._text_or_none(self.call_cohere_api(prompt), 'Cohere'))
+        ]
+        
+        for name, key, func in providers:
+            if key:
+                self.router.register(name, func)
+
+    @staticmethod
+    def _text_or_none(result: Optional[str], provider: str) -> Optional[str]:
+        if not result or result.startswith(f"{provider} API"):
+            return None
+        return result
+
+    def call_llm(self, prompt: str, max_tokens: int = 500) -> Optional[str]:
+        """Route a text-generation prompt to the fastest healthy configured provider."""
+        return self.router.call(prompt, max_tokens)
+
+    def get_router_status(self) -> Dict:
+        return self.router.get_status()
+
+    def _cached_call(self, provider: str, model: str, prompt: str, params: Dict, request) -> Optional[str]:
+        if self.response_cache is None:
+            return request()
+        return self.response_cache.get_or_call(provider, model, prompt, params, request)
+
+    def get_cache_stats(self) -> Dict:
+        if self.response_cache is None:
+            return {'backend': 'disabled'}
+        return self.response_cache.get_stats()
+
     def summarize_article(self, title: str, content: str) -> str:
         prompt = self.summarization_prompt.format(title=title, content=content[:2000])
         
-        result = self.call_openai_api(prompt, max_tokens=200)
+        result = self.call_llm(prompt, max_tokens=200)
         
         if result:
             return result
@@ -153,7 +247,7 @@ class MultiAIProcessor:
     def rewrite_article(self, title: str, content: str) -> Tuple[str, str]:
         prompt = self.rewriting_prompt.format(title=title, content=content[:3000])
         
-        result = self.call_openai_api(prompt, max_tokens=1000)
+        result = self.call_llm(prompt, max_tokens=1000)
         
         if result and "العنوان الجديد:" in result and "المحتوى الجديد:" in result:
             parts = result.split("المحتوى الجديد:")
@@ -166,41 +260,20 @@ class MultiAIProcessor:
     def categorize_article(self, title: str, content: str) -> str:
         prompt = self.categorization_prompt.format(title=title, content=content[:1500])
         
-        result = self.call_openai_api(prompt, max_tokens=50)
+        result = self.call_llm(prompt, max_tokens=50)
         
-        valid_categories = [
-            'politics', 'economy', 'sports', 'syrian_affairs', 
-            'international', 'technology', 'health', 'culture', 'general'
-        ]
-        
-        if result and result.lower() in valid_categories:
+        if result and result.lower() in self.valid_categories:
             return result.lower()
         else:
             return self.fallback_categorization(title + " " + content)
 
-    def fallback_categorization(self, text: str) -> str:
-        text_lower = text.lower()
-        
-        categories = {
-            'politics': ['سياسة', 'حكومة', 'رئيس', 'وزير', 'برلمان', 'انتخابات', 'دبلوماسية'],
-            'economy': ['اقتصاد', 'بورصة', 'أسهم', 'استثمار', 'تجارة', 'صادرات', 'واردات'],
-            'syrian_affairs': ['سوريا', 'سوري', 'دمشق', 'حلب', 'حمص', 'اللاذقية', 'درعا'],
-            'sports': ['رياضة', 'كرة', 'فوز', 'هزيمة', 'مباراة', 'بطولة', 'منتخب'],
-            'health': ['صحة', 'طب', 'مرض', 'علاج', 'مستشفى', 'طبيب', 'دواء'],
-            'technology': ['تقنية', 'تكنولوجيا', 'ذكاء اصطناعي', 'إنترنت', 'هاتف', 'تطبيق']
-        }
-        
-        for category, keywords in categories.items():
-            for keyword in keywords:
-                if keyword in text_lower:
-                    return category
-        
-        return 'general'
+    def fallback_categorization(self, text: Union[str, AnalyzedText]) -> str:
+        return get_category_matcher().best_category(text)
 
     def analyze_sentiment(self, title: str, content: str) -> float:
         prompt = self.sentiment_prompt.format(title=title, content=content[:1500])
         
-        result = self.call_openai_api(prompt, max_tokens=10)
+        result = self.call_llm(prompt, max_tokens=10)
         
         if result:
             try:
@@ -214,7 +287,7 @@ class MultiAIProcessor:
     def detect_bias(self, title: str, content: str) -> Dict:
         prompt = self.bias_detection_prompt.format(title=title, content=content[:2000])
         
-        result = self.call_openai_api(prompt, max_tokens=300)
+        result = self.call_llm(prompt, max_tokens=300)
         
         return {
             'bias_detected': bool(result and len(result) > 50),
@@ -225,7 +298,7 @@ class MultiAIProcessor:
     def generate_tags(self, title: str, content: str) -> List[str]:
         prompt = self.tags_generation_prompt.format(title=title, content=content[:1500])
         
-        result = self.call_openai_api(prompt, max_tokens=100)
+        result = self.call_llm(prompt, max_tokens=100)
         
         if result:
             tags = [tag.strip() for tag in result.split(',')]
@@ -233,22 +306,8 @@ class MultiAIProcessor:
         else:
             return self.extract_keywords_fallback(title + " " + content)
 
-    def extract_keywords_fallback(self, text: str) -> List[str]:
-        common_words = {
-            'في', 'من', 'إلى', 'على', 'عن', 'مع', 'هذا', 'هذه', 'التي', 'الذي',
-            'كان', 'كانت', 'يكون', 'تكون', 'قال', 'قالت', 'أن', 'أنه', 'أنها',
-            'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with'
-        }
-        
-        words = re.findall(r'\b\w{3,}\b', text.lower())
-        word_freq = {}
-        
-        for word in words:
-            if word not in common_words:
-                word_freq[word] = word_freq.get(word, 0) + 1
-        
-        sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-        return [word for word, freq in sorted_words[:6]]
+    def extract_keywords_fallback(self, text: Union[str, AnalyzedText]) -> List[str]:
+        return analyze(text).keywords(limit=6)
 
     def process_article_complete(self, title: str, content: str) -> Dict:
         logger.info(f"Processing article with AI: {title[:50]}...")
@@ -259,21 +318,26 @@ class MultiAIProcessor:
             'original_title': title,
             'original_content': content,
             'processing_time': None,
-            'ai_enabled': bool(openai.api_key)
+            'ai_enabled': bool(self.router.providers)
         }
         
         try:
-            if self.development_mode or not openai.api_key:
+            if self.development_mode or not self.router.providers:
                 logger.info("Using fallback methods for article processing")
+                analyzed = AnalyzedText(title + " " + content)
                 results.update({
                     'summary': self._create_smart_summary(content),
                     'rewritten_title': self._improve_title(title),
                     'rewritten_content': self._improve_content(content),
-                    'category': self.fallback_categorization(title + " " + content),
-                    'sentiment_score': self._analyze_sentiment_fallback(title + " " + content),
+                    'category': self.fallback_categorization(analyzed),
+                    'sentiment_score': self._analyze_sentiment_fallback(analyzed),
                     'bias_analysis': {'bias_detected': False, 'bias_analysis': 'تحليل متاح في وضع التطوير', 'confidence': 0.8},
-                    'tags': self.extract_keywords_fallback(title + " " + content)
+                    'tags': self.extract_keywords_fallback(analyzed)
                 })
+            elif self.analysis_mode == 'combined':
+                results.update(self.analyze_article_combined(title, content))
+            elif self.concurrent_processing:
+                results.update(self._process_tasks_concurrently(title, content))
             else:
                 summary = self.summarize_article(title, content)
                 rewritten_title, rewritten_content = self.rewrite_article(title, content)
@@ -312,13 +376,232 @@ class MultiAIProcessor:
         
         return results
 
+    def process_articles_batch(self, articles: List[Tuple[str, str]]) -> List[Dict]:
+        """Process many (title, content) pairs, e.g. when backfilling AI fields for the archive.
+
+        With AI providers configured each article goes through
+        ``process_article_complete`` on its own small pool, sized so that the
+        tasks of the articles in flight fit in the task pool, and at most that
+        many articles are queued at a time. Without providers the local
+        fallbacks run once over the whole batch as sparse matrix operations
+        instead of article by article.
+        """
+        if not articles:
+            return []
+        
+        if self.router.providers and not self.development_mode:
+            return self._process_with_providers(articles)
+        
+        from .batch_nlp import BatchTextAnalyzer
+        
+        start_time = datetime.now()
+        analyzer = BatchTextAnalyzer(self.positive_words, self.negative_words, get_category_matcher())
+        batch_results = analyzer.analyze(articles)
+        per_article_time = (datetime.now() - start_time).total_seconds() / len(articles)
+        
+        results = []
+        for (title, content), local in zip(articles, batch_results):
+            results.append({
+                'original_title': title,
+                'original_content': content,
+                'processing_time': per_article_time,
+                'ai_enabled': False,
+                'summary': local['summary'],
+                'rewritten_title': self._improve_title(title),
+                'rewritten_content': self._improve_content(content),
+                'category': local['category'],
+                'sentiment_score': local['sentiment_score'],
+                'bias_analysis': {'bias_detected': False, 'bias_analysis': 'تحليل متاح في وضع التطوير', 'confidence': 0.8},
+                'tags': local['tags']
+            })
+        
+        logger.info(f"Batch of {len(articles)} articles processed locally in {per_article_time * len(articles):.2f} seconds")
+        return results
+
+    def _process_with_providers(self, articles: List[Tuple[str, str]]) -> List[Dict]:
+        in_flight = threading.BoundedSemaphore(self.batch_workers)
+        futures = []
+        for title, content in articles:
+            # لا نرسل الأرشيف كله دفعة واحدة، بل مقالاً جديداً كلما انتهى آخر
+            in_flight.acquire()
+            future = self.batch_executor.submit(self.process_article_complete, title, content)
+            future.add_done_callback(lambda _: in_flight.release())
+            futures.append(future)
+        return [future.result() for future in futures]
+
+    def _article_tasks(self) -> Dict:
+        return {
+            'summary': self.summarize_article,
+            'rewrite': self.rewrite_article,
+            'category': self.categorize_article,
+            'sentiment_score': self.analyze_sentiment,
+            'bias_analysis': self.detect_bias,
+            'tags': self.generate_tags
+        }
+
+    def _task_fallback(self, task: str, title: str, content: str, analyzed: Optional[AnalyzedText] = None):
+        analyzed = analyzed or AnalyzedText(title + " " + content)
+        if task == 'summary':
+            return self._create_smart_summary(content)
+        if task == 'rewrite':
+            return title, content
+        if task == 'category':
+            return self.fallback_categorization(analyzed)
+        if task == 'sentiment_score':
+            return self._analyze_sentiment_fallback(analyzed)
+        if task == 'bias_analysis':
+            return {'bias_detected': False, 'bias_analysis': 'لم يكتمل التحليل ضمن المهلة', 'confidence': 0.0}
+        return self.extract_keywords_fallback(analyzed)
+
+    def _process_tasks_concurrently(self, title: str, content: str, tasks: Optional[List[str]] = None) -> Dict:
+        """Run the per-article AI tasks in parallel and stop waiting at the article deadline.
+
+        Tasks that fail or miss the deadline are filled from the local
+        fallbacks and listed under ``incomplete_tasks``.
+        """
+        article_tasks = self._article_tasks()
+        if tasks is not None:
+            article_tasks = {name: article_tasks[name] for name in tasks}
+        
+        future_to_task = {
+            self.executor.submit(func, title, content): name
+            for name, func in article_tasks.items()
+        }
+        done, not_done = concurrent.futures.wait(future_to_task, timeout=self.article_deadline)
+        
+        completed = {}
+        for future in done:
+            name = future_to_task[future]
+            try:
+                completed[name] = future.result()
+            except Exception as e:
+                logger.error(f"AI task {name} failed: {str(e)}")
+        
+        for future in not_done:
+            future.cancel()
+        
+        incomplete = [name for name in article_tasks if name not in completed]
+        if not_done:
+            logger.warning(f"AI deadline of {self.article_deadline}s reached, missing: {', '.join(incomplete)}")
+        
+        analyzed = AnalyzedText(title + " " + content)
+        for name in incomplete:
+            completed[name] = self._task_fallback(name, title, content, analyzed)
+        
+        results = {}
+        if 'rewrite' in completed:
+            results['rewritten_title'], results['rewritten_content'] = completed.pop('rewrite')
+        results.update(completed)
+        results['incomplete_tasks'] = incomplete
+        return results
+
+    def analyze_article_combined(self, title: str, content: str) -> Dict:
+        """Run all six analyses with one structured-output prompt.
+
+        Fields missing from the reply or failing validation are recomputed
+        with the per-task methods, listed under ``fallback_tasks``.
+        """
+        prompt = self.combined_analysis_prompt.format(title=title, content=content[:3000])
+        result = self.call_llm(prompt, max_tokens=1500)
+        
+        parsed, failed_tasks = self.parse_combined_analysis(result)
+        
+        if failed_tasks:
+            logger.info(f"Combined analysis incomplete, falling back for: {', '.join(failed_tasks)}")
+            if self.concurrent_processing:
+                parsed.update(self._process_tasks_concurrently(title, content, tasks=failed_tasks))
+            else:
+                article_tasks = self._article_tasks()
+                for name in failed_tasks:
+                    value = article_tasks[name](title, content)
+                    if name == 'rewrite':
+                        parsed['rewritten_title'], parsed['rewritten_content'] = value
+                    else:
+                        parsed[name] = value
+        
+        parsed['fallback_tasks'] = failed_tasks
+        return parsed
+
+    def parse_combined_analysis(self, result: Optional[str]) -> Tuple[Dict, List[str]]:
+        """Validate a combined-analysis reply; returns (valid fields, names of failed tasks)."""
+        data = self._extract_json_object(result)
+        parsed = {}
+        failed = []
+        
+        summary = data.get('summary')
+        if isinstance(summary, str) and summary.strip():
+            parsed['summary'] = summary.strip()
+        else:
+            failed.append('summary')
+        
+        new_title = data.get('rewritten_title')
+        new_content = data.get('rewritten_content')
+        if isinstance(new_title, str) and new_title.strip() and isinstance(new_content, str) and new_content.strip():
+            parsed['rewritten_title'] = new_title.strip()
+            parsed['rewritten_content'] = new_content.strip()
+        else:
+            failed.append('rewrite')
+        
+        category = data.get('category')
+        if isinstance(category, str) and category.strip().lower() in self.valid_categories:
+            parsed['category'] = category.strip().lower()
+        else:
+            failed.append('category')
+        
+        try:
+            score = data.get('sentiment_score')
+            if isinstance(score, bool):
+                raise ValueError('boolean sentiment score')
+            parsed['sentiment_score'] = max(-1.0, min(1.0, float(score)))
+        except (TypeError, ValueError):
+            failed.append('sentiment_score')
+        
+        bias = data.get('bias_analysis')
+        if isinstance(bias, dict) and isinstance(bias.get('bias_detected'), bool):
+            try:
+                confidence = max(0.0, min(1.0, float(bias.get('confidence', 0.7))))
+            except (TypeError, ValueError):
+                confidence = 0.7
+            parsed['bias_analysis'] = {
+                'bias_detected': bias['bias_detected'],
+                'bias_analysis': str(bias.get('analysis') or bias.get('bias_analysis') or 'لا يوجد تحيز واضح'),
+                'confidence': confidence
+            }
+        else:
+            failed.append('bias_analysis')
+        
+        tags = data.get('tags')
+        if isinstance(tags, str):
+            tags = tags.split(',')
+        if isinstance(tags, list):
+            tags = [tag.strip() for tag in tags if isinstance(tag, str) and len(tag.strip()) > 2][:8]
+        if isinstance(tags, list) and tags:
+            parsed['tags'] = tags
+        else:
+            failed.append('tags')
+        
+        return parsed, failed
+
+    def _extract_json_object(self, result: Optional[str]) -> Dict:
+        if not result:
+            return {}
+        start = result.find('{')
+        end = result.rfind('}')
+        if start == -1 or end <= start:
+            return {}
+        try:
+            data = json.loads(result[start:end + 1])
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
     def _create_smart_summary(self, content: str) -> str:
         """إنشاء ملخص ذكي بدون AI"""
         if len(content) <= 200:
             return content
         
         # تقسيم المحتوى إلى جمل
-        sentences = content.split('.')
+        sentences = split_sentences(content)
         if len(sentences) <= 3:
             return content[:200] + '...'
         
@@ -345,21 +628,14 @@ class MultiAIProcessor:
 
     def _improve_content(self, content: str) -> str:
         """تحسين المحتوى بدون AI"""
-        # تنظيف النص من التنسيق الزائد
-        import re
-        cleaned = re.sub(r'\s+', ' ', content)  # إزالة المسافات الزائدة
-        cleaned = re.sub(r'[^\w\s\.\,\!\?\-]', '', cleaned)  # إزالة الرموز غير المرغوبة
-        
-        return cleaned.strip()
+        # تنظيف النص من التنسيق الزائد والتشكيل مع الإبقاء على علامات الترقيم العربية
+        return clean_content(content)
 
-    def _analyze_sentiment_fallback(self, text: str) -> float:
+    def _analyze_sentiment_fallback(self, text: Union[str, AnalyzedText]) -> float:
         """تحليل المشاعر بدون AI"""
-        positive_words = ['إيجابي', 'ممتاز', 'نجح', 'تحسن', 'أفضل', 'مفيد', 'جيد']
-        negative_words = ['سلبي', 'فشل', 'مشكلة', 'خطأ', 'سيء', 'ضعيف', 'مخيب']
-        
-        text_lower = text.lower()
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
+        analyzed = analyze(text)
+        positive_count = analyzed.count_terms(self.positive_words)
+        negative_count = analyzed.count_terms(self.negative_words)
         
         if positive_count == 0 and negative_count == 0:
             return 0.0
@@ -388,11 +664,14 @@ class MultiAIProcessor:
                 "temperature": 0.2
             }
             
-            response = requests.post(self.perplexity_base_url, headers=headers, json=data)
-            response.raise_for_status()
+            def request():
+                response = requests.post(self.perplexity_base_url, headers=headers, json=data, timeout=self.request_timeout)
+                response.raise_for_status()
+                
+                result = response.json()
+                return result['choices'][0]['message']['content'].strip()
             
-            result = response.json()
-            return result['choices'][0]['message']['content'].strip()
+            return self._cached_call('perplexity', model, prompt, {'max_tokens': 1000, 'temperature': 0.2}, request)
             
         except Exception as e:
             logger.error(f"Perplexity API error: {str(e)}")
@@ -417,11 +696,14 @@ class MultiAIProcessor:
                 "messages": [{"role": "user", "content": prompt}]
             }
             
-            response = requests.post(self.claude_base_url, headers=headers, json=data)
-            response.raise_for_status()
+            def request():
+                response = requests.post(self.claude_base_url, headers=headers, json=data, timeout=self.request_timeout)
+                response.raise_for_status()
+                
+                result = response.json()
+                return result['content'][0]['text'].strip()
             
-            result = response.json()
-            return result['content'][0]['text'].strip()
+            return self._cached_call('claude', model, prompt, {'max_tokens': 1000}, request)
             
         except Exception as e:
             logger.error(f"Claude API error: {str(e)}")
@@ -447,11 +729,15 @@ class MultiAIProcessor:
             }
             
             url = f"{self.gemini_base_url}?key={self.gemini_key}"
-            response = requests.post(url, headers=headers, json=data)
-            response.raise_for_status()
             
-            result = response.json()
-            return result['candidates'][0]['content']['parts'][0]['text'].strip()
+            def request():
+                response = requests.post(url, headers=headers, json=data, timeout=self.request_timeout)
+                response.raise_for_status()
+                
+                result = response.json()
+                return result['candidates'][0]['content']['parts'][0]['text'].strip()
+            
+            return self._cached_call('gemini', 'gemini-pro', prompt, data['generationConfig'], request)
             
         except Exception as e:
             logger.error(f"Gemini API error: {str(e)}")
@@ -508,14 +794,6 @@ class MultiAIProcessor:
         
         قدم المعلومات باللغة العربية بشكل مفصل ومهني.
         """
-        perplexity_result = self.call_perplexity_api(perplexity_prompt)
-        if perplexity_result:
-            results['perplexity'] = {
-                "content": perplexity_result,
-                "role": "real_time_research",
-                "success": True
-            }
-            results['models_used'].append("perplexity")
         
         claude_prompt = f"""
         حلل الأهمية والتداعيات المتعلقة بـ: {topic}
@@ -529,14 +807,6 @@ class MultiAIProcessor:
         
         اكتب التحليل باللغة العربية بأسلوب أكاديمي متخصص.
         """
-        claude_result = self.call_claude_api(claude_prompt)
-        if claude_result:
-            results['claude'] = {
-                "content": claude_result,
-                "role": "expert_analysis",
-                "success": True
-            }
-            results['models_used'].append("claude")
         
         gemini_prompt = f"""
         قدم سياقاً إضافياً وخلفية شاملة حول: {topic}
@@ -550,14 +820,37 @@ class MultiAIProcessor:
         
         اكتب المحتوى باللغة العربية بأسلوب واضح ومفهوم.
         """
-        gemini_result = self.call_gemini_api(gemini_prompt)
-        if gemini_result:
-            results['gemini'] = {
-                "content": gemini_result,
-                "role": "contextual_background",
-                "success": True
-            }
-            results['models_used'].append("gemini")
+        
+        research_tasks = [
+            ('perplexity', self.call_perplexity_api, perplexity_prompt, "real_time_research"),
+            ('claude', self.call_claude_api, claude_prompt, "expert_analysis"),
+            ('gemini', self.call_gemini_api, gemini_prompt, "contextual_background")
+        ]
+        
+        # الاستعلامات الثلاثة مستقلة فتُرسل معاً وتنتظر مهلة طلب واحد فقط
+        futures = [
+            (model_name, role, self.executor.submit(api_func, prompt))
+            for model_name, api_func, prompt, role in research_tasks
+        ]
+        done, _ = concurrent.futures.wait([future for _, _, future in futures], timeout=self.request_timeout)
+        
+        for model_name, role, future in futures:
+            if future not in done:
+                future.cancel()
+                logger.warning(f"Research with {model_name} timed out")
+                continue
+            try:
+                model_result = future.result()
+            except Exception as e:
+                logger.error(f"Error with {model_name}: {str(e)}")
+                continue
+            if model_result:
+                results[model_name] = {
+                    "content": model_result,
+                    "role": role,
+                    "success": True
+                }
+                results['models_used'].append(model_name)
         
         results['synthesis'] = self._synthesize_research_results(results)
         
@@ -596,10 +889,13 @@ class MultiAIProcessor:
                 'temperature': 0.7
             }
             
-            response = requests.post(self.cohere_base_url, headers=headers, json=data, timeout=30)
-            if response.status_code == 200:
-                return response.json().get('generations', [{}])[0].get('text', '')
-            return f"Cohere API error: {response.status_code}"
+            def request():
+                response = requests.post(self.cohere_base_url, headers=headers, json=data, timeout=self.request_timeout)
+                if response.status_code == 200:
+                    return response.json().get('generations', [{}])[0].get('text', '')
+                raise requests.HTTPError(str(response.status_code))
+            
+            return self._cached_call('cohere', data['model'], prompt, {'max_tokens': 500, 'temperature': 0.7}, request)
         except Exception as e:
             return f"Cohere API error: {str(e)}"
     
@@ -621,13 +917,16 @@ class MultiAIProcessor:
                 }
             }
             
-            response = requests.post(f"{self.huggingface_base_url}/{model}", headers=headers, json=data, timeout=30)
-            if response.status_code == 200:
-                result = response.json()
-                if isinstance(result, list) and len(result) > 0:
-                    return result[0].get('generated_text', '')
-                return str(result)
-            return f"HuggingFace API error: {response.status_code}"
+            def request():
+                response = requests.post(f"{self.huggingface_base_url}/{model}", headers=headers, json=data, timeout=self.request_timeout)
+                if response.status_code == 200:
+                    result = response.json()
+                    if isinstance(result, list) and len(result) > 0:
+                        return result[0].get('generated_text', '')
+                    return str(result)
+                raise requests.HTTPError(str(response.status_code))
+            
+            return self._cached_call('huggingface', model, prompt, data['parameters'], request)
         except Exception as e:
             return f"HuggingFace API error: {str(e)}"
     
@@ -648,10 +947,13 @@ class MultiAIProcessor:
                 'temperature': 0.7
             }
             
-            response = requests.post(self.mistral_base_url, headers=headers, json=data, timeout=30)
-            if response.status_code == 200:
-                return response.json().get('choices', [{}])[0].get('message', {}).get('content', '')
-            return f"Mistral API error: {response.status_code}"
+            def request():
+                response = requests.post(self.mistral_base_url, headers=headers, json=data, timeout=self.request_timeout)
+                if response.status_code == 200:
+                    return response.json().get('choices', [{}])[0].get('message', {}).get('content', '')
+                raise requests.HTTPError(str(response.status_code))
+            
+            return self._cached_call('mistral', data['model'], prompt, {'max_tokens': 500, 'temperature': 0.7}, request)
         except Exception as e:
             return f"Mistral API error: {str(e)}"
     
@@ -669,8 +971,6 @@ class MultiAIProcessor:
         4. التوصيات
         """
         
-        results = []
-        
         models = [
             ('perplexity', self.call_perplexity_api),
             ('claude', self.call_claude_api),
@@ -679,20 +979,86 @@ class MultiAIProcessor:
             ('mistral', self.call_mistral_api)
         ]
         
+        results = []
+        votes = {}
+        verdict = None
+        
+        stream = self.stream_fact_check_results(fact_check_prompt, models)
+        try:
+            for result in stream:
+                results.append(result)
+                if result['verdict']:
+                    votes[result['verdict']] = votes.get(result['verdict'], 0) + 1
+                    if votes[result['verdict']] >= self.fact_check_quorum:
+                        verdict = result['verdict']
+                        break
+        finally:
+            stream.close()
+        
+        early_exit = verdict is not None and len(results) < len(models)
+        if verdict is None and votes:
+            verdict = max(votes, key=votes.get)
+        
+        return {
+            'fact_check_results': results,
+            'consensus_score': votes.get(verdict, 0) / len(results) if results else 0.0,
+            'verdict': verdict,
+            'verdict_votes': votes,
+            'early_exit': early_exit,
+            'verification_timestamp': datetime.now().isoformat()
+        }
+
+    def stream_fact_check_results(self, prompt: str, models: List[Tuple[str, object]]):
+        """Query all fact-checking models at once and yield each usable reply as it arrives.
+
+        Closing the generator early (e.g. once a quorum agrees) cancels the
+        requests that have not started yet and stops waiting for the rest.
+        """
+        future_to_model = {}
         for model_name, api_func in models:
-            try:
-                result = api_func(fact_check_prompt)
+            state = self.router.providers.get(model_name)
+            if state is not None and not state.breaker.is_available():
+                logger.info(f"Skipping {model_name} for fact-check: circuit open")
+                continue
+            future_to_model[self.executor.submit(api_func, prompt)] = model_name
+        
+        try:
+            for future in concurrent.futures.as_completed(future_to_model, timeout=self.request_timeout):
+                model_name = future_to_model[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Error with {model_name}: {str(e)}")
+                    continue
                 if result and "error" not in result.lower():
-                    results.append({
+                    yield {
                         'model': model_name,
                         'content': result,
+                        'verdict': self.extract_credibility_verdict(result),
                         'timestamp': datetime.now().isoformat()
-                    })
-            except Exception as e:
-                logger.error(f"Error with {model_name}: {str(e)}")
-        
-        return {
-            'fact_check_results': results,
-            'consensus_score': len(results) / len(models),
-            'verification_timestamp': datetime.now().isoformat()
+                    }
+        except concurrent.futures.TimeoutError:
+            logger.warning(f"Fact-check timed out after {self.request_timeout}s")
+        finally:
+            for future in future_to_model:
+                future.cancel()
+
+    def extract_credibility_verdict(self, text: str) -> Optional[str]:
+        """Map the model's credibility level (عالي/متوسط/منخفض) to high/medium/low."""
+        # حدود الكلمات حتى لا تُحتسب highlight أو below أو follow حكماً
+        patterns = {
+            'high': r'\bعال(?:ية|ي|ٍ)|\bhigh\b',
+            'medium': r'\bمتوسط(?:ة)?\b|\bmedium\b',
+            'low': r'\bمنخفض(?:ة)?\b|\blow\b'
         }
+        
+        anchor = re.search(r'المصداقية|credibility', text, re.IGNORECASE)
+        search_text = text[anchor.end():] if anchor else text
+        
+        earliest = None
+        for verdict, pattern in patterns.items():
+            match = re.search(pattern, search_text, re.IGNORECASE)
+            if match and (earliest is None or match.start() < earliest[0]):
+                earliest = (match.start(), verdict)
+        
+        return earliest[1] if earliest else None
@@ -0,0 +1,258 @@
+import concurrent.futures
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    """Per-provider breaker: opens after consecutive failures, probes again after a cool-down."""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.time() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def is_available(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                return time.time() - self.opened_at >= self.reset_timeout
+            return not self._probe_in_flight
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit opened after {self.consecutive_failures} consecutive failures")
+                self.state = self.OPEN
+                self.opened_at = time.time()
+            self._probe_in_flight = False
+
+class ProviderState:
+    def __init__(self, name: str, func: Callable, breaker: CircuitBreaker, alpha: float):
+        self.name = name
+        self.func = func
+        self.breaker = breaker
+        self.alpha = alpha
+        self.ewma_latency = None
+        self.successes = 0
+        self.failures = 0
+        self.timeouts = 0
+
+    def observe_latency(self, latency: float):
+        if self.ewma_latency is None:
+            self.ewma_latency = latency
+        else:
+            self.ewma_latency = self.alpha * latency + (1 - self.alpha) * self.ewma_latency
+
+class Attempt:
+    """One request to one provider; its outcome is recorded once, by whichever side settles it first."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = None
+        self.settled = False
+
+class ProviderRouter:
+    """Sends each prompt to the fastest healthy provider and hedges slow requests.
+
+    Providers are callables ``func(prompt, max_tokens) -> Optional[str]`` that
+    return None on failure. Latency is tracked as an EWMA per provider and
+    each provider has its own circuit breaker. If the chosen provider has not
+    answered within a hedge delay derived from its EWMA, the next-best
+    provider is started as well and the first successful reply wins.
+
+    Hedge delays and the ``timeout`` run from the moment a request actually
+    starts on the router's pool, so requests queued behind others are neither
+    hedged nor counted as timeouts. A request still queued after ``timeout``
+    is cancelled without touching its provider's breaker, which bounds a call
+    at twice the timeout when the pool is saturated.
+    """
+
+    # كم ننتظر قبل أن نتحقق مجدداً هل بدأ الطلب المنتظر في الطابور
+    queue_poll_interval = 0.05
+
+    def __init__(self, timeout: float = 30, hedge_multiplier: float = 2.0, min_hedge_delay: float = 2.0,
+                 default_hedge_delay: float = 5.0, failure_threshold: int = 3, reset_timeout: float = 60,
+                 ewma_alpha: float = 0.3, max_workers: int = 16):
+        self.timeout = timeout
+        self.hedge_multiplier = hedge_multiplier
+        self.min_hedge_delay = min_hedge_delay
+        self.default_hedge_delay = default_hedge_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.ewma_alpha = ewma_alpha
+        self.providers: Dict[str, ProviderState] = {}
+        self.hedged_requests = 0
+        self._lock = threading.Lock()
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ai-router')
+
+    def register(self, name: str, func: Callable):
+        breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        self.providers[name] = ProviderState(name, func, breaker, self.ewma_alpha)
+
+    def available_providers(self, names: Optional[List[str]] = None) -> List[str]:
+        """Healthy providers, fastest first; providers without samples are tried first to learn their latency."""
+        candidates = [
+            state for name, state in self.providers.items()
+            if (names is None or name in names) and state.breaker.is_available()
+        ]
+        order = {name: i for i, name in enumerate(self.providers)}
+        candidates.sort(key=lambda state: (state.ewma_latency or 0.0, order[state.name]))
+        return [state.name for state in candidates]
+
+    def hedge_delay(self, name: str) -> float:
+        ewma = self.providers[name].ewma_latency
+        if ewma is None:
+            return self.default_hedge_delay
+        return max(self.min_hedge_delay, ewma * self.hedge_multiplier)
+
+    def _settle(self, attempt: Attempt, outcome: str, latency: Optional[float] = None) -> bool:
+        """Record ``outcome`` (success, failure or timeout) for ``attempt`` unless it was already recorded."""
+        state = self.providers[attempt.name]
+        with self._lock:
+            if attempt.settled:
+                return False
+            attempt.settled = True
+            if outcome == 'success':
+                state.successes += 1
+                state.observe_latency(latency)
+            elif outcome == 'timeout':
+                state.timeouts += 1
+            else:
+                state.failures += 1
+        if outcome == 'success':
+            state.breaker.record_success()
+        else:
+            state.breaker.record_failure()
+        return True
+
+    def _invoke(self, attempt: Attempt, prompt: str, max_tokens: int) -> Optional[str]:
+        state = self.providers[attempt.name]
+        attempt.started = time.time()
+        try:
+            result = state.func(prompt, max_tokens)
+        except Exception as e:
+            logger.error(f"Provider {attempt.name} raised: {str(e)}")
+            result = None
+        latency = time.time() - attempt.started
+
+        if latency > self.timeout:
+            self._settle(attempt, 'timeout')
+        else:
+            self._settle(attempt, 'success' if result else 'failure', latency)
+        return result
+
+    def _deadline(self, attempt: Attempt, call_start: float) -> float:
+        return (attempt.started or call_start) + self.timeout
+
+    def call(self, prompt: str, max_tokens: int = 500, providers: Optional[List[str]] = None) -> Optional[str]:
+        candidates = self.available_providers(providers)
+        call_start = time.time()
+        in_flight: Dict[concurrent.futures.Future, Attempt] = {}
+
+        def launch() -> bool:
+            while candidates:
+                name = candidates.pop(0)
+                if self.providers[name].breaker.allow_request():
+                    attempt = Attempt(name)
+                    in_flight[self.executor.submit(self._invoke, attempt, prompt, max_tokens)] = attempt
+                    return True
+            return False
+
+        if not launch():
+            return None
+
+        try:
+            while in_flight:
+                now = time.time()
+                remaining = max(self._deadline(attempt, call_start) for attempt in in_flight.values()) - now
+                if remaining <= 0:
+                    break
+
+                wait_for = remaining
+                hedge_at = None
+                if candidates and len(in_flight) == 1:
+                    attempt = next(iter(in_flight.values()))
+                    if attempt.started is None:
+                        wait_for = min(remaining, self.queue_poll_interval)
+                    else:
+                        hedge_at = attempt.started + self.hedge_delay(attempt.name)
+                        wait_for = min(remaining, max(0.0, hedge_at - now))
+
+                done, _ = concurrent.futures.wait(in_flight, timeout=wait_for, return_when=concurrent.futures.FIRST_COMPLETED)
+
+                if not done:
+                    if hedge_at is not None and time.time() >= hedge_at and launch():
+                        with self._lock:
+                            self.hedged_requests += 1
+                        logger.info(f"Hedging slow request to {', '.join(a.name for a in in_flight.values())}")
+                    continue
+
+                for future in done:
+                    in_flight.pop(future)
+                    result = future.result()
+                    if result:
+                        return result
+
+                if not in_flight:
+                    launch()
+
+            now = time.time()
+            for future, attempt in in_flight.items():
+                if future.cancel():
+                    logger.warning(f"Request to {attempt.name} never started within {self.timeout}s")
+                elif attempt.started is not None and now - attempt.started >= self.timeout:
+                    if self._settle(attempt, 'timeout'):
+                        logger.warning(f"Provider {attempt.name} timed out after {self.timeout}s")
+            return None
+        finally:
+            # الطلبات الخاسرة التي لم تبدأ بعد لا داعي لتشغيلها
+            for future in in_flight:
+                future.cancel()
+
+    def get_status(self) -> Dict:
+        return {
+            'timeout_seconds': self.timeout,
+            'hedged_requests': self.hedged_requests,
+            'providers': {
+                name: {
+                    'state': state.breaker.state,
+                    'ewma_latency': round(state.ewma_latency, 3) if state.ewma_latency is not None else None,
+                    'successes': state.successes,
+                    'failures': state.failures,
+                    'timeouts': state.timeouts
+                }
+                for name, state in self.providers.items()
+            }
+        }
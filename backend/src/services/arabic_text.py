@@ -0,0 +1,225 @@
+import re
+from functools import cached_property, lru_cache
+from itertools import chain
+from typing import Dict, FrozenSet, Iterable, List, Optional, Union
+
+# تعابير منتظمة مُجمّعة مسبقاً تُستخدم في كل مسارات المعالجة المحلية
+# التشكيل والتطويل يُحذفان في مرور واحد على النص
+DIACRITICS_RE = re.compile(r'[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+TOKEN_RE = re.compile(r'[^\W\d_]+|\d+')
+SENTENCE_RE = re.compile(r'[.!?؟\n]+')
+SEGMENT_RE = re.compile(r'[^\W\d_]+|\d+|[.!?؟\n]+')
+SENTENCE_BREAKS = frozenset('.!?؟\n')
+WHITESPACE_RE = re.compile(r'\s+')
+UNWANTED_SYMBOLS_RE = re.compile(r'[^\w\s.,!?\-:;()"\'«»،؛؟]')
+
+# طيّ الحروف: str.replace أسرع بكثير من translate أو re.sub على النص العربي
+LETTER_FOLDS = (
+    ('\u0622', 'ا'), ('\u0623', 'ا'), ('\u0625', 'ا'), ('\u0671', 'ا'),
+    ('ى', 'ي'), ('ة', 'ه'), ('ؤ', 'و'), ('ئ', 'ي')
+)
+
+PREFIXES = ('وال', 'بال', 'كال', 'فال', 'لل', 'ال')
+SUFFIXES = ('ات', 'ون', 'ين', 'ان', 'ها', 'يه', 'يا', 'ه', 'ي')
+# ما يُقبل بعد الكلمة في count_terms: تصريف الفعل (نجحت، فشلوا) ولواحق الاسم
+TERM_SUFFIXES = ('', 'ت', 'ن', 'ا', 'وا', 'تا', 'تم') + SUFFIXES
+TERM_CLITICS = ('و', 'ف', 'ب', 'ل')
+MIN_STEM_LENGTH = 3
+
+_RAW_STOPWORDS = {
+    'في', 'من', 'إلى', 'الى', 'على', 'عن', 'مع', 'هذا', 'هذه', 'ذلك', 'تلك', 'هناك', 'هنا',
+    'التي', 'الذي', 'الذين', 'اللذين', 'اللواتي', 'ما', 'ماذا', 'لماذا', 'كيف', 'متى', 'أين',
+    'كان', 'كانت', 'كانوا', 'يكون', 'تكون', 'ليس', 'ليست', 'قد', 'لقد', 'لم', 'لن', 'لا',
+    'قال', 'قالت', 'وقال', 'وقالت', 'أن', 'إن', 'أنه', 'أنها', 'إنه', 'إنها', 'أو', 'أم', 'ثم',
+    'بل', 'لكن', 'لكنه', 'حتى', 'إذا', 'إذ', 'كل', 'بعض', 'غير', 'بين', 'بعد', 'قبل', 'خلال',
+    'عند', 'عندما', 'حيث', 'منذ', 'نحو', 'ضد', 'فوق', 'تحت', 'أمام', 'وراء', 'حول', 'دون',
+    'هو', 'هي', 'هم', 'هن', 'نحن', 'أنا', 'أنت', 'أنتم', 'له', 'لها', 'لهم', 'به', 'بها',
+    'فيه', 'فيها', 'منه', 'منها', 'عليه', 'عليها', 'الآن', 'أيضا', 'أيضاً', 'كما', 'وكان',
+    'يتم', 'تم', 'وقد', 'وفي', 'ومن', 'وعلى', 'وأن', 'وهو', 'وهي', 'التى', 'اي', 'أي', 'عام',
+    'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'a', 'an', 'is',
+    'are', 'was', 'were', 'be', 'been', 'by', 'from', 'as', 'that', 'this', 'it', 'its',
+    'has', 'have', 'had', 'not', 'will', 'would', 'said', 'says'
+}
+
+def strip_diacritics(text: str) -> str:
+    """Remove tashkeel and tatweel, keeping the letters as written."""
+    return DIACRITICS_RE.sub('', text)
+
+def normalize_letters(text: str) -> str:
+    """Fold alef, alef maqsura, ta marbuta and hamza carriers to one form each."""
+    for variant, base in LETTER_FOLDS:
+        text = text.replace(variant, base)
+    return text
+
+def normalize_arabic(text: str) -> str:
+    return normalize_letters(strip_diacritics(text.lower()))
+
+STOPWORDS = frozenset(normalize_arabic(word) for word in _RAW_STOPWORDS)
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text)
+
+def normalize_tokens(tokens: List[str]) -> List[str]:
+    # الكلمات لا تحوي مسافات، فطيّ الحروف على النص المجمّع يحافظ على تطابق المواضع
+    return normalize_letters(' '.join(tokens)).split(' ') if tokens else []
+
+@lru_cache(maxsize=100000)
+def light_stem(token: str) -> str:
+    """Strip one definite-article prefix and one common suffix, never below three letters.
+
+    Expects a normalized token, so that سوريا، سورية and السوري all reduce to سور.
+    Word frequencies are heavily skewed, so results are memoized per token.
+    """
+    for prefix in PREFIXES:
+        if token.startswith(prefix) and len(token) - len(prefix) >= MIN_STEM_LENGTH:
+            token = token[len(prefix):]
+            break
+    for suffix in SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM_LENGTH:
+            token = token[:-len(suffix)]
+            break
+    return token
+
+@lru_cache(maxsize=100000)
+def stem_bases(stem: str) -> FrozenSet[str]:
+    """Forms a whole-word term may take inside ``stem``: the stem itself and the stem
+    without one leading clitic and/or one inflectional suffix (نجحت -> نجح، وفشل -> فشل).
+    """
+    cores = [stem]
+    if stem[:1] in TERM_CLITICS and len(stem) > MIN_STEM_LENGTH:
+        cores.append(stem[1:])
+    return frozenset(
+        core[:len(core) - len(suffix)]
+        for core in cores for suffix in TERM_SUFFIXES
+        if core.endswith(suffix) and len(core) - len(suffix) >= 2
+    )
+
+STOPWORD_STEMS = frozenset(light_stem(word) for word in STOPWORDS)
+
+def is_keyword_stem(stem: str, min_length: int = 3) -> bool:
+    return len(stem) >= min_length and stem not in STOPWORD_STEMS and not stem.isdigit()
+
+@lru_cache(maxsize=4096)
+def stem_phrase(phrase: str) -> str:
+    """Normalized, stemmed form of a lexicon term, comparable with ``AnalyzedText.stemmed_text``."""
+    return ' '.join(light_stem(token) for token in tokenize(normalize_arabic(phrase)))
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence.strip() for sentence in SENTENCE_RE.split(text) if sentence.strip()]
+
+def clean_content(text: str) -> str:
+    """Collapse whitespace, drop diacritics and stray symbols, keep Arabic and Latin punctuation."""
+    cleaned = strip_diacritics(WHITESPACE_RE.sub(' ', text))
+    return UNWANTED_SYMBOLS_RE.sub('', cleaned).strip()
+
+class AnalyzedText:
+    """One article's text, normalized and tokenized once and shared by the local NLP fallbacks.
+
+    Every view is computed lazily on first access and cached, so the
+    categorizer, sentiment scorer, tagger and summarizer reuse the same
+    tokens instead of lowercasing and scanning the raw text each time.
+    """
+
+    def __init__(self, text: str):
+        self.text = text or ''
+
+    @classmethod
+    def from_parts(cls, parts: List['AnalyzedText'], text: Optional[str] = None) -> 'AnalyzedText':
+        """Combine already analyzed pieces (e.g. a title and its sentences) without tokenizing again."""
+        combined = cls(text if text is not None else ' '.join(part.text for part in parts))
+        combined.__dict__['tokens'] = list(chain.from_iterable(part.tokens for part in parts))
+        combined.__dict__['normalized_tokens'] = list(chain.from_iterable(part.normalized_tokens for part in parts))
+        combined.__dict__['stems'] = list(chain.from_iterable(part.stems for part in parts))
+        return combined
+
+    @classmethod
+    def split(cls, text: str) -> List['AnalyzedText']:
+        """Analyze ``text`` sentence by sentence while normalizing and tokenizing it only once.
+
+        Sentence delimiters are kept as tokens in a single scan and the token
+        list is cut at them.
+        """
+        text = text or ''
+        surface = SEGMENT_RE.findall(strip_diacritics(text.lower()))
+        normalized = normalize_tokens(surface)
+        breaks = [i for i, token in enumerate(surface) if token[0] in SENTENCE_BREAKS]
+        raw_pieces = SENTENCE_RE.split(text)
+        
+        if len(raw_pieces) != len(breaks) + 1:
+            # تشكيل بين علامتي ترقيم يغيّر عدد المقاطع، فتُحلل كل جملة على حدة
+            return [cls(sentence) for sentence in split_sentences(text)]
+        
+        sentences = []
+        start = 0
+        for raw, end in zip(raw_pieces, breaks + [len(surface)]):
+            raw = raw.strip()
+            if raw:
+                sentence = cls(raw)
+                sentence.__dict__['tokens'] = surface[start:end]
+                sentence.__dict__['normalized_tokens'] = normalized[start:end]
+                sentences.append(sentence)
+            start = end + 1
+        return sentences
+
+    @cached_property
+    def tokens(self) -> List[str]:
+        """Surface tokens: lowercased, diacritics removed, spelling preserved."""
+        return tokenize(strip_diacritics(self.text.lower()))
+
+    @cached_property
+    def normalized_tokens(self) -> List[str]:
+        return normalize_tokens(self.tokens)
+
+    @cached_property
+    def normalized(self) -> str:
+        return ' '.join(self.normalized_tokens)
+
+    @cached_property
+    def stems(self) -> List[str]:
+        return list(map(light_stem, self.normalized_tokens))
+
+    @cached_property
+    def stemmed_text(self) -> str:
+        return ' '.join(self.stems)
+
+    @cached_property
+    def sentences(self) -> List[str]:
+        return split_sentences(self.text)
+
+    @cached_property
+    def term_bases(self) -> FrozenSet[str]:
+        return frozenset(base for stem in self.stems for base in stem_bases(stem))
+
+    def count_terms(self, terms: Iterable[str]) -> int:
+        """How many of ``terms`` occur in the text as whole words, compared after normalization and stemming.
+
+        A word may carry a clitic and an inflection (نجحت، والفشل), but the
+        term has to fill the rest of it, so a folded خطأ -> خطا is not found
+        inside خطابا. Phrases match runs of whole stems.
+        """
+        count = 0
+        for term in terms:
+            stemmed = stem_phrase(term)
+            if ' ' in stemmed:
+                count += f" {stemmed} " in f" {self.stemmed_text} "
+            else:
+                count += stemmed in self.term_bases
+        return count
+
+    def keywords(self, limit: int = 6, min_length: int = 3) -> List[str]:
+        """Most frequent non-stopword terms, counted by stem and reported in their shortest surface form."""
+        counts: Dict[str, int] = {}
+        surface: Dict[str, str] = {}
+        for token, stem in zip(self.tokens, self.stems):
+            if not is_keyword_stem(stem, min_length):
+                continue
+            counts[stem] = counts.get(stem, 0) + 1
+            if stem not in surface or (len(token), token) < (len(surface[stem]), surface[stem]):
+                surface[stem] = token
+
+        ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)
+        return [surface[stem] for stem, _ in ranked[:limit]]
+
+def analyze(text: Union[str, AnalyzedText]) -> AnalyzedText:
+    return text if isinstance(text, AnalyzedText) else AnalyzedText(text)
+
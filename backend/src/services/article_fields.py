@@ -0,0 +1,58 @@
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import joinedload, load_only
+
+from ..models.news import NewsArticle, NewsSource
+
+class InvalidFields(ValueError):
+    pass
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+# حقول قوائم المقالات: الاسم -> (الأعمدة التي يحتاجها، طريقة قراءته). المحتوى الكامل غير متاح
+# في القوائم عمداً ويُجلب من /articles/<id> فقط
+LIST_FIELDS: Dict[str, Tuple[Tuple[str, ...], Callable]] = {
+    'id': ((), lambda article: article.id),
+    'title': (('title',), lambda article: article.title),
+    'summary': (('summary',), lambda article: article.summary),
+    'ai_summary': (('ai_summary',), lambda article: article.ai_summary),
+    'image_url': (('image_url',), lambda article: article.image_url),
+    'original_url': (('original_url',), lambda article: article.original_url),
+    'author': (('author',), lambda article: article.author),
+    'category': (('category',), lambda article: article.category.value if article.category else None),
+    'status': (('status',), lambda article: article.status.value if article.status else None),
+    'source': (('source_id',), lambda article: article.source.name if article.source else None),
+    'published_at': (('published_at',), lambda article: _iso(article.published_at)),
+    'updated_at': (('updated_at',), lambda article: _iso(article.updated_at)),
+    'views': (('views',), lambda article: article.views),
+    'ai_processed': (('ai_processed',), lambda article: article.ai_processed),
+    'sentiment_score': (('sentiment_score',), lambda article: article.sentiment_score),
+}
+
+def parse_fields(requested: Optional[str], default: Sequence[str]) -> List[str]:
+    """Fields named in a ``fields=a,b,c`` parameter, or ``default`` when it is absent."""
+    if not requested:
+        return list(default)
+    fields = list(dict.fromkeys(name.strip() for name in requested.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in LIST_FIELDS]
+    if unknown:
+        raise InvalidFields(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(LIST_FIELDS)}")
+    return fields or list(default)
+
+def projection(fields: Iterable[str], always: Iterable[str] = ('published_at',)) -> List:
+    """Query options that load only the columns behind ``fields``, plus the source name when it is asked for.
+
+    ``always`` names columns the route needs for itself, e.g. the
+    ``published_at`` that keyset cursors are built from.
+    """
+    columns = set(always)
+    for name in fields:
+        columns.update(LIST_FIELDS[name][0])
+    options = [load_only(*(getattr(NewsArticle, column) for column in sorted(columns)))]
+    if 'source' in fields:
+        options.append(joinedload(NewsArticle.source).load_only(NewsSource.name))
+    return options
+
+def serialize(article: NewsArticle, fields: Iterable[str]) -> Dict:
+    return {name: LIST_FIELDS[name][1](article) for name in fields}
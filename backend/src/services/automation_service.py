@@ -3,14 +3,21 @@ import threading
 import schedule
 from datetime import datetime, timedelta
 import logging
-from typing import Dict, List
+from typing import Dict, List, Tuple
 import json
 import hashlib
 
 from ..services.news_scraper import NewsScraper, NewsArticleData
 from .ai_processor import MultiAIProcessor
+from .pipeline import ScrapingPipeline
+from .near_duplicates import create_story_index
+from .search_index import get_search_index
+from .response_cache import get_response_cache, invalidate_responses
+from .rollups import naive_utc, prune_hourly, record_articles
+from .realtime_broker import get_broker, publish_change
 from ..services.performance_monitor import performance_monitor
 from ..models.database import db
+from ..models.migrations import run_migrations
 from ..models.news import NewsArticle, NewsSource, NewsCategory, NewsStatus, ScrapingLog
 
 logging.basicConfig(level=logging.INFO)
@@ -29,11 +36,22 @@ class AutomationService:
         self.auto_publish = True
         self.ai_processing_enabled = True
         
+        self.fetch_workers = 4
+        self.ai_workers = 4
+        self.pipeline_queue_size = 20
+        self.db_batch_size = 50
+        self.bulk_lookup_chunk = 500
+        
+        self.story_index = create_story_index()
+        self.story_window_hours = 48
+        self.migrations_applied = False
+        
         self.stats = {
             "total_scraped": 0,
             "total_processed": 0,
             "total_published": 0,
             "last_run": None,
+            "near_duplicates": 0,
             "errors": 0
         }
 
@@ -48,6 +66,67 @@ class AutomationService:
             existing = NewsArticle.query.filter_by(content_hash=article_hash).first()
             return existing is not None
 
+    def load_seen_urls(self) -> int:
+        if not self.app:
+            return 0
+        with self.app.app_context():
+            rows = db.session.query(NewsArticle.original_url).filter(
+                NewsArticle.original_url.isnot(None)
+            ).yield_per(10000)
+            return self.scraper.seen_urls.load(row.original_url for row in rows)
+
+    def ensure_seen_urls_loaded(self):
+        if self.scraper.seen_urls.loaded:
+            return
+        try:
+            self.load_seen_urls()
+        except Exception as e:
+            logger.error(f"Error loading seen-URL index: {str(e)}")
+
+    def load_recent_stories(self) -> int:
+        if not self.app or self.story_index is None:
+            return 0
+        since = datetime.utcnow() - timedelta(hours=self.story_window_hours)
+        with self.app.app_context():
+            rows = db.session.query(
+                NewsArticle.id, NewsArticle.original_url, NewsArticle.title, NewsArticle.content
+            ).filter(NewsArticle.created_at >= since).order_by(NewsArticle.created_at).yield_per(1000)
+            return self.story_index.load(
+                (row.original_url or f"article:{row.id}", f"{row.title} {row.content or ''}")
+                for row in rows
+            )
+
+    def ensure_story_index_loaded(self):
+        if self.story_index is None or self.story_index.loaded:
+            return
+        try:
+            self.load_recent_stories()
+        except Exception as e:
+            logger.error(f"Error loading story index: {str(e)}")
+
+    def ensure_database_migrated(self):
+        # قواعد البيانات القائمة لا تحصل على الفهارس وجداول التجميع وفهرس البحث إلا بالترحيلات
+        if not self.app or self.migrations_applied:
+            return
+        try:
+            with self.app.app_context():
+                run_migrations(db.engine)
+            self.migrations_applied = True
+        except Exception as e:
+            logger.error(f"Error applying database migrations: {str(e)}")
+
+    def ensure_search_index_synced(self):
+        # مقالات فشلت فهرستها عند الحفظ تُفهرس هنا في الخلفية، لا في أول طلب بحث
+        if not self.app:
+            return
+        try:
+            with self.app.app_context():
+                search_index = get_search_index(db.engine)
+                if search_index is not None:
+                    search_index.sync(db.session)
+        except Exception as e:
+            logger.error(f"Error syncing search index: {str(e)}")
+
     def get_or_create_source(self, source_name: str, source_url: str, language: str, country: str) -> NewsSource:
         if not self.app:
             return None
@@ -64,60 +143,181 @@ class AutomationService:
                 )
                 db.session.add(source)
                 db.session.commit()
+                invalidate_responses()
                 logger.info(f"Created new source: {source_name}")
             
             return source
 
-    def save_article_to_db(self, article_data: NewsArticleData, ai_results: Dict, source: NewsSource) -> bool:
+    def build_article(self, article_data: NewsArticleData, ai_results: Dict, source: NewsSource, article_hash: str) -> NewsArticle:
+        category_str = ai_results.get('category', article_data.category)
         try:
-            if not self.app:
-                return False
-            with self.app.app_context():
-                article_hash = self.generate_article_hash(article_data.title, article_data.content)
-                
-                if self.article_exists(article_hash):
-                    logger.info(f"Article already exists: {article_data.title[:50]}...")
-                    return False
-                
-                category_str = ai_results.get('category', article_data.category)
-                try:
-                    category = NewsCategory(category_str.lower().replace(' ', '_'))
-                except (ValueError, AttributeError):
-                    category = NewsCategory.GENERAL
-                
-                status = NewsStatus.PUBLISHED if self.auto_publish else NewsStatus.DRAFT
-                
-                article = NewsArticle(
-                    title=article_data.title,
-                    content=article_data.content,
-                    summary=ai_results.get('summary', article_data.summary),
-                    original_url=article_data.url,
-                    image_url=article_data.image_url,
-                    author=article_data.author,
-                    category=category,
-                    status=status,
-                    source_id=source.id,
-                    published_at=article_data.published_at or datetime.now(),
-                    scraped_at=datetime.now(),
-                    content_hash=article_hash,
-                    ai_processed=True,
-                    ai_summary=ai_results.get('summary'),
-                    ai_tags=json.dumps(ai_results.get('tags', []), ensure_ascii=False),
-                    sentiment_score=ai_results.get('sentiment_score')
-                )
+            category = NewsCategory(category_str.lower().replace(' ', '_'))
+        except (ValueError, AttributeError):
+            category = NewsCategory.GENERAL
+        
+        status = NewsStatus.PUBLISHED if self.auto_publish else NewsStatus.DRAFT
+        
+        return NewsArticle(
+            title=article_data.title,
+            content=article_data.content,
+            summary=ai_results.get('summary', article_data.summary),
+            original_url=article_data.url,
+            image_url=article_data.image_url,
+            author=article_data.author,
+            category=category,
+            status=status,
+            source_id=source.id,
+            published_at=naive_utc(article_data.published_at) or datetime.now(),
+            scraped_at=datetime.now(),
+            content_hash=article_hash,
+            ai_processed=True,
+            ai_summary=ai_results.get('summary'),
+            ai_tags=json.dumps(ai_results.get('tags', []), ensure_ascii=False),
+            sentiment_score=ai_results.get('sentiment_score')
+        )
+
+    def existing_hashes(self, hashes: List[str]) -> set:
+        existing = set()
+        unique_hashes = list(set(hashes))
+        for i in range(0, len(unique_hashes), self.bulk_lookup_chunk):
+            chunk = unique_hashes[i:i + self.bulk_lookup_chunk]
+            rows = db.session.query(NewsArticle.content_hash).filter(
+                NewsArticle.content_hash.in_(chunk)
+            ).all()
+            existing.update(row.content_hash for row in rows)
+        return existing
+
+    def save_articles_bulk(self, batch: List[Tuple[NewsArticleData, Dict, NewsSource]]) -> List[Dict]:
+        """Persist a batch of (article, ai_results, source) in one transaction.
+
+        Returns one outcome per input row, in order, with a ``status`` of
+        ``saved``, ``duplicate`` or ``error``.
+        """
+        outcomes = [{
+            "url": article_data.url,
+            "title": article_data.title,
+            "status": "error",
+            "article_id": None
+        } for article_data, _, _ in batch]
+        
+        if not self.app:
+            for outcome in outcomes:
+                outcome["error"] = "Application context not configured"
+            return outcomes
+        
+        with self.app.app_context():
+            try:
+                hashes = [self.generate_article_hash(a.title, a.content) for a, _, _ in batch]
+                existing = self.existing_hashes(hashes)
                 
-                db.session.add(article)
-                db.session.commit()
+                pending = []
+                for i, (article_data, ai_results, source) in enumerate(batch):
+                    if hashes[i] in existing:
+                        outcomes[i]["status"] = "duplicate"
+                        self.scraper.seen_urls.add(article_data.url)
+                        continue
+                    try:
+                        pending.append((i, self.build_article(article_data, ai_results or {}, source, hashes[i])))
+                        existing.add(hashes[i])
+                    except Exception as e:
+                        outcomes[i]["error"] = str(e)
                 
-                logger.info(f"Saved article: {article_data.title[:50]}...")
-                return True
+                if pending:
+                    try:
+                        db.session.add_all([article for _, article in pending])
+                        db.session.flush()
+                    except Exception as e:
+                        logger.warning(f"Bulk insert failed, retrying rows individually: {str(e)}")
+                        db.session.rollback()
+                        pending = self._insert_rows_individually(pending, outcomes)
+                    
+                    self.index_for_search([article for _, article in pending])
+                    self.update_rollups([article for _, article in pending])
+                    article_ids = [(i, article.id) for i, article in pending]
+                    # يُبنى قبل commit لأن الحقول تنتهي صلاحيتها بعده وقراءتها تعني استعلاماً لكل مقال
+                    announcement = self.article_announcement([article for _, article in pending])
+                    db.session.commit()
+                    if article_ids:
+                        invalidate_responses()
+                        publish_change('articles', announcement)
+                    
+                    for i, article_id in article_ids:
+                        outcomes[i]["status"] = "saved"
+                        outcomes[i]["article_id"] = article_id
+                        self.scraper.seen_urls.add(batch[i][0].url)
                 
+            except Exception as e:
+                logger.error(f"Error saving article batch: {str(e)}")
+                db.session.rollback()
+                for outcome in outcomes:
+                    if outcome["status"] != "duplicate":
+                        outcome.update({"status": "error", "article_id": None, "error": str(e)})
+        
+        saved = sum(1 for outcome in outcomes if outcome["status"] == "saved")
+        logger.info(f"Saved {saved} of {len(batch)} articles in one transaction")
+        return outcomes
+
+    def index_for_search(self, articles: List[NewsArticle]):
+        if not articles:
+            return
+        search_index = get_search_index(db.engine)
+        if search_index is None:
+            return
+        try:
+            # نقطة حفظ مستقلة: فشل الفهرسة لا يُسقط حفظ المقالات، وتلتقطها sync في أول دورة أتمتة بعد التشغيل
+            with db.session.begin_nested():
+                search_index.index_articles(db.session, articles)
         except Exception as e:
-            logger.error(f"Error saving article: {str(e)}")
-            if self.app:
-                with self.app.app_context():
-                    db.session.rollback()
-            return False
+            logger.error(f"Error updating search index: {str(e)}")
+
+    def article_announcement(self, articles: List[NewsArticle]) -> Dict:
+        # ما يكفي لتوجيه كل مقال إلى غرف الفئة والمصدر والعاجل، والعملاء يتسلمون المعرّفات فقط
+        return {
+            'ids': [article.id for article in articles],
+            'articles': [{
+                'id': article.id,
+                'category': article.category.value if article.category else NewsCategory.GENERAL.value,
+                'source_id': article.source_id,
+                'breaking': article.status == NewsStatus.BREAKING
+            } for article in articles]
+        }
+
+    def update_rollups(self, articles: List[NewsArticle]):
+        if not articles:
+            return
+        try:
+            # نقطة حفظ كما في فهرس البحث: خطأ في التجميعات لا يمنع حفظ المقالات، ويصلحه rollups.rebuild
+            with db.session.begin_nested():
+                record_articles(db.session, articles)
+                prune_hourly(db.session)
+        except Exception as e:
+            logger.error(f"Error updating analytics rollups: {str(e)}")
+
+    def _insert_rows_individually(self, pending: List[Tuple[int, NewsArticle]], outcomes: List[Dict]) -> List[Tuple[int, NewsArticle]]:
+        inserted = []
+        for i, article in pending:
+            savepoint = db.session.begin_nested()
+            try:
+                db.session.add(article)
+                db.session.flush()
+                savepoint.commit()
+                inserted.append((i, article))
+            except Exception as e:
+                savepoint.rollback()
+                message = str(e)
+                if 'content_hash' in message or 'UNIQUE' in message.upper():
+                    outcomes[i]["status"] = "duplicate"
+                else:
+                    outcomes[i]["error"] = message
+        return inserted
+
+    def save_article_to_db(self, article_data: NewsArticleData, ai_results: Dict, source: NewsSource) -> bool:
+        outcome = self.save_articles_bulk([(article_data, ai_results, source)])[0]
+        if outcome["status"] == "duplicate":
+            logger.info(f"Article already exists: {article_data.title[:50]}...")
+        elif outcome["status"] == "error":
+            logger.error(f"Error saving article: {outcome.get('error')}")
+        return outcome["status"] == "saved"
 
     def log_scraping_activity(self, source_name: str, articles_found: int, articles_saved: int, errors: int = 0):
         try:
@@ -138,68 +338,42 @@ class AutomationService:
         except Exception as e:
             logger.error(f"Error logging activity: {str(e)}")
 
-    @performance_monitor.time_function('process_single_source')
-    def process_single_source(self, source_key: str) -> Dict:
-        logger.info(f"Processing source: {source_key}")
-        
-        results = {
-            "source": source_key,
-            "articles_found": 0,
-            "articles_processed": 0,
-            "articles_saved": 0,
-            "errors": 0
-        }
+    def create_pipeline(self) -> ScrapingPipeline:
+        return ScrapingPipeline(
+            self,
+            fetch_workers=self.fetch_workers,
+            ai_workers=self.ai_workers,
+            queue_size=self.pipeline_queue_size,
+            batch_size=self.db_batch_size
+        )
+
+    def _run_pipeline(self, source_keys: List[str]) -> Dict[str, Dict]:
+        self.ensure_database_migrated()
+        self.ensure_seen_urls_loaded()
+        self.ensure_story_index_loaded()
+        self.ensure_search_index_synced()
+        source_results = self.create_pipeline().run(source_keys)
         
-        try:
-            articles = self.scraper.scrape_source(source_key)
-            results["articles_found"] = len(articles)
-            
-            if not articles:
-                logger.warning(f"No articles found from {source_key}")
-                return results
-            
-            source_config = self.scraper.news_sources[source_key]
-            source = self.get_or_create_source(
-                source_config['name'],
-                source_config['base_url'],
-                source_config['language'],
-                source_config['country']
-            )
-            
-            for article_data in articles[:self.max_articles_per_source]:
-                try:
-                    ai_results = {}
-                    if self.ai_processing_enabled and article_data.content:
-                        ai_results = self.ai_processor.process_article_complete(
-                            article_data.title,
-                            article_data.content
-                        )
-                        results["articles_processed"] += 1
-                    
-                    if self.save_article_to_db(article_data, ai_results, source):
-                        results["articles_saved"] += 1
-                        self.stats["total_published"] += 1
-                    
-                    time.sleep(1)
-                    
-                except Exception as e:
-                    logger.error(f"Error processing article: {str(e)}")
-                    results["errors"] += 1
-                    self.stats["errors"] += 1
-            
+        for source_key, results in source_results.items():
+            if results["errors"]:
+                self.scraper.discard_feed(source_key)
+            else:
+                self.scraper.confirm_feed(source_key)
+            if not results["articles_found"] and not results["errors"]:
+                continue
             self.log_scraping_activity(
-                source_config['name'],
+                self.scraper.news_sources.get(source_key, {}).get('name', source_key),
                 results["articles_found"],
                 results["articles_saved"],
                 results["errors"]
             )
-            
-        except Exception as e:
-            logger.error(f"Error processing source {source_key}: {str(e)}")
-            results["errors"] += 1
-            self.stats["errors"] += 1
         
-        return results
+        return source_results
+
+    @performance_monitor.time_function('process_single_source')
+    def process_single_source(self, source_key: str) -> Dict:
+        logger.info(f"Processing source: {source_key}")
+        return self._run_pipeline([source_key])[source_key]
 
     @performance_monitor.time_function('run_full_scraping_cycle')
     def run_full_scraping_cycle(self):
@@ -211,25 +385,25 @@ class AutomationService:
             "sources_processed": 0,
             "total_articles_found": 0,
             "total_articles_saved": 0,
+            "total_near_duplicates": 0,
             "total_errors": 0,
             "source_results": {}
         }
         
-        for source_key in self.scraper.news_sources.keys():
-            try:
-                source_results = self.process_single_source(source_key)
-                total_results["source_results"][source_key] = source_results
-                
+        try:
+            source_results = self._run_pipeline(list(self.scraper.news_sources.keys()))
+            
+            for source_key, results in source_results.items():
+                total_results["source_results"][source_key] = results
                 total_results["sources_processed"] += 1
-                total_results["total_articles_found"] += source_results["articles_found"]
-                total_results["total_articles_saved"] += source_results["articles_saved"]
-                total_results["total_errors"] += source_results["errors"]
-                
-                time.sleep(10)
+                total_results["total_articles_found"] += results["articles_found"]
+                total_results["total_articles_saved"] += results["articles_saved"]
+                total_results["total_near_duplicates"] += results["near_duplicates"]
+                total_results["total_errors"] += results["errors"]
                 
-            except Exception as e:
-                logger.error(f"Error processing source {source_key}: {str(e)}")
-                total_results["total_errors"] += 1
+        except Exception as e:
+            logger.error(f"Error running scraping pipeline: {str(e)}")
+            total_results["total_errors"] += 1
         
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds()
@@ -239,6 +413,7 @@ class AutomationService:
         
         self.stats["total_scraped"] += total_results["total_articles_found"]
         self.stats["total_processed"] += total_results["total_articles_saved"]
+        self.stats["near_duplicates"] += total_results["total_near_duplicates"]
         self.stats["last_run"] = end_time.isoformat()
         
         logger.info(f"Scraping cycle completed - Found {total_results['total_articles_found']} articles, saved {total_results['total_articles_saved']} articles")
@@ -276,12 +451,24 @@ class AutomationService:
             self.automation_thread.join(timeout=5)
 
     def get_automation_status(self) -> Dict:
+        response_cache = get_response_cache()
         return {
             "is_running": self.is_running,
             "scraping_interval": self.scraping_interval,
             "auto_publish": self.auto_publish,
             "ai_processing_enabled": self.ai_processing_enabled,
+            "pipeline": {
+                "fetch_workers": self.fetch_workers,
+                "ai_workers": self.ai_workers,
+                "queue_size": self.pipeline_queue_size,
+                "db_batch_size": self.db_batch_size
+            },
             "stats": self.stats,
+            "llm_cache": self.ai_processor.get_cache_stats(),
+            "ai_providers": self.ai_processor.get_router_status(),
+            "story_index": self.story_index.get_stats() if self.story_index is not None else None,
+            "response_cache": response_cache.get_stats() if response_cache is not None else None,
+            "realtime_broker": get_broker().get_stats(),
             "sources_count": len(self.scraper.news_sources)
         }
 
@@ -302,4 +489,19 @@ class AutomationService:
         if "max_articles_per_source" in settings:
             self.max_articles_per_source = max(1, settings["max_articles_per_source"])
         
+        if "fetch_workers" in settings:
+            self.fetch_workers = max(1, settings["fetch_workers"])
+        
+        if "ai_workers" in settings:
+            self.ai_workers = max(1, settings["ai_workers"])
+        
+        if "pipeline_queue_size" in settings:
+            self.pipeline_queue_size = max(1, settings["pipeline_queue_size"])
+        
+        if "db_batch_size" in settings:
+            self.db_batch_size = max(1, settings["db_batch_size"])
+        
+        if "near_duplicate_threshold" in settings and self.story_index is not None:
+            self.story_index.threshold = min(1.0, max(0.0, float(settings["near_duplicate_threshold"])))
+        
         logger.info("Automation settings updated")
@@ -0,0 +1,232 @@
+import logging
+from itertools import chain
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from .arabic_text import (
+    SENTENCE_RE, AnalyzedText, is_keyword_stem, light_stem, normalize_tokens, stem_bases,
+    stem_phrase, strip_diacritics, tokenize
+)
+from .keyword_matcher import CategoryMatcher
+
+logger = logging.getLogger(__name__)
+
+class BatchTextAnalyzer:
+    """Local categorization, sentiment, TF-IDF keywords and extractive summaries for many articles at once.
+
+    Each article is tokenized once, sentence by sentence, and every distinct
+    token is normalized and stemmed once, without an object per sentence.
+    The batch then becomes one sparse document x stem count matrix and the
+    rest is matrix arithmetic: lexicon and category scores are products with
+    per-stem weight matrices, so each distinct stem is matched against the
+    lexicons once per batch instead of once per article.
+    """
+
+    def __init__(self, positive_terms: Sequence[str], negative_terms: Sequence[str],
+                 matcher: Optional[CategoryMatcher] = None, keyword_limit: int = 6, summary_sentences: int = 3):
+        self.positive_terms = [stem_phrase(term) for term in positive_terms]
+        self.negative_terms = [stem_phrase(term) for term in negative_terms]
+        self.matcher = matcher
+        self.keyword_limit = keyword_limit
+        self.summary_sentences = summary_sentences
+
+    def analyze(self, articles: List[Tuple[str, str]]) -> List[Dict]:
+        """Return ``category``, ``sentiment_score``, ``tags`` and ``summary`` for each (title, content) pair."""
+        if not articles:
+            return []
+
+        # كل مقال = العنوان + جمل المحتوى، تُحلَّل مرة واحدة وتُستخدم للمستند وللجمل معاً
+        all_stems: List[str] = []
+        part_lengths: List[int] = []
+        part_texts: List[str] = []
+        part_docs: List[int] = []
+        documents: List[AnalyzedText] = []
+        for doc, (title, content) in enumerate(articles):
+            stems, lengths, texts, document = self._split_article(title, content)
+            all_stems.extend(stems)
+            part_lengths.extend(lengths)
+            part_texts.extend(texts)
+            part_docs.extend([doc] * len(lengths))
+            documents.append(document)
+
+        vocabulary, counts, part_counts = self._term_matrices(all_stems, part_lengths, part_docs, len(articles))
+        stems = list(vocabulary)
+        present = (counts > 0).astype(np.float64)
+
+        categories = self._categories(counts, stems, documents)
+        sentiment = self._sentiment(present, stems)
+        weights = self._tfidf(counts, present, stems)
+        tags = self._keywords(weights, stems, documents)
+        summaries = self._summaries([content for _, content in articles], part_texts, part_docs, part_counts, weights)
+
+        return [
+            {
+                'category': categories[i],
+                'sentiment_score': float(sentiment[i]),
+                'tags': tags[i],
+                'summary': summaries[i]
+            }
+            for i in range(len(articles))
+        ]
+
+    @staticmethod
+    def _split_article(title: str, content: str) -> Tuple[List[str], List[int], List[str], AnalyzedText]:
+        """Stems of the whole article, and the length and text of each part (the title, then each content sentence)."""
+        raw_pieces = SENTENCE_RE.split(content)
+        pieces = SENTENCE_RE.split(strip_diacritics(content.lower()))
+        if len(pieces) != len(raw_pieces):
+            # نفس حالة AnalyzedText.split: تشكيل بين علامتي ترقيم، فتُحلل كل جملة على حدة
+            parts = [AnalyzedText(title)] + AnalyzedText.split(content)
+            document = AnalyzedText.from_parts(parts, text=title + " " + content)
+            return document.stems, [len(part.stems) for part in parts], [part.text for part in parts], document
+
+        part_tokens = [tokenize(strip_diacritics(title.lower()))]
+        part_texts = [title]
+        for raw, piece in zip(raw_pieces, pieces):
+            raw = raw.strip()
+            if raw:
+                part_tokens.append(tokenize(piece))
+                part_texts.append(raw)
+
+        document = AnalyzedText(title + " " + content)
+        tokens = document.__dict__['tokens'] = list(chain.from_iterable(part_tokens))
+        normalized = document.__dict__['normalized_tokens'] = normalize_tokens(tokens)
+        stems = document.__dict__['stems'] = list(map(light_stem, normalized))
+        return stems, [len(tokens) for tokens in part_tokens], part_texts, document
+
+    @staticmethod
+    def _term_matrices(all_stems: List[str], part_lengths: List[int], part_docs: List[int],
+                       documents: int) -> Tuple[Dict[str, int], sparse.csr_matrix, sparse.csr_matrix]:
+        """Document x stem and part (title/sentence) x stem count matrices sharing one column index array."""
+        vocabulary = {stem: column for column, stem in enumerate(dict.fromkeys(all_stems))}
+        indices = np.fromiter(map(vocabulary.__getitem__, all_stems), dtype=np.int64, count=len(all_stems))
+        part_indptr = np.concatenate(([0], np.cumsum(part_lengths, dtype=np.int64)))
+        doc_starts = np.searchsorted(np.asarray(part_docs), np.arange(documents + 1), side='left')
+        shape_columns = max(len(vocabulary), 1)
+
+        part_counts = sparse.csr_matrix(
+            (np.ones(len(indices)), indices.copy(), part_indptr), shape=(len(part_lengths), shape_columns)
+        )
+        counts = sparse.csr_matrix(
+            (np.ones(len(indices)), indices, part_indptr[doc_starts]), shape=(documents, shape_columns)
+        )
+        counts.sum_duplicates()
+        return vocabulary, counts, part_counts
+
+    def _categories(self, counts: sparse.csr_matrix, stems: List[str], documents: List[AnalyzedText]) -> List[str]:
+        if self.matcher is None:
+            return ['general'] * len(documents)
+
+        category_index = {category: i for i, category in enumerate(self.matcher.categories)}
+        rows, cols, values = [], [], []
+        for row, stem in enumerate(stems):
+            for category, weight in self.matcher.token_scores(stem):
+                rows.append(row)
+                cols.append(category_index[category])
+                values.append(weight)
+        stem_weights = sparse.csr_matrix(
+            (values, (rows, cols)), shape=(counts.shape[1], max(len(category_index), 1))
+        )
+        scores = np.asarray((counts @ stem_weights).todense())
+
+        for row, document in enumerate(documents):
+            for category, adjustment in self.matcher.phrase_adjustments(document).items():
+                scores[row, category_index[category]] += adjustment
+
+        best = scores.argmax(axis=1)
+        return [
+            self.matcher.categories[best[row]] if scores[row, best[row]] > 0 else 'general'
+            for row in range(len(documents))
+        ]
+
+    @staticmethod
+    def _lexicon_matrix(stems: List[str], terms: List[str]) -> sparse.csr_matrix:
+        # كلمة المعجم تُعد موجودة إذا كانت جذر الكلمة نفسه بعد سابقة أو لاحقة معروفة، كما في المسار الفردي
+        columns = {term: column for column, term in enumerate(terms)}
+        rows, cols = [], []
+        for row, stem in enumerate(stems):
+            for base in stem_bases(stem):
+                column = columns.get(base)
+                if column is not None:
+                    rows.append(row)
+                    cols.append(column)
+        return sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)),
+            shape=(max(len(stems), 1), max(len(terms), 1))
+        )
+
+    def _sentiment(self, present: sparse.csr_matrix, stems: List[str]) -> np.ndarray:
+        positive = np.asarray(((present @ self._lexicon_matrix(stems, self.positive_terms)) > 0).sum(axis=1)).ravel()
+        negative = np.asarray(((present @ self._lexicon_matrix(stems, self.negative_terms)) > 0).sum(axis=1)).ravel()
+        total = positive + negative
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = np.where(total > 0, (positive - negative) / total, 0.0)
+        return np.clip(scores, -1.0, 1.0)
+
+    @staticmethod
+    def _tfidf(counts: sparse.csr_matrix, present: sparse.csr_matrix, stems: List[str]) -> sparse.csr_matrix:
+        """Smoothed TF-IDF over keyword-eligible stems; stopwords and short stems get zero weight."""
+        documents = counts.shape[0]
+        document_frequency = np.asarray(present.sum(axis=0)).ravel()
+        idf = np.log((1 + documents) / (1 + document_frequency)) + 1.0
+        eligible = np.zeros(counts.shape[1])
+        eligible[:len(stems)] = np.fromiter(map(is_keyword_stem, stems), dtype=bool, count=len(stems))
+        weights = counts @ sparse.diags(idf * eligible)
+        weights.eliminate_zeros()
+        return weights.tocsr()
+
+    def _keywords(self, weights: sparse.csr_matrix, stems: List[str], documents: List[AnalyzedText]) -> List[List[str]]:
+        tags = []
+        for row, document in enumerate(documents):
+            start, end = weights.indptr[row], weights.indptr[row + 1]
+            columns = weights.indices[start:end]
+            scores = weights.data[start:end]
+            # ترتيب تنازلي حسب الوزن ثم حسب أول ظهور للكلمة في الدفعة
+            chosen = [stems[column] for column in columns[np.lexsort((columns, -scores))[:self.keyword_limit]]]
+            
+            # أقصر صيغة للكلمة كما وردت في المقال نفسه، بالمرور على الصيغ المختلفة مرة واحدة
+            surface = dict.fromkeys(chosen)
+            for token, stem in dict(zip(document.tokens, document.stems)).items():
+                if stem in surface and (surface[stem] is None or (len(token), token) < (len(surface[stem]), surface[stem])):
+                    surface[stem] = token
+            tags.append([surface[stem] for stem in chosen])
+        return tags
+
+    def _summaries(self, contents: List[str], part_texts: List[str], part_docs: List[int],
+                   part_counts: sparse.csr_matrix, weights: sparse.csr_matrix) -> List[str]:
+        summaries: List[str] = [''] * len(contents)
+        docs = np.asarray(part_docs)
+        first_part = np.r_[True, docs[1:] != docs[:-1]]
+        sentence_counts = np.bincount(docs, minlength=len(contents)) - 1
+
+        needs_summary = np.array([len(content) > 200 for content in contents], dtype=bool)
+        for doc, content in enumerate(contents):
+            if not needs_summary[doc]:
+                summaries[doc] = content
+            elif sentence_counts[doc] <= self.summary_sentences:
+                summaries[doc] = content[:200] + '...'
+                needs_summary[doc] = False
+
+        # الجمل المرشحة: ليست عنواناً، ومقالها يحتاج ملخصاً، وطولها كافٍ لتكون جملة ذات معنى
+        candidates = np.flatnonzero(~first_part & needs_summary[docs] &
+                                    np.fromiter((len(text) > 20 for text in part_texts), dtype=bool, count=len(part_texts)))
+        if len(candidates):
+            sentence_matrix = part_counts[candidates]
+            sentence_docs = docs[candidates]
+            # وزن الجملة = مجموع أوزان TF-IDF لكلماتها في مقالها مقسوماً على جذر طولها
+            scores = np.asarray(sentence_matrix.multiply(weights[sentence_docs]).sum(axis=1)).ravel()
+            lengths = np.asarray(sentence_matrix.sum(axis=1)).ravel()
+            scores = scores / np.sqrt(np.maximum(lengths, 1.0))
+
+            boundaries = np.flatnonzero(np.diff(sentence_docs)) + 1
+            for group in np.split(np.arange(len(candidates)), boundaries):
+                best = group[np.argsort(-scores[group], kind='stable')[:self.summary_sentences]]
+                summary = '. '.join(part_texts[candidates[i]] for i in sorted(best)) + '.'
+                summaries[sentence_docs[group[0]]] = summary if len(summary) <= 300 else summary[:300] + '...'
+
+        for doc, content in enumerate(contents):
+            if not summaries[doc] and content:
+                summaries[doc] = content[:200] + '...'
+        return summaries
@@ -0,0 +1,131 @@
+import logging
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+def diff_state(previous: Dict, current: Dict) -> Dict:
+    """Keys of ``current`` whose value differs from ``previous``; nested dicts are diffed key by key."""
+    changes = {}
+    for key, value in current.items():
+        old = previous.get(key)
+        if isinstance(value, dict) and isinstance(old, dict):
+            nested = diff_state(old, value)
+            if nested:
+                changes[key] = nested
+        elif key not in previous or old != value:
+            changes[key] = value
+    return changes
+
+class ChangeFeed:
+    """Ordered feed of compact changes for real-time clients.
+
+    Every change gets the next sequence number. Clients remember the last
+    number they applied and ask for the changes after it when they notice a
+    gap or reconnect; the feed keeps the latest ``history`` changes for that,
+    and a client further behind is sent a fresh snapshot instead.
+    """
+
+    def __init__(self, history: int = 1000, topic: Optional[str] = None):
+        self.topic = topic
+        self.seq = 0
+        self._history: Deque[Dict] = deque(maxlen=history)
+        self._listeners: List[Callable[[Dict], None]] = []
+        self._lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+
+    def publish(self, kind: str, data: Dict) -> Dict:
+        # التسليم داخل القفل حتى تصل التغييرات إلى المستمعين بترتيب أرقامها
+        with self._publish_lock:
+            with self._lock:
+                self.seq += 1
+                change = {'seq': self.seq, 'type': kind, 'data': data}
+                if self.topic is not None:
+                    change['topic'] = self.topic
+                self._history.append(change)
+                listeners = list(self._listeners)
+            for listener in listeners:
+                try:
+                    listener(change)
+                except Exception as e:
+                    logger.error(f"Error delivering change {change['seq']}: {str(e)}")
+        return change
+
+    def since(self, seq: int) -> Optional[List[Dict]]:
+        """Changes after ``seq``, or None when some of them are no longer kept and the client must resync."""
+        with self._lock:
+            if seq > self.seq or seq < 0:
+                return None
+            if seq == self.seq:
+                return []
+            if not self._history or self._history[0]['seq'] > seq + 1:
+                return None
+            return [change for change in self._history if change['seq'] > seq]
+
+    def subscribe(self, listener: Callable[[Dict], None]):
+        with self._lock:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[Dict], None]):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+def merge_data(previous, current):
+    """Combine two pending payloads: dicts key by key, lists without repeats, anything else takes the newer value."""
+    if isinstance(previous, dict) and isinstance(current, dict):
+        merged = dict(previous)
+        for key, value in current.items():
+            merged[key] = merge_data(previous[key], value) if key in previous else value
+        return merged
+    if isinstance(previous, list) and isinstance(current, list):
+        return previous + [item for item in current if item not in previous]
+    return current
+
+class CoalescingBuffer:
+    """Holds changes for ``window`` seconds and hands them on merged, one per topic and kind.
+
+    During a burst a subscriber then receives one delta per window instead of
+    one per saved batch. A window of 0 passes every change on immediately.
+    """
+
+    def __init__(self, deliver: Callable[[str, str, Dict], None], window: float = 1.0):
+        self.deliver = deliver
+        self.window = window
+        self.merged = 0
+        self._pending: Dict[str, Dict[str, Dict]] = {}
+        self._timers: Dict[str, threading.Timer] = {}
+        self._lock = threading.Lock()
+
+    def add(self, topic: str, kind: str, data: Dict):
+        with self._lock:
+            pending = self._pending.setdefault(topic, {})
+            if kind in pending:
+                pending[kind] = merge_data(pending[kind], data)
+                self.merged += 1
+            else:
+                pending[kind] = data
+            if self.window > 0 and topic not in self._timers:
+                timer = threading.Timer(self.window, self.flush, args=(topic,))
+                timer.daemon = True
+                self._timers[topic] = timer
+                timer.start()
+        if self.window <= 0:
+            self.flush(topic)
+
+    def flush(self, topic: Optional[str] = None):
+        with self._lock:
+            topics = [topic] if topic is not None else list(self._pending)
+            batches = []
+            for name in topics:
+                timer = self._timers.pop(name, None)
+                if timer is not None and timer is not threading.current_thread():
+                    timer.cancel()
+                batches.append((name, self._pending.pop(name, {})))
+        for name, pending in batches:
+            for kind, data in pending.items():
+                try:
+                    self.deliver(name, kind, data)
+                except Exception as e:
+                    logger.error(f"Error delivering {kind} changes for {name}: {str(e)}")
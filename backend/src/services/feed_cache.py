@@ -0,0 +1,94 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+class FeedValidatorStore:
+    """Persistent per-feed HTTP validators (ETag / Last-Modified) for conditional GETs.
+
+    Validators are kept in memory and mirrored to a small JSON file so that the
+    first poll after a restart can still be answered with ``304 Not Modified``.
+    A body digest is stored too, which lets feeds that send no validators skip
+    re-parsing when the payload is byte-for-byte unchanged.
+
+    Validators of a freshly parsed feed are only staged. They are committed
+    once its entries have been handled, so a cycle that fails halfway polls
+    the same feed again instead of being answered with ``304``.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv('FEED_VALIDATORS_PATH', 'feed_validators.json')
+        self._lock = threading.Lock()
+        self._validators: Dict[str, Dict] = self._load()
+        self._staged: Dict[str, Dict] = {}
+
+    def _load(self) -> Dict[str, Dict]:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load feed validators from {self.path}: {str(e)}")
+            return {}
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._validators, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not persist feed validators to {self.path}: {str(e)}")
+
+    def request_headers(self, feed_url: str) -> Dict[str, str]:
+        with self._lock:
+            entry = self._validators.get(feed_url, {})
+            headers = {}
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+            return headers
+
+    def is_unchanged(self, feed_url: str, content: bytes) -> bool:
+        with self._lock:
+            entry = self._validators.get(feed_url, {})
+            return entry.get('digest') == self._digest(content)
+
+    def stage(self, feed_url: str, headers: Mapping[str, str], content: bytes):
+        """Remember the validators of a parsed feed without using them until ``commit``."""
+        with self._lock:
+            self._staged[feed_url] = self._entry(headers, content)
+
+    def commit(self, feed_url: str):
+        with self._lock:
+            entry = self._staged.pop(feed_url, None)
+            if entry is not None:
+                self._validators[feed_url] = entry
+                self._save()
+
+    def discard(self, feed_url: str):
+        with self._lock:
+            self._staged.pop(feed_url, None)
+
+    @classmethod
+    def _entry(cls, headers: Mapping[str, str], content: bytes) -> Dict:
+        return {
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'digest': cls._digest(content),
+            'updated_at': datetime.utcnow().isoformat()
+        }
+
+    @staticmethod
+    def _digest(content: bytes) -> str:
+        return hashlib.sha1(content).hexdigest()
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import threading
+from typing import Dict, Optional
+
+import aiohttp
+from multidict import CIMultiDict
+
+logger = logging.getLogger(__name__)
+
+class FetchResponse:
+    def __init__(self, url: str, status: int, content: bytes, headers: CIMultiDict):
+        self.url = url
+        self.status = status
+        self.content = content
+        self.headers = headers
+
+class AsyncFetchEngine:
+    """Shared asyncio HTTP engine running on a single background event loop.
+
+    Every request goes through one aiohttp session whose connector keeps
+    bounded, keep-alive connection pools per host, so synchronous callers on
+    any thread share the same sockets instead of opening their own.
+    """
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None, timeout: float = 5,
+                 max_connections: int = 100, max_connections_per_host: int = 8,
+                 keepalive_timeout: float = 30):
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_timeout = keepalive_timeout
+
+        self._loop = None
+        self._thread = None
+        self._session = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name='fetch-engine')
+                self._thread.daemon = True
+                self._thread.start()
+                logger.info("Started async fetch engine event loop")
+            return self._loop
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> FetchResponse:
+        """GET a URL on the engine loop; raises on network errors and 4xx/5xx."""
+        session = await self._get_session()
+        async with session.get(url, headers=headers) as response:
+            content = await response.read()
+            response.raise_for_status()
+            return FetchResponse(str(response.url), response.status, content, CIMultiDict(response.headers))
+
+    async def run_blocking(self, func, *args):
+        """Run CPU-bound work (HTML/RSS parsing) off the event loop thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, func, *args)
+
+    def run(self, coro, timeout: Optional[float] = None):
+        """Run a coroutine on the engine loop from synchronous code and wait for it."""
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        return future.result(timeout=timeout)
+
+    def close(self):
+        if self._loop is None or self._loop.is_closed():
+            return
+
+        if self._session is not None and not self._session.closed:
+            asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result(timeout=5)
+        self._session = None
+
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._loop.close()
+        self._loop = None
+        logger.info("Stopped async fetch engine event loop")
@@ -0,0 +1,270 @@
+import json
+import logging
+import os
+import re
+import threading
+from bisect import bisect_right
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from .arabic_text import PREFIXES, SUFFIXES, AnalyzedText, analyze, stem_phrase
+
+logger = logging.getLogger(__name__)
+
+# المعجم الافتراضي: الفئة -> {الكلمة: الوزن}. ترتيب الفئات يحسم التعادل في النتيجة
+DEFAULT_CATEGORY_LEXICON = {
+    'politics': {
+        'سياسة': 1.0, 'سياسي': 1.0, 'حكومة': 1.0, 'رئيس': 1.0, 'وزير': 1.0, 'وزارة': 1.0,
+        'برلمان': 1.0, 'مجلس الشعب': 1.5, 'انتخابات': 1.0, 'دبلوماسية': 1.0, 'مفاوضات': 1.0,
+        'حزب': 1.0, 'معارضة': 1.0, 'دستور': 1.0, 'قرار': 0.5, 'مرسوم': 1.0,
+        'politics': 1.0, 'government': 1.0, 'minister': 1.0, 'parliament': 1.0, 'election': 1.0
+    },
+    'economy': {
+        'اقتصاد': 1.0, 'اقتصادي': 1.0, 'بورصة': 1.0, 'أسهم': 1.0, 'استثمار': 1.0, 'تجارة': 1.0,
+        'صادرات': 1.0, 'واردات': 1.0, 'عملة': 1.0, 'مالية': 1.0, 'ميزانية': 1.0, 'تضخم': 1.0,
+        'أسعار': 0.5, 'مصرف': 1.0, 'بنك': 1.0, 'ليرة': 1.0, 'دولار': 0.5, 'نفط': 1.0,
+        'economy': 1.0, 'market': 0.5, 'inflation': 1.0, 'investment': 1.0, 'trade': 1.0
+    },
+    'syrian_affairs': {
+        'سوريا': 1.0, 'سورية': 1.0, 'سوري': 1.0, 'دمشق': 1.0, 'حلب': 1.0, 'حمص': 1.0,
+        'حماة': 1.0, 'اللاذقية': 1.0, 'طرطوس': 1.0, 'درعا': 1.0, 'دير الزور': 1.5, 'إدلب': 1.0,
+        'الرقة': 1.0, 'السويداء': 1.0, 'القامشلي': 1.0, 'إعادة إعمار': 1.5,
+        'syria': 1.0, 'damascus': 1.0, 'aleppo': 1.0
+    },
+    'sports': {
+        'رياضة': 1.0, 'رياضي': 1.0, 'كرة': 1.0, 'فوز': 0.5, 'هزيمة': 0.5, 'مباراة': 1.0,
+        'بطولة': 1.0, 'أولمبياد': 1.0, 'منتخب': 1.0, 'دوري': 1.0, 'لاعب': 1.0, 'مدرب': 1.0,
+        'هدف': 0.5, 'ملعب': 1.0, 'كأس العالم': 1.5,
+        'football': 1.0, 'match': 0.5, 'league': 1.0, 'olympic': 1.0
+    },
+    'health': {
+        'صحة': 1.0, 'صحي': 1.0, 'طب': 0.5, 'طبي': 1.0, 'مرض': 1.0, 'علاج': 1.0,
+        'مستشفى': 1.0, 'طبيب': 1.0, 'دواء': 1.0, 'وباء': 1.0, 'لقاح': 1.0, 'فيروس': 1.0,
+        'منظمة الصحة العالمية': 2.0,
+        'health': 1.0, 'hospital': 1.0, 'vaccine': 1.0, 'disease': 1.0
+    },
+    'technology': {
+        'تقنية': 1.0, 'تكنولوجيا': 1.0, 'ذكاء اصطناعي': 2.0, 'إنترنت': 1.0, 'هاتف': 1.0,
+        'تطبيق': 1.0, 'برمجة': 1.0, 'حاسوب': 1.0, 'رقمي': 1.0, 'اتصالات': 1.0, 'أمن سيبراني': 2.0,
+        'technology': 1.0, 'software': 1.0, 'internet': 1.0, 'smartphone': 1.0, 'ai': 1.0
+    },
+    'international': {
+        'الأمم المتحدة': 2.0, 'مجلس الأمن': 2.0, 'دولي': 1.0, 'الاتحاد الأوروبي': 2.0,
+        'واشنطن': 1.0, 'موسكو': 1.0, 'قمة': 0.5, 'سفير': 1.0,
+        'united nations': 2.0, 'international': 1.0
+    },
+    'culture': {
+        'ثقافة': 1.0, 'ثقافي': 1.0, 'فن': 0.5, 'مسرح': 1.0, 'سينما': 1.0, 'مهرجان': 1.0,
+        'معرض': 0.5, 'كتاب': 0.5, 'تراث': 1.0, 'موسيقى': 1.0, 'أدب': 0.5,
+        'culture': 1.0, 'festival': 1.0, 'cinema': 1.0
+    }
+}
+
+Lexicon = Dict[str, Union[Dict[str, float], List[str]]]
+
+# الكلمات العربية القصيرة (فن، طب، هدف) تظهر داخل كلمات لا علاقة لها بها (الفندق، استهدف)،
+# فلا تُقبل إلا كلمة كاملة مع سابقة أو لاحقة معروفة
+SHORT_TERM_LENGTH = 3
+TOKEN_PREFIXES = frozenset(('', 'و', 'ف', 'ب', 'ل', 'ك') + PREFIXES)
+TOKEN_SUFFIXES = frozenset(('', 'ة') + SUFFIXES)
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+def _token_bounds(text: str, start: int, end: int) -> Tuple[int, int]:
+    while start > 0 and _is_word_char(text[start - 1]):
+        start -= 1
+    while end < len(text) and _is_word_char(text[end]):
+        end += 1
+    return start, end
+
+class KeywordAutomaton:
+    """Aho–Corasick automaton: finds every occurrence of every term in one pass over the text.
+
+    Arabic terms match as substrings so that attached prefixes and suffixes
+    (ال، و، ب، ـية) still count, which is what the old ``keyword in text``
+    scans did. Pure ASCII terms must sit on word boundaries so that short
+    English terms like "ai" do not fire inside other words, and terms added
+    with ``token_bounded`` must fill their word apart from one known clitic
+    prefix and suffix.
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[Tuple[int, str, float, bool]]] = [[]]
+        self._built = False
+
+    def add(self, term: str, label: str, weight: float = 1.0, token_bounded: bool = False):
+        term = term.lower().strip()
+        if not term:
+            return
+        node = 0
+        for char in term:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            node = next_node
+        bound = 'word' if term.isascii() else 'token' if token_bounded else None
+        self._outputs[node].append((len(term), label, weight, bound))
+        self._built = False
+
+    def build(self):
+        queue = deque(self._goto[0].values())
+        for node in queue:
+            self._fail[node] = 0
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+        self._built = True
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, str, float]]:
+        """Yield ``(start, end, label, weight)`` for each term occurrence in ``text``."""
+        if not self._built:
+            self.build()
+        text = text.lower()
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        node = 0
+        for i, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, label, weight, bound in outputs[node]:
+                start = i - length + 1
+                if bound is not None:
+                    token_start, token_end = _token_bounds(text, start, i + 1)
+                    if bound == 'word' and (token_start, token_end) != (start, i + 1):
+                        continue
+                    if bound == 'token' and (text[token_start:start] not in TOKEN_PREFIXES or
+                                             text[i + 1:token_end] not in TOKEN_SUFFIXES):
+                        continue
+                yield start, i + 1, label, weight
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+class CategoryMatcher:
+    """Scores text against a category lexicon with precompiled matchers.
+
+    Terms and texts are both normalized and lightly stemmed first, so spelling
+    variants such as سوريا/سورية or أسهم/اسهم hit the same lexicon entry.
+    Single-word terms live in one automaton that is run once per distinct
+    token and memoized; multi-word phrases are matched with one compiled
+    alternation over the stemmed text and take precedence over the words
+    they cover.
+    """
+
+    def __init__(self, lexicon: Lexicon, token_cache_size: int = 100000):
+        self.categories = list(lexicon)
+        self.automaton = KeywordAutomaton()
+        self.phrases: Dict[str, List[Tuple[str, float]]] = {}
+        self.term_count = 0
+        for category, terms in lexicon.items():
+            weighted = terms if isinstance(terms, dict) else {term: 1.0 for term in terms}
+            for term, weight in weighted.items():
+                stemmed = stem_phrase(term)
+                if ' ' in stemmed:
+                    self.phrases.setdefault(stemmed, []).append((category, float(weight)))
+                else:
+                    self.automaton.add(stemmed, category, float(weight),
+                                       token_bounded=len(stemmed) <= SHORT_TERM_LENGTH)
+                self.term_count += 1
+        self.automaton.build()
+        self.phrase_re = None
+        if self.phrases:
+            alternatives = sorted(self.phrases, key=len, reverse=True)
+            self.phrase_re = re.compile('|'.join(re.escape(phrase) for phrase in alternatives))
+        self.token_scores = lru_cache(maxsize=token_cache_size)(self._scan_token)
+
+    def _scan_token(self, stem: str) -> Tuple[Tuple[str, float], ...]:
+        # عند تداخل كلمتين تبدآن من الموضع نفسه (سوري/سورية) تُحتسب الأطول فقط
+        longest = {}
+        for start, end, category, weight in self.automaton.iter_matches(stem):
+            if start not in longest or end > longest[start][0]:
+                longest[start] = (end, category, weight)
+        return tuple((category, weight) for _, category, weight in longest.values())
+
+    def phrase_adjustments(self, text: Union[str, AnalyzedText]) -> Dict[str, float]:
+        """Score change from multi-word terms: each phrase hit adds its weight and
+        cancels the single-word hits inside the tokens it covers.
+
+        ``scores`` is the per-token sum plus these adjustments, which lets the
+        batch path compute the per-token part as one sparse product.
+        """
+        analyzed = analyze(text)
+        adjustments = {}
+        if self.phrase_re is None:
+            return adjustments
+        
+        token_starts = None
+        covered = set()
+        for match in self.phrase_re.finditer(analyzed.stemmed_text):
+            if token_starts is None:
+                token_starts, position = [], 0
+                for stem in analyzed.stems:
+                    token_starts.append(position)
+                    position += len(stem) + 1
+            for category, weight in self.phrases[match.group(0)]:
+                adjustments[category] = adjustments.get(category, 0.0) + weight
+            covered.update(range(bisect_right(token_starts, match.start()) - 1,
+                                 bisect_right(token_starts, match.end() - 1)))
+        
+        for index in covered:
+            for category, weight in self.token_scores(analyzed.stems[index]):
+                adjustments[category] = adjustments.get(category, 0.0) - weight
+        return adjustments
+
+    def scores(self, text: Union[str, AnalyzedText]) -> Dict[str, float]:
+        analyzed = analyze(text)
+        scores = self.phrase_adjustments(analyzed)
+        for stem in analyzed.stems:
+            for category, weight in self.token_scores(stem):
+                scores[category] = scores.get(category, 0.0) + weight
+        return {category: score for category, score in scores.items() if score > 0}
+
+    def best_category(self, text: Union[str, AnalyzedText], default: str = 'general') -> str:
+        scores = self.scores(text)
+        if not scores:
+            return default
+        # التعادل يُحسم بترتيب الفئات في المعجم
+        return max(self.categories, key=lambda category: scores.get(category, 0.0))
+
+def load_lexicon(path: Optional[str] = None) -> Lexicon:
+    """Read a ``{category: {term: weight}}`` or ``{category: [terms]}`` JSON file, or fall back to the built-in lexicon."""
+    path = path or os.getenv('CATEGORY_LEXICON_PATH')
+    if not path:
+        return DEFAULT_CATEGORY_LEXICON
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            lexicon = json.load(f)
+        logger.info(f"Loaded category lexicon from {path}")
+        return lexicon
+    except (OSError, ValueError) as e:
+        logger.error(f"Error loading category lexicon {path}: {str(e)}")
+        return DEFAULT_CATEGORY_LEXICON
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+def get_category_matcher() -> CategoryMatcher:
+    """Process-wide matcher, built once on first use."""
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                lexicon = load_lexicon()
+                _matcher = CategoryMatcher(lexicon)
+                logger.info(f"Category matcher built: {_matcher.term_count} terms, {len(_matcher.automaton)} states")
+    return _matcher
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+def make_cache_key(provider: str, model: str, prompt: str, params: Optional[Dict] = None) -> str:
+    prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+    payload = json.dumps({
+        'provider': provider,
+        'model': model,
+        'prompt': prompt_hash,
+        'params': params or {}
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class LLMResponseCache(ABC):
+    """Base class for content-addressed LLM response caches with TTL and LRU eviction."""
+
+    def __init__(self, ttl: float = 7 * 24 * 3600, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._stats_lock = threading.Lock()
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: str, provider: str = '', model: str = ''):
+        ...
+
+    @abstractmethod
+    def clear(self):
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    def get_or_call(self, provider: str, model: str, prompt: str, params: Optional[Dict],
+                    request: Callable[[], Optional[str]]) -> Optional[str]:
+        key = make_cache_key(provider, model, prompt, params)
+        cached = self.get(key)
+        with self._stats_lock:
+            if cached is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if cached is not None:
+            return cached
+
+        result = request()
+        if result:
+            self.set(key, result, provider, model)
+        return result
+
+    def get_stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            'backend': self.backend,
+            'entries': len(self),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0
+        }
+
+class MemoryLLMCache(LLMResponseCache):
+    backend = 'memory'
+
+    def __init__(self, ttl: float = 7 * 24 * 3600, max_entries: int = 10000):
+        super().__init__(ttl, max_entries)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, created_at = entry
+            if time.time() - created_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, provider: str = '', model: str = ''):
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class SQLiteLLMCache(LLMResponseCache):
+    """On-disk cache so responses survive restarts and crashed cycles."""
+
+    backend = 'sqlite'
+
+    def __init__(self, path: str = 'llm_cache.db', ttl: float = 7 * 24 * 3600, max_entries: int = 10000):
+        super().__init__(ttl, max_entries)
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    provider TEXT,
+                    model TEXT,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            ''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access)')
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                'SELECT response, created_at FROM llm_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                conn.execute('DELETE FROM llm_cache WHERE key = ?', (key,))
+                conn.commit()
+                return None
+            conn.execute('UPDATE llm_cache SET last_access = ? WHERE key = ?', (now, key))
+            conn.commit()
+            return row[0]
+
+    def set(self, key: str, value: str, provider: str = '', model: str = ''):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO llm_cache (key, provider, model, response, created_at, last_access) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (key, provider, model, value, now, now)
+            )
+            overflow = conn.execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    'DELETE FROM llm_cache WHERE key IN '
+                    '(SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)',
+                    (overflow,)
+                )
+                self.evictions += overflow
+            conn.commit()
+
+    def clear(self):
+        with self._lock:
+            conn = self._connection()
+            conn.execute('DELETE FROM llm_cache')
+            conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection().execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+
+def create_llm_cache() -> Optional[LLMResponseCache]:
+    backend = os.getenv('LLM_CACHE_BACKEND', 'sqlite').lower()
+    ttl = float(os.getenv('LLM_CACHE_TTL', str(7 * 24 * 3600)))
+    max_entries = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '10000'))
+
+    if backend == 'memory':
+        return MemoryLLMCache(ttl=ttl, max_entries=max_entries)
+    if backend == 'sqlite':
+        return SQLiteLLMCache(os.getenv('LLM_CACHE_PATH', 'llm_cache.db'), ttl=ttl, max_entries=max_entries)
+
+    logger.info("LLM response cache disabled")
+    return None
@@ -0,0 +1,224 @@
+import logging
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from .arabic_text import STOPWORD_STEMS, AnalyzedText, analyze
+
+logger = logging.getLogger(__name__)
+
+# أكبر عدد أولي من نوع ميرسين يتسع في 64 بت، ويبقى حاصل الضرب دون فيضان لأن المعاملات أقل من 2^32
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xffffffff)
+
+class StoryMatch(NamedTuple):
+    cluster_id: Optional[str]
+    duplicate_of: Optional[str]
+    similarity: float
+
+class MinHasher:
+    """MinHash signatures over word shingles of normalized, stemmed text.
+
+    Shingles are runs of ``shingle_size`` consecutive non-stopword stems, so
+    spelling variants, diacritics and attached articles do not change them.
+    All ``num_perm`` hash permutations are applied to a text's shingles in one
+    numpy operation; the permutations come from a fixed seed so signatures are
+    comparable across processes and restarts.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 3, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text: Union[str, AnalyzedText]) -> List[str]:
+        stems = [stem for stem in analyze(text).stems if stem not in STOPWORD_STEMS]
+        size = self.shingle_size
+        return list({' '.join(stems[i:i + size]) for i in range(len(stems) - size + 1)})
+
+    def signature(self, shingles: List[str]) -> np.ndarray:
+        hashes = np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingle in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        permuted = (hashes[:, None] * self._a + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+class NearDuplicateIndex:
+    """Incremental LSH index that groups reworded copies of the same story into clusters.
+
+    Each signature is cut into ``bands`` bands of equal width and every band
+    is a hash-bucket key, so only articles that share at least one band are
+    compared. A candidate is accepted when the share of equal signature
+    positions (the estimated Jaccard similarity of the shingle sets) reaches
+    ``threshold``; the new article then joins the candidate's cluster. Texts
+    with fewer than ``min_shingles`` shingles, such as bare headlines, are too
+    short to judge and are never matched or indexed. The oldest entries are
+    evicted once ``max_entries`` is reached.
+    """
+
+    def __init__(self, threshold: float = 0.5, num_perm: int = 128, bands: int = 32,
+                 shingle_size: int = 3, min_shingles: int = 8, max_entries: int = 50000):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.min_shingles = min_shingles
+        self.max_entries = max_entries
+        self.hasher = MinHasher(num_perm, shingle_size)
+        self._entries: 'OrderedDict[str, Tuple[np.ndarray, str]]' = OrderedDict()
+        self._buckets: List[Dict[bytes, set]] = [{} for _ in range(bands)]
+        self._cluster_sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.duplicates_found = 0
+        self.evictions = 0
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        rows = self.rows
+        return [signature[band * rows:(band + 1) * rows].tobytes() for band in range(self.bands)]
+
+    def _signature(self, text: Union[str, AnalyzedText]) -> Optional[np.ndarray]:
+        shingles = self.hasher.shingles(text)
+        if len(shingles) < self.min_shingles:
+            return None
+        return self.hasher.signature(shingles)
+
+    def _best_match(self, signature: np.ndarray, band_keys: List[bytes],
+                    exclude: Optional[str] = None) -> Tuple[Optional[str], float]:
+        candidates = set()
+        for buckets, band_key in zip(self._buckets, band_keys):
+            candidates.update(buckets.get(band_key, ()))
+        candidates.discard(exclude)
+
+        best_key, best_similarity = None, 0.0
+        for key in candidates:
+            similarity = float(np.mean(self._entries[key][0] == signature))
+            if similarity > best_similarity:
+                best_key, best_similarity = key, similarity
+        if best_similarity >= self.threshold:
+            return best_key, best_similarity
+        return None, best_similarity
+
+    def _insert(self, key: str, signature: np.ndarray, band_keys: List[bytes], cluster_id: str):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (signature, cluster_id)
+        self._cluster_sizes[cluster_id] = self._cluster_sizes.get(cluster_id, 0) + 1
+        for buckets, band_key in zip(self._buckets, band_keys):
+            buckets.setdefault(band_key, set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        signature, cluster_id = self._entries.pop(key)
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            bucket = buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del buckets[band_key]
+        self._cluster_sizes[cluster_id] -= 1
+        if not self._cluster_sizes[cluster_id]:
+            del self._cluster_sizes[cluster_id]
+
+    def match(self, text: Union[str, AnalyzedText]) -> StoryMatch:
+        """Look up the closest indexed story without adding ``text``."""
+        signature = self._signature(text)
+        if signature is None:
+            return StoryMatch(None, None, 0.0)
+        with self._lock:
+            key, similarity = self._best_match(signature, self._band_keys(signature))
+            cluster_id = self._entries[key][1] if key is not None else None
+        return StoryMatch(cluster_id, key, similarity)
+
+    def assign(self, key: str, text: Union[str, AnalyzedText]) -> StoryMatch:
+        """Add ``text`` under ``key`` and return its story cluster.
+
+        ``duplicate_of`` is the closest already indexed article when the text
+        is a near-duplicate, otherwise None and the article starts a new
+        cluster named after its own key. Lookup and insert happen under one
+        lock, so of several copies arriving at once exactly one starts the
+        cluster.
+        """
+        signature = self._signature(text)
+        if signature is None:
+            return StoryMatch(None, None, 0.0)
+
+        band_keys = self._band_keys(signature)
+        with self._lock:
+            match_key, similarity = self._best_match(signature, band_keys, exclude=key)
+            if match_key is not None:
+                cluster_id = self._entries[match_key][1]
+                self.duplicates_found += 1
+            else:
+                cluster_id = key
+            self._insert(key, signature, band_keys, cluster_id)
+        return StoryMatch(cluster_id, match_key, similarity)
+
+    def discard(self, key: str) -> bool:
+        """Drop ``key`` from the index, e.g. when the article it stood for was never stored."""
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            return True
+
+    def load(self, articles: Iterable[Tuple[str, str]]) -> int:
+        """Warm the index from stored ``(key, text)`` pairs, oldest first, clustering them as they go."""
+        indexed = 0
+        for key, text in articles:
+            if self.assign(key, text).cluster_id is not None:
+                indexed += 1
+        self.loaded = True
+        logger.info(f"Story index loaded {indexed} articles into {self.cluster_count()} clusters")
+        return indexed
+
+    def cluster_of(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[1] if entry is not None else None
+
+    def cluster_size(self, cluster_id: str) -> int:
+        return self._cluster_sizes.get(cluster_id, 0)
+
+    def cluster_count(self) -> int:
+        return len(self._cluster_sizes)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets = [{} for _ in range(self.bands)]
+            self._cluster_sizes.clear()
+            self.loaded = False
+
+    def get_stats(self) -> Dict:
+        return {
+            'entries': len(self),
+            'clusters': self.cluster_count(),
+            'max_entries': self.max_entries,
+            'threshold': self.threshold,
+            'bands': self.bands,
+            'rows_per_band': self.rows,
+            'duplicates_found': self.duplicates_found,
+            'evictions': self.evictions
+        }
+
+def create_story_index() -> Optional[NearDuplicateIndex]:
+    if os.getenv('NEAR_DUPLICATE_DETECTION', 'true').lower() != 'true':
+        logger.info("Near-duplicate story clustering disabled")
+        return None
+    return NearDuplicateIndex(
+        threshold=float(os.getenv('NEAR_DUPLICATE_THRESHOLD', '0.5')),
+        max_entries=int(os.getenv('NEAR_DUPLICATE_MAX_ENTRIES', '50000'))
+    )
@@ -1,4 +1,4 @@
-import requests
+import asyncio
 from bs4 import BeautifulSoup
 import feedparser
 import time
@@ -8,9 +8,13 @@ from urllib.parse import urljoin, urlparse
 import re
 from typing import List, Dict, Optional
 import json
-import concurrent.futures
 from threading import Lock
 
+from .fetch_engine import AsyncFetchEngine
+from .feed_cache import FeedValidatorStore
+from .seen_urls import SeenUrlIndex
+from .keyword_matcher import get_category_matcher
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -28,13 +32,24 @@ class NewsArticleData:
 
 class NewsScraper:
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
         self.lock = Lock()
-        self.max_workers = 8  # Parallel processing
+        self.max_connections = 100  # Total sockets across all hosts
+        self.max_connections_per_host = 8  # Bounded pool per news site
         self.timeout = 5  # Aggressive timeout
+        self.source_timeout = 15
+        self.cycle_timeout = 45
+        
+        self.engine = AsyncFetchEngine(
+            headers={
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            },
+            timeout=self.timeout,
+            max_connections=self.max_connections,
+            max_connections_per_host=self.max_connections_per_host
+        )
+        self.feed_validators = FeedValidatorStore()
+        self.seen_urls = SeenUrlIndex()
+        self.category_matcher = get_category_matcher()
         
         self.news_sources = {
             'sana': {
@@ -75,24 +90,20 @@ class NewsScraper:
         }
 
     def fetch_rss_feed(self, rss_url: str) -> List[Dict]:
+        return self.engine.run(self._fetch_rss_feed_async(rss_url))
+
+    async def _fetch_rss_feed_async(self, rss_url: str) -> List[Dict]:
         try:
             logger.info(f"Fetching RSS from: {rss_url}")
             
-            response = self.session.get(rss_url, timeout=self.timeout)
-            response.raise_for_status()
+            response = await self.engine.fetch(rss_url, headers=self.feed_validators.request_headers(rss_url))
             
-            feed = feedparser.parse(response.content)
-            articles = []
+            if response.status == 304 or self.feed_validators.is_unchanged(rss_url, response.content):
+                logger.info(f"RSS feed not modified since last poll: {rss_url}")
+                return []
             
-            for entry in feed.entries[:3]:
-                article = {
-                    'title': entry.get('title', ''),
-                    'link': entry.get('link', ''),
-                    'summary': entry.get('summary', ''),
-                    'published': entry.get('published', ''),
-                    'author': entry.get('author', '')
-                }
-                articles.append(article)
+            articles = await self.engine.run_blocking(self._parse_rss_feed, response.content)
+            self.feed_validators.stage(rss_url, response.headers, response.content)
             
             logger.info(f"Fetched {len(articles)} articles from RSS")
             return articles
@@ -101,39 +112,55 @@ class NewsScraper:
             logger.error(f"Error fetching RSS from {rss_url}: {str(e)}")
             return []
 
+    def confirm_feed(self, source_key: str):
+        """Start sending the staged validators of a source once its articles are stored."""
+        source_config = self.news_sources.get(source_key)
+        if source_config:
+            self.feed_validators.commit(source_config['rss_url'])
+
+    def discard_feed(self, source_key: str):
+        """Forget the staged validators of a source so its next poll downloads and parses the feed again."""
+        source_config = self.news_sources.get(source_key)
+        if source_config:
+            self.feed_validators.discard(source_config['rss_url'])
+
+    def _parse_rss_feed(self, content: bytes) -> List[Dict]:
+        feed = feedparser.parse(content)
+        articles = []
+        
+        for entry in feed.entries[:3]:
+            article = {
+                'title': entry.get('title', ''),
+                'link': entry.get('link', ''),
+                'summary': entry.get('summary', ''),
+                'published': entry.get('published', ''),
+                'author': entry.get('author', '')
+            }
+            articles.append(article)
+        
+        return articles
+
     def extract_article_content(self, url: str, source_config: Dict) -> Optional[NewsArticleData]:
+        return self.engine.run(self._extract_article_content_async(url, source_config))
+
+    async def _extract_article_content_async(self, url: str, source_config: Dict,
+                                             raise_fetch_errors: bool = False) -> Optional[NewsArticleData]:
+        """Download and parse one article page; None when it cannot be read.
+
+        With ``raise_fetch_errors`` a failed download raises instead, so the
+        caller can tell it apart from a page that simply has no content.
+        """
         try:
             logger.info(f"Extracting content from: {url}")
-            
-            response = self.session.get(url, timeout=self.timeout)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            article = NewsArticleData()
-            
-            title_elem = soup.select_one('h1') or soup.select_one('title')
-            if title_elem:
-                article.title = title_elem.get_text().strip()
-            
-            content_elem = soup.select_one('article') or soup.select_one('.article-content')
-            if content_elem:
-                paragraphs = content_elem.find_all('p')[:3]  # Limit for speed
-                content_parts = [p.get_text().strip() for p in paragraphs if len(p.get_text().strip()) > 20]
-                article.content = '\n\n'.join(content_parts)
-            
-            img_elem = soup.select_one('article img') or soup.select_one('img')
-            if img_elem and img_elem.get('src'):
-                img_url = img_elem.get('src')
-                if isinstance(img_url, str):
-                    if img_url.startswith('//'):
-                        img_url = 'https:' + img_url
-                    elif img_url.startswith('/'):
-                        img_url = urljoin(source_config['base_url'], img_url)
-                    article.image_url = img_url
-            
-            article.url = url
-            article.source_name = source_config['name']
-            article.category = self.categorize_article(article.title + " " + article.content)
+            response = await self.engine.fetch(url)
+        except Exception as e:
+            logger.error(f"Error fetching {url}: {str(e)}")
+            if raise_fetch_errors:
+                raise
+            return None
+        
+        try:
+            article = await self.engine.run_blocking(self._parse_article_html, response.content, url, source_config)
             
             logger.info(f"Extracted article: {article.title[:50]}...")
             return article
@@ -142,26 +169,43 @@ class NewsScraper:
             logger.error(f"Error extracting content from {url}: {str(e)}")
             return None
 
-    def categorize_article(self, text: str) -> str:
-        text_lower = text.lower()
-        
-        categories = {
-            'politics': ['سياسة', 'حكومة', 'رئيس', 'وزير', 'برلمان', 'انتخابات', 'دبلوماسية', 'مفاوضات'],
-            'economy': ['اقتصاد', 'بورصة', 'أسهم', 'استثمار', 'تجارة', 'صادرات', 'واردات', 'عملة'],
-            'syrian_affairs': ['سوريا', 'سوري', 'دمشق', 'حلب', 'حمص', 'اللاذقية', 'درعا', 'إعادة إعمار'],
-            'sports': ['رياضة', 'كرة', 'فوز', 'هزيمة', 'مباراة', 'بطولة', 'أولمبياد', 'منتخب'],
-            'health': ['صحة', 'طب', 'مرض', 'علاج', 'مستشفى', 'طبيب', 'دواء', 'وباء'],
-            'technology': ['تقنية', 'تكنولوجيا', 'ذكاء اصطناعي', 'إنترنت', 'هاتف', 'تطبيق', 'برمجة']
-        }
+    def _parse_article_html(self, content: bytes, url: str, source_config: Dict) -> NewsArticleData:
+        soup = BeautifulSoup(content, 'html.parser')
+        article = NewsArticleData()
+        
+        title_elem = soup.select_one('h1') or soup.select_one('title')
+        if title_elem:
+            article.title = title_elem.get_text().strip()
         
-        for category, keywords in categories.items():
-            for keyword in keywords:
-                if keyword in text_lower:
-                    return category
+        content_elem = soup.select_one('article') or soup.select_one('.article-content')
+        if content_elem:
+            paragraphs = content_elem.find_all('p')[:3]  # Limit for speed
+            content_parts = [p.get_text().strip() for p in paragraphs if len(p.get_text().strip()) > 20]
+            article.content = '\n\n'.join(content_parts)
         
-        return 'general'
+        img_elem = soup.select_one('article img') or soup.select_one('img')
+        if img_elem and img_elem.get('src'):
+            img_url = img_elem.get('src')
+            if isinstance(img_url, str):
+                if img_url.startswith('//'):
+                    img_url = 'https:' + img_url
+                elif img_url.startswith('/'):
+                    img_url = urljoin(source_config['base_url'], img_url)
+                article.image_url = img_url
+        
+        article.url = url
+        article.source_name = source_config['name']
+        article.category = self.categorize_article(article.title + " " + article.content)
+        
+        return article
+
+    def categorize_article(self, text: str) -> str:
+        return self.category_matcher.best_category(text)
 
     def scrape_source(self, source_key: str) -> List[NewsArticleData]:
+        return self.engine.run(self._scrape_source_async(source_key))
+
+    async def _scrape_source_async(self, source_key: str) -> List[NewsArticleData]:
         if source_key not in self.news_sources:
             logger.error(f"Unknown source: {source_key}")
             return []
@@ -169,32 +213,60 @@ class NewsScraper:
         source_config = self.news_sources[source_key]
         logger.info(f"Starting to scrape from: {source_config['name']}")
         
-        rss_articles = self.fetch_rss_feed(source_config['rss_url'])
+        rss_articles = await self._fetch_rss_feed_async(source_config['rss_url'])
+        new_articles = [
+            rss_article for rss_article in rss_articles[:3]  # Limit for speed
+            if rss_article['link'] and rss_article['link'] not in self.seen_urls
+        ]
+        
+        skipped = len(rss_articles[:3]) - len(new_articles)
+        if skipped:
+            logger.info(f"Skipped {skipped} already stored articles from {source_config['name']}")
+        
+        tasks = [
+            asyncio.ensure_future(self._process_article_fast(rss_article, source_config))
+            for rss_article in new_articles
+        ]
         
         scraped_articles = []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_article = {
-                executor.submit(self._process_article_fast, rss_article, source_config): rss_article 
-                for rss_article in rss_articles[:3]  # Limit for speed
-                if rss_article['link']
-            }
+        fetch_failed = False
+        if tasks:
+            done, pending = await asyncio.wait(tasks, timeout=self.source_timeout)
+            for task in pending:
+                task.cancel()
+                fetch_failed = True
+                logger.error(f"Timed out processing article from {source_config['name']}")
             
-            for future in concurrent.futures.as_completed(future_to_article, timeout=15):
+            for task in done:
                 try:
-                    article_data = future.result(timeout=3)
+                    article_data = task.result()
                     if article_data:
                         scraped_articles.append(article_data)
                 except Exception as e:
+                    fetch_failed = fetch_failed or self._is_transient(e)
                     logger.error(f"Error processing article: {str(e)}")
                     continue
         
+        if fetch_failed:
+            # مقالات تعذّر تنزيلها هذه المرة، فيُقرأ الخلاصة كاملاً في الدورة القادمة.
+            # أما صفحة بلا محتوى فلن يتغير حالها، ولا تستحق إعادة قراءة الخلاصة كل دورة
+            self.discard_feed(source_key)
+        
         logger.info(f"Scraped {len(scraped_articles)} articles from {source_config['name']}")
         return scraped_articles
     
-    def _process_article_fast(self, rss_article: Dict, source_config: Dict) -> Optional[NewsArticleData]:
-        """Revolutionary fast article processing"""
+    @staticmethod
+    def _is_transient(error: Exception) -> bool:
+        """Network errors, timeouts, 5xx and 429 may pass; other 4xx answers will not change."""
+        status = getattr(error, 'status', None)
+        return status is None or status >= 500 or status == 429
+
+    async def _process_article_fast(self, rss_article: Dict, source_config: Dict) -> Optional[NewsArticleData]:
+        """Revolutionary fast article processing; a failed download raises."""
+        article_data = await self._extract_article_content_async(
+            rss_article['link'], source_config, raise_fetch_errors=True
+        )
         try:
-            article_data = self.extract_article_content(rss_article['link'], source_config)
             if article_data and article_data.content:
                 if not article_data.title and rss_article['title']:
                     article_data.title = rss_article['title']
@@ -220,22 +292,30 @@ class NewsScraper:
 
     def scrape_all_sources(self) -> Dict[str, List[NewsArticleData]]:
         """Revolutionary parallel scraping of all sources for <60 second processing"""
+        return self.engine.run(self._scrape_all_sources_async())
+
+    async def _scrape_all_sources_async(self) -> Dict[str, List[NewsArticleData]]:
         all_articles = {}
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_source = {
-                executor.submit(self.scrape_source, source_key): source_key 
-                for source_key in self.news_sources.keys()
-            }
-            
-            for future in concurrent.futures.as_completed(future_to_source, timeout=45):
-                try:
-                    source_key = future_to_source[future]
-                    articles = future.result(timeout=10)
-                    all_articles[source_key] = articles
-                except Exception as e:
-                    source_key = future_to_source.get(future, 'unknown')
-                    logger.error(f"Error scraping from {source_key}: {str(e)}")
-                    all_articles[source_key] = []
+        task_to_source = {
+            asyncio.ensure_future(self._scrape_source_async(source_key)): source_key
+            for source_key in self.news_sources.keys()
+        }
+        
+        done, pending = await asyncio.wait(task_to_source.keys(), timeout=self.cycle_timeout)
+        
+        for task in pending:
+            task.cancel()
+            source_key = task_to_source[task]
+            logger.error(f"Error scraping from {source_key}: timed out after {self.cycle_timeout}s")
+            all_articles[source_key] = []
+        
+        for task in done:
+            source_key = task_to_source[task]
+            try:
+                all_articles[source_key] = task.result()
+            except Exception as e:
+                logger.error(f"Error scraping from {source_key}: {str(e)}")
+                all_articles[source_key] = []
         
         return all_articles
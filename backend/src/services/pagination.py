@@ -0,0 +1,124 @@
+import base64
+import json
+import logging
+import math
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from sqlalchemy import and_, desc, func, or_
+
+logger = logging.getLogger(__name__)
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(published_at: Optional[datetime], article_id: int) -> str:
+    payload = json.dumps({'p': published_at.isoformat() if published_at else None, 'i': article_id},
+                         separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(token: str) -> Tuple[Optional[datetime], int]:
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        published_at = datetime.fromisoformat(payload['p']) if payload['p'] is not None else None
+        return published_at, int(payload['i'])
+    except (ValueError, TypeError, KeyError, UnicodeEncodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {token}") from e
+
+class CountCache:
+    """Short-lived cache of COUNT(*) results used for approximate totals.
+
+    An exact count scans every matching row, so cursor pages only pay for it
+    once per ``ttl`` seconds per filter combination.
+    """
+
+    def __init__(self, ttl: float = 60, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def get_or_count(self, key: Hashable, count: Callable[[], int]) -> int:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                return entry[0]
+
+        total = count()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = (total, now)
+        return total
+
+count_cache = CountCache()
+
+def keyset_page(query, model, per_page: int, token: Optional[str] = None, include_total: Optional[str] = None,
+                count_key: Optional[Hashable] = None) -> Tuple[List, Dict]:
+    """One page of ``query`` ordered newest first on (``published_at``, ``id``), continuing after ``token``.
+
+    Rows with a publication date are walked first and rows without one last,
+    by id. Each phase is a range condition on the composite
+    (``published_at``, ``id``) index, so a deep page costs the same as the
+    first. ``include_total`` may be ``exact`` (a COUNT on every request) or
+    ``approx`` (a COUNT cached for a short while).
+    """
+    published_at, article_id = decode_cursor(token) if token else (None, None)
+    in_undated_tail = article_id is not None and published_at is None
+    rows = []
+
+    if not in_undated_tail:
+        dated = query.filter(model.published_at.isnot(None))
+        if article_id is not None:
+            dated = dated.filter(
+                model.published_at <= published_at,
+                or_(model.published_at < published_at, and_(model.published_at == published_at, model.id < article_id))
+            )
+        rows = dated.order_by(desc(model.published_at), desc(model.id)).limit(per_page + 1).all()
+
+    if len(rows) <= per_page:
+        undated = query.filter(model.published_at.is_(None))
+        if in_undated_tail:
+            undated = undated.filter(model.id < article_id)
+        rows += undated.order_by(desc(model.id)).limit(per_page + 1 - len(rows)).all()
+
+    items = rows[:per_page]
+    has_more = len(rows) > per_page
+    pagination = {
+        'per_page': per_page,
+        'has_more': has_more,
+        'next_cursor': encode_cursor(items[-1].published_at, items[-1].id) if has_more else None
+    }
+
+    if include_total == 'exact':
+        pagination['total'] = count_matching(query, model)
+        pagination['total_is_approximate'] = False
+    elif include_total == 'approx':
+        pagination['total'] = count_cache.get_or_count(count_key, lambda: count_matching(query, model))
+        pagination['total_is_approximate'] = True
+
+    return items, pagination
+
+def count_matching(query, model) -> int:
+    """COUNT over the query's filters only, so loader options and projections never reach the count."""
+    count_query = query.session.query(func.count(model.id))
+    if query.whereclause is not None:
+        count_query = count_query.filter(query.whereclause)
+    return count_query.scalar()
+
+def offset_page(query, model, page: int, per_page: int, order_by) -> Tuple[List, Dict]:
+    """Classic page-number pagination with the same response shape as ``Query.paginate``."""
+    page = max(page, 1)
+    per_page = per_page if per_page > 0 else 20
+    items = query.order_by(*order_by).limit(per_page).offset((page - 1) * per_page).all()
+    total = count_matching(query, model)
+    return items, {
+        'page': page,
+        'pages': math.ceil(total / per_page) if total else 0,
+        'per_page': per_page,
+        'total': total
+    }
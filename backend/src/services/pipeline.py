@@ -0,0 +1,233 @@
+import logging
+import queue
+import threading
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+class ScrapingPipeline:
+    """Staged scrape -> AI -> persist pipeline for one automation cycle.
+
+    Fetch workers pull source keys and scrape them, AI workers run
+    ``process_article_complete`` and a single writer thread persists the
+    results in batches through ``save_articles_bulk``. The stages are joined
+    by bounded queues, so a slow stage blocks the one before it instead of
+    letting work pile up in memory. When the service has a ``story_index``,
+    reworded copies of a story already seen are dropped before the AI stage
+    and counted as ``near_duplicates``.
+
+    A story claimed in the index this cycle only counts as seen once its
+    first copy is stored. Until then the copies dropped in its favour wait
+    on it: when it is saved their URLs join ``seen_urls``, and when the AI
+    stage or the save fails the story and its copies leave the index again,
+    so the next cycle fetches them afresh.
+    """
+
+    def __init__(self, service, fetch_workers: int = 4, ai_workers: int = 4, queue_size: int = 20,
+                 batch_size: int = 50, flush_interval: float = 0.5):
+        self.service = service
+        self.fetch_workers = max(1, fetch_workers)
+        self.ai_workers = max(1, ai_workers)
+        self.queue_size = max(1, queue_size)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._pending_stories: Dict[str, List[Tuple[str, str]]] = {}
+        self._stories_lock = threading.Lock()
+
+    def run(self, source_keys: List[str]) -> Dict[str, Dict]:
+        source_queue = queue.Queue()
+        ai_queue = queue.Queue(maxsize=self.queue_size)
+        db_queue = queue.Queue(maxsize=self.queue_size)
+
+        results = {key: self._empty_results(key) for key in source_keys}
+        results_lock = threading.Lock()
+        self._pending_stories = {}
+
+        for key in source_keys:
+            source_queue.put(key)
+
+        fetchers = self._start(self.fetch_workers, 'pipeline-fetch', self._fetch_worker,
+                               source_queue, ai_queue, results, results_lock)
+        ai_threads = self._start(self.ai_workers, 'pipeline-ai', self._ai_worker,
+                                 ai_queue, db_queue, results, results_lock)
+        writer = self._start(1, 'pipeline-db', self._db_writer, db_queue, results, results_lock)
+
+        for thread in fetchers:
+            thread.join()
+        for _ in ai_threads:
+            ai_queue.put(_STOP)
+        for thread in ai_threads:
+            thread.join()
+        db_queue.put(_STOP)
+        for thread in writer:
+            thread.join()
+
+        return results
+
+    def _start(self, count: int, name: str, target, *args) -> List[threading.Thread]:
+        threads = []
+        for i in range(count):
+            thread = threading.Thread(target=target, args=args, name=f"{name}-{i}")
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+        return threads
+
+    @staticmethod
+    def _empty_results(source_key: str) -> Dict:
+        return {
+            "source": source_key,
+            "articles_found": 0,
+            "articles_processed": 0,
+            "articles_saved": 0,
+            "near_duplicates": 0,
+            "errors": 0
+        }
+
+    def _record(self, results: Dict, lock: threading.Lock, source_key: str, field: str, amount: int = 1):
+        with lock:
+            results[source_key][field] += amount
+            if field == "errors":
+                self.service.stats["errors"] += amount
+
+    @staticmethod
+    def _story_key(source_key: str, article_data) -> str:
+        return article_data.url or f"{source_key}:{article_data.title}"
+
+    def _is_near_duplicate(self, story_index, source_key: str, article_data) -> bool:
+        key = self._story_key(source_key, article_data)
+        # الفهرسة والتحقق من القصص المعلقة تحت قفل واحد حتى لا تفلت نسخة أثناء تسوية أصلها
+        with self._stories_lock:
+            match = story_index.assign(key, f"{article_data.title} {article_data.content or ''}")
+            if match.duplicate_of is None:
+                if match.cluster_id is not None:
+                    self._pending_stories[key] = []
+                return False
+            waiting = self._pending_stories.get(match.cluster_id)
+            if waiting is not None:
+                waiting.append((key, article_data.url))
+        
+        logger.info(f"Skipping near-duplicate of {match.duplicate_of} ({match.similarity:.2f}): {article_data.title}")
+        if waiting is None and article_data.url:
+            self.service.scraper.seen_urls.add(article_data.url)
+        return True
+
+    def _settle_story(self, source_key: str, article_data, stored: bool):
+        """Confirm or release the story claimed by an article once it is stored or has failed."""
+        key = self._story_key(source_key, article_data)
+        with self._stories_lock:
+            copies = self._pending_stories.pop(key, None)
+            if copies is None:
+                return
+            if not stored:
+                story_index = self.service.story_index
+                for copy_key in [key] + [copy_key for copy_key, _ in copies]:
+                    story_index.discard(copy_key)
+                logger.info(f"Released story of unsaved article: {article_data.title}")
+                return
+        
+        for _, url in copies:
+            if url:
+                self.service.scraper.seen_urls.add(url)
+
+    def _fetch_worker(self, source_queue: queue.Queue, ai_queue: queue.Queue, results: Dict, lock: threading.Lock):
+        service = self.service
+        story_index = getattr(service, 'story_index', None)
+        while True:
+            try:
+                source_key = source_queue.get_nowait()
+            except queue.Empty:
+                return
+
+            try:
+                articles = service.scraper.scrape_source(source_key)
+                self._record(results, lock, source_key, "articles_found", len(articles))
+
+                if not articles:
+                    logger.warning(f"No articles found from {source_key}")
+                    continue
+
+                source_config = service.scraper.news_sources[source_key]
+                source = service.get_or_create_source(
+                    source_config['name'],
+                    source_config['base_url'],
+                    source_config['language'],
+                    source_config['country']
+                )
+
+                for article_data in articles[:service.max_articles_per_source]:
+                    # نسخة معاد صياغتها من قصة سبق جمعها لا تستحق استدعاءً جديداً للنماذج
+                    if story_index is not None and self._is_near_duplicate(story_index, source_key, article_data):
+                        self._record(results, lock, source_key, "near_duplicates")
+                        continue
+                    ai_queue.put((source_key, source, article_data))
+
+            except Exception as e:
+                logger.error(f"Error processing source {source_key}: {str(e)}")
+                self._record(results, lock, source_key, "errors")
+
+    def _ai_worker(self, ai_queue: queue.Queue, db_queue: queue.Queue, results: Dict, lock: threading.Lock):
+        service = self.service
+        while True:
+            item = ai_queue.get()
+            if item is _STOP:
+                return
+
+            source_key, source, article_data = item
+            try:
+                ai_results = {}
+                if service.ai_processing_enabled and article_data.content:
+                    ai_results = service.ai_processor.process_article_complete(
+                        article_data.title,
+                        article_data.content
+                    )
+                    self._record(results, lock, source_key, "articles_processed")
+
+                db_queue.put((source_key, source, article_data, ai_results))
+
+            except Exception as e:
+                logger.error(f"Error processing article: {str(e)}")
+                self._record(results, lock, source_key, "errors")
+                self._settle_story(source_key, article_data, stored=False)
+
+    def _db_writer(self, db_queue: queue.Queue, results: Dict, lock: threading.Lock):
+        batch = []
+        while True:
+            try:
+                item = db_queue.get(timeout=self.flush_interval if batch else None)
+            except queue.Empty:
+                item = None
+
+            stopping = item is _STOP
+            if item is not None and not stopping:
+                batch.append(item)
+
+            if batch and (stopping or item is None or len(batch) >= self.batch_size):
+                self._flush(batch, results, lock)
+                batch = []
+
+            if stopping:
+                return
+
+    def _flush(self, batch: List, results: Dict, lock: threading.Lock):
+        service = self.service
+        try:
+            outcomes = service.save_articles_bulk([
+                (article_data, ai_results, source)
+                for _, source, article_data, ai_results in batch
+            ])
+        except Exception as e:
+            logger.error(f"Error saving article batch: {str(e)}")
+            outcomes = [{"status": "error"} for _ in batch]
+
+        for (source_key, _, article_data, _), outcome in zip(batch, outcomes):
+            # رابط موجود مسبقاً يعني أن القصة مخزنة أصلاً
+            self._settle_story(source_key, article_data, stored=outcome["status"] != "error")
+            if outcome["status"] == "saved":
+                self._record(results, lock, source_key, "articles_saved")
+                with lock:
+                    service.stats["total_published"] += 1
+            elif outcome["status"] == "error":
+                self._record(results, lock, source_key, "errors")
@@ -0,0 +1,188 @@
+import json
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# كل التغييرات الفورية (مقالات جديدة، إحصاءات، تنبيهات) تمر عبر هذه القناة
+CHANGES_CHANNEL = 'news:realtime'
+
+class Broker(ABC):
+    """Publish/subscribe transport that carries real-time changes between processes.
+
+    The automation worker publishes each change once; every web worker
+    subscribes and fans it out to the Socket.IO clients connected to it, so a
+    client receives every event whichever worker it is connected to. Messages
+    are JSON objects.
+    """
+
+    backend = None
+
+    def __init__(self):
+        self.published = 0
+        self.delivered = 0
+        self._callbacks: Dict[str, List[Callable[[Dict], None]]] = {}
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def publish(self, channel: str, message: Dict):
+        ...
+
+    def subscribe(self, channel: str, callback: Callable[[Dict], None]):
+        with self._lock:
+            self._callbacks.setdefault(channel, []).append(callback)
+
+    def unsubscribe(self, channel: str, callback: Callable[[Dict], None]):
+        with self._lock:
+            callbacks = self._callbacks.get(channel, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def close(self):
+        pass
+
+    def _deliver(self, channel: str, message: Dict):
+        with self._lock:
+            callbacks = list(self._callbacks.get(channel, []))
+        for callback in callbacks:
+            try:
+                callback(message)
+                self.delivered += 1
+            except Exception as e:
+                logger.error(f"Error handling message on {channel}: {str(e)}")
+
+    def get_stats(self) -> Dict:
+        return {
+            'backend': self.backend,
+            'channels': sorted(channel for channel, callbacks in self._callbacks.items() if callbacks),
+            'published': self.published,
+            'delivered': self.delivered
+        }
+
+class InMemoryBroker(Broker):
+    """Single-process stand-in: delivers synchronously to every subscriber in this process.
+
+    Messages still go through a JSON round trip, so anything that would not
+    survive Redis fails here as well.
+    """
+
+    backend = 'memory'
+
+    def publish(self, channel: str, message: Dict):
+        self.published += 1
+        self._deliver(channel, json.loads(json.dumps(message)))
+
+class RedisBroker(Broker):
+    """Redis pub/sub; a background thread receives messages and hands them to the subscribers.
+
+    A Redis error in the listener thread does not end it: the error is
+    logged and counted, and after ``reconnect_delay`` seconds the thread
+    subscribes to every channel again, which reconnects once Redis is back.
+    """
+
+    backend = 'redis'
+
+    def __init__(self, url: str = 'redis://localhost:6379/0', client=None, reconnect_delay: float = 1.0):
+        super().__init__()
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.reconnect_delay = reconnect_delay
+        self.listener_errors = 0
+        self._pubsub = None
+        self._thread = None
+        self._handlers: Dict[str, Callable[[Dict], None]] = {}
+        self._subscription_lock = threading.Lock()
+        self._closed = threading.Event()
+
+    def publish(self, channel: str, message: Dict):
+        self.client.publish(channel, json.dumps(message))
+        self.published += 1
+
+    def subscribe(self, channel: str, callback: Callable[[Dict], None]):
+        # التحقق من أول مشترك وتسجيله تحت قفل واحد، فلا يُشترك في القناة على Redis مرتين
+        with self._subscription_lock:
+            with self._lock:
+                first = not self._callbacks.get(channel)
+            super().subscribe(channel, callback)
+            if not first:
+                return
+            if self._pubsub is None:
+                self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            self._handlers[channel] = lambda raw: self._on_message(channel, raw)
+            self._pubsub.subscribe(**{channel: self._handlers[channel]})
+            if self._thread is None:
+                self._closed.clear()
+                self._thread = self._pubsub.run_in_thread(
+                    sleep_time=0.01, daemon=True, exception_handler=self._on_listener_error
+                )
+
+    def _on_message(self, channel: str, raw: Dict):
+        try:
+            message = json.loads(raw['data'])
+        except (TypeError, ValueError, KeyError) as e:
+            logger.error(f"Ignoring malformed message on {channel}: {str(e)}")
+            return
+        self._deliver(channel, message)
+
+    def _on_listener_error(self, error: Exception, pubsub, thread):
+        self.listener_errors += 1
+        logger.error(f"Redis listener error, resubscribing in {self.reconnect_delay}s: {str(error)}")
+        if self._closed.wait(self.reconnect_delay):
+            return
+        with self._subscription_lock:
+            handlers = dict(self._handlers)
+        try:
+            if handlers:
+                pubsub.subscribe(**handlers)
+        except Exception as e:
+            # الخيط يستدعي هذا المعالج مجدداً عند الخطأ التالي فتُعاد المحاولة
+            logger.error(f"Redis resubscribe failed: {str(e)}")
+
+    def close(self):
+        with self._subscription_lock:
+            self._closed.set()
+            if self._thread is not None:
+                self._thread.stop()
+                self._thread = None
+            if self._pubsub is not None:
+                self._pubsub.close()
+                self._pubsub = None
+            self._handlers.clear()
+
+    def get_stats(self) -> Dict:
+        stats = super().get_stats()
+        stats['listener_errors'] = self.listener_errors
+        return stats
+
+def create_broker() -> Broker:
+    backend = os.getenv('REALTIME_BROKER', 'memory').lower()
+
+    if backend == 'redis':
+        try:
+            return RedisBroker(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+        except Exception as e:
+            logger.error(f"Redis broker unavailable, real-time events stay in this process: {str(e)}")
+    return InMemoryBroker()
+
+_broker = None
+_broker_lock = threading.Lock()
+
+def get_broker() -> Broker:
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = create_broker()
+    return _broker
+
+def publish_change(kind: str, data: Dict, broker: Optional[Broker] = None):
+    """Publish one change for real-time clients; a broker failure is logged and never fails the caller."""
+    try:
+        (broker or get_broker()).publish(CHANGES_CHANNEL, {'type': kind, 'data': data})
+    except Exception as e:
+        logger.error(f"Error publishing {kind} change: {str(e)}")
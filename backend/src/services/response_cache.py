@@ -0,0 +1,279 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import wraps
+from typing import Dict, NamedTuple, Optional
+from urllib.parse import urlencode
+
+from flask import make_response, request
+
+logger = logging.getLogger(__name__)
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    mimetype: str
+    etag: str
+
+def response_cache_key() -> str:
+    """Route plus its query arguments in a fixed order, so ``?a=1&b=2`` and ``?b=2&a=1`` share an entry."""
+    args = sorted(request.args.items(multi=True))
+    return f"{request.path}?{urlencode(args)}" if args else request.path
+
+class ResponseCache(ABC):
+    """Base class for caches of rendered read-only API responses.
+
+    Entries expire after a TTL, and ``invalidate`` drops all of them at once
+    whenever the articles behind them change. A response rendered while an
+    invalidation happened is not stored, because it may already be stale.
+    """
+
+    backend = None
+
+    def __init__(self, ttl: float = 60, max_entries: int = 1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+        self._stats_lock = threading.Lock()
+        # قفل لكل مجموعة مفاتيح: عند انتهاء صلاحية مدخل يحسبه طلب واحد وتنتظره البقية
+        self._fill_locks = [threading.Lock() for _ in range(64)]
+
+    @abstractmethod
+    def generation(self):
+        """Token for the current state; an entry read or written under an older token is ignored."""
+
+    @abstractmethod
+    def get(self, key: str, generation) -> Optional[CachedResponse]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, generation, entry: CachedResponse, ttl: Optional[float] = None):
+        ...
+
+    @abstractmethod
+    def invalidate(self):
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    def fill_lock(self, key: str) -> threading.Lock:
+        return self._fill_locks[hash(key) % len(self._fill_locks)]
+
+    def record(self, outcome: str):
+        with self._stats_lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def get_stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            'backend': self.backend,
+            'entries': len(self),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'not_modified': self.not_modified,
+            'invalidations': self.invalidations,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0
+        }
+
+class MemoryResponseCache(ResponseCache):
+    """Per-process LRU cache; ``invalidate`` only reaches the process that calls it."""
+
+    backend = 'memory'
+
+    def __init__(self, ttl: float = 60, max_entries: int = 1000):
+        super().__init__(ttl, max_entries)
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def generation(self):
+        return self._generation
+
+    def get(self, key: str, generation) -> Optional[CachedResponse]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            entry, expires_at = item
+            if time.time() >= expires_at or generation != self._generation:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, generation, entry: CachedResponse, ttl: Optional[float] = None):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = (entry, time.time() + (ttl if ttl is not None else self.ttl))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+        self.record('invalidations')
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class RedisResponseCache(ResponseCache):
+    """Cache shared by every worker process.
+
+    The generation is a Redis counter that is part of every entry's key, so
+    one ``INCR`` invalidates the cache for all workers and the orphaned
+    entries simply expire.
+    """
+
+    backend = 'redis'
+
+    def __init__(self, url: str = 'redis://localhost:6379/0', ttl: float = 60, max_entries: int = 1000,
+                 prefix: str = 'news:responses', client=None):
+        super().__init__(ttl, max_entries)
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, key: str, generation) -> str:
+        return f"{self.prefix}:{generation}:{key}"
+
+    def generation(self):
+        return int(self.client.get(f"{self.prefix}:generation") or 0)
+
+    def get(self, key: str, generation) -> Optional[CachedResponse]:
+        values = self.client.hgetall(self._key(key, generation))
+        if not values:
+            return None
+        return CachedResponse(values[b'body'], values[b'mimetype'].decode(), values[b'etag'].decode())
+
+    def set(self, key: str, generation, entry: CachedResponse, ttl: Optional[float] = None):
+        redis_key = self._key(key, generation)
+        pipeline = self.client.pipeline(transaction=True)
+        pipeline.hset(redis_key, mapping={'body': entry.body, 'mimetype': entry.mimetype, 'etag': entry.etag})
+        pipeline.expire(redis_key, max(1, int(ttl if ttl is not None else self.ttl)))
+        pipeline.execute()
+
+    def invalidate(self):
+        self.client.incr(f"{self.prefix}:generation")
+        self.record('invalidations')
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(match=f"{self.prefix}:{self.generation()}:*"))
+
+def create_response_cache() -> Optional[ResponseCache]:
+    """Redis when ``REDIS_URL`` is set, otherwise an in-process cache; ``RESPONSE_CACHE_BACKEND`` overrides.
+
+    The in-process cache is only invalidated in the process that writes the
+    articles, i.e. the one running the automation. With several web workers
+    the others serve responses up to ``RESPONSE_CACHE_TTL`` seconds old, so
+    multi-worker deployments should use Redis.
+    """
+    default_backend = 'redis' if os.getenv('REDIS_URL') else 'memory'
+    backend = os.getenv('RESPONSE_CACHE_BACKEND', default_backend).lower()
+    ttl = float(os.getenv('RESPONSE_CACHE_TTL', '60'))
+    max_entries = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '1000'))
+
+    if backend == 'redis':
+        try:
+            return RedisResponseCache(os.getenv('REDIS_URL', 'redis://localhost:6379/0'), ttl=ttl, max_entries=max_entries)
+        except Exception as e:
+            logger.error(f"Redis response cache unavailable, using in-process cache: {str(e)}")
+            backend = 'memory'
+    if backend == 'memory':
+        return MemoryResponseCache(ttl=ttl, max_entries=max_entries)
+
+    logger.info("Response cache disabled")
+    return None
+
+_response_cache = None
+_response_cache_created = False
+_response_cache_lock = threading.Lock()
+
+def get_response_cache() -> Optional[ResponseCache]:
+    global _response_cache, _response_cache_created
+    if not _response_cache_created:
+        with _response_cache_lock:
+            if not _response_cache_created:
+                _response_cache = create_response_cache()
+                _response_cache_created = True
+    return _response_cache
+
+def invalidate_responses():
+    """Drop every cached response; called after articles or sources are written."""
+    cache = get_response_cache()
+    if cache is None:
+        return
+    try:
+        cache.invalidate()
+    except Exception as e:
+        logger.error(f"Error invalidating response cache: {str(e)}")
+
+def cached_response(ttl: Optional[float] = None):
+    """Serve a GET view from the response cache, with an ETag so unchanged polls get a 304.
+
+    Only 200 responses are stored. When the cache backend fails the view is
+    simply called, so a cache outage never turns into an API outage.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = get_response_cache()
+            if cache is None:
+                return view(*args, **kwargs)
+
+            key = response_cache_key()
+            # فقط عمليات الذاكرة المؤقتة محمية؛ خطأ من الدالة نفسها (مثل abort) يصعد كما هو ولا تُستدعى مرتين
+            try:
+                generation = cache.generation()
+                entry = cache.get(key, generation)
+            except Exception as e:
+                logger.error(f"Response cache error for {key}: {str(e)}")
+                return view(*args, **kwargs)
+            
+            if entry is None:
+                with cache.fill_lock(key):
+                    try:
+                        entry = cache.get(key, generation)
+                    except Exception as e:
+                        logger.error(f"Response cache error for {key}: {str(e)}")
+                    if entry is None:
+                        cache.record('misses')
+                        response = make_response(view(*args, **kwargs))
+                        if response.status_code != 200:
+                            return response
+                        body = response.get_data()
+                        entry = CachedResponse(body, response.mimetype, hashlib.sha1(body).hexdigest())
+                        try:
+                            cache.set(key, generation, entry, ttl)
+                        except Exception as e:
+                            logger.error(f"Response cache error for {key}: {str(e)}")
+                    else:
+                        cache.record('hits')
+            else:
+                cache.record('hits')
+            
+            response = make_response(entry.body)
+            response.mimetype = entry.mimetype
+            response.set_etag(entry.etag)
+            # المتصفح يعيد التحقق في كل طلب، فيحصل على 304 دون جسم ما دامت البيانات لم تتغير
+            response.headers['Cache-Control'] = 'no-cache'
+            response.make_conditional(request)
+            if response.status_code == 304:
+                cache.record('not_modified')
+            return response
+        return wrapper
+    return decorator
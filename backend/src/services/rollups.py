@@ -0,0 +1,150 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, select
+
+from ..models.news import DailyRollup, HourlyRollup, NewsArticle, NewsCategory
+
+logger = logging.getLogger(__name__)
+
+# الصفوف الساعية تخدم نافذة الـ24 ساعة فقط، فلا داعي للاحتفاظ بها طويلاً
+HOURLY_RETENTION = timedelta(days=3)
+
+RollupKey = Tuple[datetime, NewsCategory, int]
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """``value`` as a naive UTC datetime, the form stored in the database; naive values are taken as UTC already."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def hour_bucket(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+def day_bucket(value: datetime) -> datetime:
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+class RollupDeltas:
+    """Increments to add to the hourly and daily rollups, merged per bucket before they are written."""
+
+    def __init__(self, now: Optional[datetime] = None):
+        # بعد انقضاء مدة الاحتفاظ تُحدَّث الصفوف اليومية وحدها
+        self.hourly_since = hour_bucket((now or datetime.utcnow()) - HOURLY_RETENTION)
+        self.hourly: Dict[RollupKey, List[int]] = defaultdict(lambda: [0, 0])
+        self.daily: Dict[RollupKey, List[int]] = defaultdict(lambda: [0, 0])
+
+    def add(self, published_at: Optional[datetime], category: Optional[NewsCategory], source_id: int,
+            articles: int = 0, views: int = 0):
+        # المقالات بلا تاريخ نشر لا تقع في أي نافذة زمنية
+        if published_at is None:
+            return
+        # تواريخ RSS تأتي بمنطقتها الزمنية، والحدود هنا بتوقيت UTC دون منطقة
+        published_at = naive_utc(published_at)
+        category = category or NewsCategory.GENERAL
+        buckets = [(self.daily, day_bucket(published_at))]
+        if published_at >= self.hourly_since:
+            buckets.append((self.hourly, hour_bucket(published_at)))
+        for rollup, bucket in buckets:
+            totals = rollup[(bucket, category, source_id)]
+            totals[0] += articles
+            totals[1] += views
+
+    def __bool__(self) -> bool:
+        return bool(self.daily)
+
+def _dialect_name(connection) -> str:
+    bind = connection.get_bind() if hasattr(connection, 'get_bind') else connection
+    return bind.dialect.name
+
+def _upsert(connection, model, deltas: Dict[RollupKey, List[int]]):
+    if not deltas:
+        return
+    table = model.__table__
+    rows = [
+        {'bucket': bucket, 'category': category, 'source_id': source_id, 'articles': articles, 'views': views}
+        for (bucket, category, source_id), (articles, views) in deltas.items()
+    ]
+    dialect = _dialect_name(connection)
+
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        statement = insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=['bucket', 'category', 'source_id'],
+            set_={
+                'articles': table.c.articles + statement.excluded.articles,
+                'views': table.c.views + statement.excluded.views
+            }
+        )
+        connection.execute(statement, rows)
+        return
+
+    update = table.update().where(
+        table.c.bucket == bindparam('b_bucket'),
+        table.c.category == bindparam('b_category'),
+        table.c.source_id == bindparam('b_source_id')
+    ).values(articles=table.c.articles + bindparam('articles'), views=table.c.views + bindparam('views'))
+    for row in rows:
+        params = {'b_bucket': row['bucket'], 'b_category': row['category'], 'b_source_id': row['source_id'],
+                  'articles': row['articles'], 'views': row['views']}
+        if connection.execute(update, params).rowcount == 0:
+            connection.execute(table.insert(), row)
+
+def apply_deltas(connection, deltas: RollupDeltas):
+    """Add ``deltas`` to both rollup tables; ``connection`` may be a session or a Core connection."""
+    if not deltas:
+        return
+    _upsert(connection, HourlyRollup, deltas.hourly)
+    _upsert(connection, DailyRollup, deltas.daily)
+
+def record_articles(connection, articles: Iterable[NewsArticle]):
+    """Count newly inserted articles, and the views they arrived with, into the rollups."""
+    deltas = RollupDeltas()
+    for article in articles:
+        deltas.add(article.published_at, article.category, article.source_id, articles=1, views=article.views or 0)
+    apply_deltas(connection, deltas)
+
+def record_views(connection, counts: Dict[int, int]):
+    """Add flushed view counts to the buckets their articles were published in."""
+    if not counts:
+        return
+    table = NewsArticle.__table__
+    rows = connection.execute(
+        select(table.c.id, table.c.published_at, table.c.category, table.c.source_id).where(
+            table.c.id.in_(list(counts))
+        )
+    )
+    deltas = RollupDeltas()
+    for article_id, published_at, category, source_id in rows:
+        deltas.add(published_at, category, source_id, views=counts[article_id])
+    apply_deltas(connection, deltas)
+
+def prune_hourly(connection, now: Optional[datetime] = None) -> int:
+    table = HourlyRollup.__table__
+    cutoff = hour_bucket((now or datetime.utcnow()) - HOURLY_RETENTION)
+    return connection.execute(table.delete().where(table.c.bucket < cutoff)).rowcount
+
+def rebuild(connection, batch_size: int = 5000, now: Optional[datetime] = None) -> int:
+    """Recompute both rollups from ``news_articles``; used to backfill and to repair drift."""
+    connection.execute(HourlyRollup.__table__.delete())
+    connection.execute(DailyRollup.__table__.delete())
+
+    table = NewsArticle.__table__
+    result = connection.execute(
+        select(table.c.published_at, table.c.category, table.c.source_id, table.c.views).where(
+            table.c.published_at.isnot(None)
+        ).execution_options(yield_per=batch_size)
+    )
+    deltas = RollupDeltas(now)
+    articles = 0
+    for published_at, category, source_id, views in result:
+        deltas.add(published_at, category, source_id, articles=1, views=views or 0)
+        articles += 1
+    apply_deltas(connection, deltas)
+    logger.info(f"Rebuilt analytics rollups from {articles} articles")
+    return articles
@@ -0,0 +1,259 @@
+import html
+import logging
+import threading
+import weakref
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from .arabic_text import STOPWORD_STEMS, TOKEN_RE, AnalyzedText, light_stem, normalize_letters, strip_diacritics
+
+logger = logging.getLogger(__name__)
+
+def search_document(title: str, content: str) -> Tuple[str, str]:
+    """Indexed form of an article: normalized, lightly stemmed title and body.
+
+    Both databases index the same stems, so السوريون، السورية and سوريا all
+    match a query for any of them, whatever the database's own tokenizer does.
+    """
+    return AnalyzedText(title).stemmed_text, AnalyzedText(content).stemmed_text
+
+def parse_query(query: str) -> List[str]:
+    """Distinct query stems in order; stopwords are dropped unless the query has nothing else."""
+    stems = list(dict.fromkeys(AnalyzedText(query).stems))
+    terms = [stem for stem in stems if stem not in STOPWORD_STEMS]
+    return terms or stems
+
+def highlight(value: str, terms: Iterable[str], max_length: Optional[int] = None, context: int = 60) -> str:
+    """HTML-escape ``value`` and wrap words whose stem is a query term in ``<mark>``.
+
+    With ``max_length`` only a window starting a little before the first hit is
+    returned, which is what result snippets need.
+    """
+    value = strip_diacritics(value or '')
+    wanted = set(terms)
+    hits = [
+        (match.start(), match.end()) for match in TOKEN_RE.finditer(value)
+        if light_stem(normalize_letters(match.group().lower())) in wanted
+    ]
+
+    start, end = 0, len(value)
+    if max_length is not None and len(value) > max_length:
+        if hits and hits[0][0] > context:
+            start = value.rfind(' ', 0, hits[0][0] - context) + 1
+        end = min(len(value), start + max_length)
+
+    pieces = ['…' if start > 0 else '']
+    position = start
+    for hit_start, hit_end in hits:
+        if hit_start < start or hit_end > end:
+            continue
+        pieces.append(html.escape(value[position:hit_start]))
+        pieces.append(f'<mark>{html.escape(value[hit_start:hit_end])}</mark>')
+        position = hit_end
+    pieces.append(html.escape(value[position:end]))
+    if end < len(value):
+        pieces.append('…')
+    return ''.join(pieces)
+
+class ArticleSearchIndex(ABC):
+    """Base class for the full-text index kept beside ``news_articles``.
+
+    The index lives in its own table, created on first use per engine, and is
+    updated in the same transaction that inserts the articles. ``backfill``
+    fills in any stored article that is missing from it; the migrations run
+    it once for rows saved before the index existed, and the automation runs
+    ``sync`` in the background to catch up on rows whose indexing failed.
+    Searches never index anything themselves.
+    """
+
+    backend = None
+
+    def __init__(self):
+        self._ready = weakref.WeakSet()
+        self._synced = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _create_schema(self, session):
+        ...
+
+    @abstractmethod
+    def _upsert(self, session, rows: List[Dict]):
+        ...
+
+    @abstractmethod
+    def _missing_ids(self, session) -> List[int]:
+        ...
+
+    @abstractmethod
+    def search(self, session, terms: List[str], limit: int = 10, offset: int = 0,
+               category: Optional[str] = None, status: Optional[str] = None) -> Tuple[List[Tuple[int, float]], int]:
+        """Return ``([(article_id, score), ...], total)`` for articles containing every term, best first."""
+
+    def ensure_schema(self, session):
+        engine = session.get_bind()
+        if engine in self._ready:
+            return
+        with self._lock:
+            if engine not in self._ready:
+                self._create_schema(session)
+                self._ready.add(engine)
+
+    def index_articles(self, session, articles: Iterable) -> int:
+        rows = []
+        for article in articles:
+            title, body = search_document(article.title, article.content)
+            rows.append({'id': article.id, 'title': title, 'body': body})
+        if not rows:
+            return 0
+        self.ensure_schema(session)
+        self._upsert(session, rows)
+        return len(rows)
+
+    def sync(self, session, batch_size: int = 1000) -> int:
+        """``backfill`` once per engine and process."""
+        engine = session.get_bind()
+        if engine in self._synced:
+            return 0
+        indexed = self.backfill(session, batch_size)
+        self._synced.add(engine)
+        return indexed
+
+    def backfill(self, session, batch_size: int = 1000) -> int:
+        """Index every article the index does not know yet, ``batch_size`` rows at a time, and commit."""
+        from ..models.news import NewsArticle
+
+        self.ensure_schema(session)
+        missing = self._missing_ids(session)
+        for i in range(0, len(missing), batch_size):
+            chunk = missing[i:i + batch_size]
+            articles = session.query(NewsArticle.id, NewsArticle.title, NewsArticle.content).filter(
+                NewsArticle.id.in_(chunk)
+            ).all()
+            self.index_articles(session, articles)
+        session.commit()
+        if missing:
+            logger.info(f"Search index ({self.backend}) caught up on {len(missing)} articles")
+        return len(missing)
+
+    @staticmethod
+    def _filters(category: Optional[str], status: Optional[str]) -> Tuple[str, Dict]:
+        clauses, params = [], {}
+        if category:
+            clauses.append('a.category = :category')
+            params['category'] = category
+        if status:
+            clauses.append('a.status = :status')
+            params['status'] = status
+        return ''.join(f' AND {clause}' for clause in clauses), params
+
+class SQLiteSearchIndex(ArticleSearchIndex):
+    """FTS5 virtual table whose rowid is the article id; results are ranked with BM25, title weighted higher."""
+
+    backend = 'sqlite_fts5'
+
+    def __init__(self, title_weight: float = 5.0, body_weight: float = 1.0):
+        super().__init__()
+        self.title_weight = title_weight
+        self.body_weight = body_weight
+
+    def _create_schema(self, session):
+        session.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS news_articles_fts "
+            "USING fts5(title, body, tokenize='unicode61')"
+        ))
+
+    def _upsert(self, session, rows: List[Dict]):
+        session.execute(text('DELETE FROM news_articles_fts WHERE rowid = :id'), [{'id': row['id']} for row in rows])
+        session.execute(text('INSERT INTO news_articles_fts (rowid, title, body) VALUES (:id, :title, :body)'), rows)
+
+    def _missing_ids(self, session) -> List[int]:
+        return [row[0] for row in session.execute(text(
+            'SELECT a.id FROM news_articles a '
+            'WHERE NOT EXISTS (SELECT 1 FROM news_articles_fts f WHERE f.rowid = a.id)'
+        ))]
+
+    def search(self, session, terms: List[str], limit: int = 10, offset: int = 0,
+               category: Optional[str] = None, status: Optional[str] = None) -> Tuple[List[Tuple[int, float]], int]:
+        self.ensure_schema(session)
+        # كل جذر بين علامتي تنصيص حتى لا تُفسَّر الكلمات كعوامل بحث، والمسافة بينها تعني AND
+        match = ' '.join(f'"{term}"' for term in terms)
+        where, params = self._filters(category, status)
+        params.update({'match': match, 'limit': limit, 'offset': offset})
+        source = (
+            'FROM news_articles_fts f JOIN news_articles a ON a.id = f.rowid '
+            f'WHERE news_articles_fts MATCH :match{where}'
+        )
+        rows = session.execute(text(
+            f'SELECT f.rowid, bm25(news_articles_fts, {self.title_weight}, {self.body_weight}) AS rank '
+            f'{source} ORDER BY rank, f.rowid DESC LIMIT :limit OFFSET :offset'
+        ), params).fetchall()
+        total = session.execute(text(f'SELECT COUNT(*) {source}'), params).scalar()
+        return [(row[0], -float(row[1])) for row in rows], total
+
+class PostgresSearchIndex(ArticleSearchIndex):
+    """``tsvector`` side table with a GIN index; the title is weighted A and the body B for ``ts_rank_cd``."""
+
+    backend = 'postgres_tsvector'
+
+    def _create_schema(self, session):
+        session.execute(text(
+            'CREATE TABLE IF NOT EXISTS news_articles_search ('
+            'article_id INTEGER PRIMARY KEY REFERENCES news_articles (id) ON DELETE CASCADE, '
+            'document TSVECTOR NOT NULL)'
+        ))
+        session.execute(text(
+            'CREATE INDEX IF NOT EXISTS ix_news_articles_search_document '
+            'ON news_articles_search USING GIN (document)'
+        ))
+
+    def _upsert(self, session, rows: List[Dict]):
+        # الإعداد simple لأن النص مُطبَّع ومجذَّع مسبقاً
+        session.execute(text(
+            'INSERT INTO news_articles_search (article_id, document) VALUES (:id, '
+            "setweight(to_tsvector('simple', :title), 'A') || setweight(to_tsvector('simple', :body), 'B')) "
+            'ON CONFLICT (article_id) DO UPDATE SET document = EXCLUDED.document'
+        ), rows)
+
+    def _missing_ids(self, session) -> List[int]:
+        return [row[0] for row in session.execute(text(
+            'SELECT a.id FROM news_articles a '
+            'WHERE NOT EXISTS (SELECT 1 FROM news_articles_search s WHERE s.article_id = a.id)'
+        ))]
+
+    def search(self, session, terms: List[str], limit: int = 10, offset: int = 0,
+               category: Optional[str] = None, status: Optional[str] = None) -> Tuple[List[Tuple[int, float]], int]:
+        self.ensure_schema(session)
+        where, params = self._filters(category, status)
+        params.update({'query': ' & '.join(terms), 'limit': limit, 'offset': offset})
+        source = (
+            "FROM news_articles_search s JOIN news_articles a ON a.id = s.article_id, "
+            "to_tsquery('simple', :query) q "
+            f'WHERE s.document @@ q{where}'
+        )
+        rows = session.execute(text(
+            f'SELECT s.article_id, ts_rank_cd(s.document, q) AS rank {source} '
+            'ORDER BY rank DESC, s.article_id DESC LIMIT :limit OFFSET :offset'
+        ), params).fetchall()
+        total = session.execute(text(f'SELECT COUNT(*) {source}'), params).scalar()
+        return [(row[0], float(row[1])) for row in rows], total
+
+_indexes: Dict[str, ArticleSearchIndex] = {}
+_indexes_lock = threading.Lock()
+
+def get_search_index(engine) -> Optional[ArticleSearchIndex]:
+    """Search index for the engine's dialect, or None when the database has no supported full-text engine."""
+    dialect = engine.dialect.name
+    if dialect not in _indexes:
+        with _indexes_lock:
+            if dialect not in _indexes:
+                if dialect == 'sqlite':
+                    _indexes[dialect] = SQLiteSearchIndex()
+                elif dialect == 'postgresql':
+                    _indexes[dialect] = PostgresSearchIndex()
+                else:
+                    logger.warning(f"Full-text search is not supported on {dialect}")
+                    _indexes[dialect] = None
+    return _indexes[dialect]
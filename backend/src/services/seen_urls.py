@@ -0,0 +1,68 @@
+import hashlib
+import logging
+import threading
+from typing import Iterable
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+logger = logging.getLogger(__name__)
+
+# مفاتيح تتبع معروفة فقط؛ مفاتيح عامة مثل source أو ref قد تميّز مقالاً عن آخر
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'ocid', 'cmpid', '_ga'}
+
+def normalize_url(url: str) -> str:
+    """Canonical form used for seen checks: no fragment, no tracking params, stable host case."""
+    parts = urlsplit(url.strip())
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    ]
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(sorted(query)), ''))
+
+class SeenUrlIndex:
+    """In-memory index of article URLs that are already stored.
+
+    URLs are normalized and kept as 64-bit digests rather than strings, which
+    keeps a few million entries in tens of megabytes. The index is warmed from
+    ``news_articles.original_url`` and extended as new articles are saved, so
+    the scraper can drop repeat RSS entries before any article request is made.
+    """
+
+    def __init__(self):
+        self._digests = set()
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    @staticmethod
+    def _digest(url: str) -> int:
+        return int.from_bytes(hashlib.blake2b(normalize_url(url).encode('utf-8'), digest_size=8).digest(), 'big')
+
+    def load(self, urls: Iterable[str]) -> int:
+        digests = {self._digest(url) for url in urls if url}
+        with self._lock:
+            self._digests.update(digests)
+            self.loaded = True
+        logger.info(f"Seen-URL index loaded {len(digests)} URLs")
+        return len(digests)
+
+    def add(self, url: str):
+        if not url:
+            return
+        digest = self._digest(url)
+        with self._lock:
+            self._digests.add(digest)
+
+    def __contains__(self, url: str) -> bool:
+        if not url:
+            return False
+        digest = self._digest(url)
+        with self._lock:
+            return digest in self._digests
+
+    def __len__(self) -> int:
+        return len(self._digests)
+
+    def clear(self):
+        with self._lock:
+            self._digests.clear()
+            self.loaded = False
@@ -0,0 +1,262 @@
+import atexit
+import logging
+import os
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from typing import Dict
+
+from sqlalchemy import bindparam
+
+try:
+    from redis.exceptions import RedisError
+except ImportError:
+    # بدون حزمة redis لا يُنشأ عدّاد Redis إلا بعميل مُمرَّر، وأخطاء الاتصال عندها من نوع OSError
+    RedisError = OSError
+
+logger = logging.getLogger(__name__)
+
+def apply_view_counts(counts: Dict[int, int]):
+    """Add buffered views to ``news_articles`` and the analytics rollups in one transaction."""
+    from ..models.database import db
+    from ..models.news import NewsArticle
+    from .rollups import record_views
+
+    table = NewsArticle.__table__
+    statement = table.update().where(table.c.id == bindparam('article_id')).values(
+        views=table.c.views + bindparam('amount')
+    )
+    try:
+        db.session.execute(statement, [
+            {'article_id': article_id, 'amount': amount} for article_id, amount in counts.items()
+        ])
+        try:
+            with db.session.begin_nested():
+                record_views(db.session, counts)
+        except Exception as e:
+            logger.error(f"Error adding views to analytics rollups: {str(e)}")
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+class ViewCounter(ABC):
+    """Write-behind buffer for article views.
+
+    Readers only add to the buffer, which never touches the database, and a
+    background thread writes the aggregated increments every
+    ``flush_interval`` seconds in a single transaction. A crash loses at most
+    the views buffered since the last flush; a failed flush puts its counts
+    back so they go out with the next one.
+    """
+
+    backend = None
+
+    def __init__(self, flush_interval: float = 5.0):
+        self.flush_interval = flush_interval
+        self.flushes = 0
+        self.flushed_views = 0
+        self.failed_flushes = 0
+        self._app = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+
+    @abstractmethod
+    def increment(self, article_id: int, amount: int = 1) -> int:
+        """Buffer ``amount`` views and return the views of ``article_id`` now waiting for a flush."""
+
+    @abstractmethod
+    def pending(self, article_id: int) -> int:
+        """Views recorded for ``article_id`` that are not in the database yet."""
+
+    @abstractmethod
+    def drain(self) -> Dict[int, int]:
+        """Take every buffered count, leaving the buffer empty."""
+
+    def restore(self, counts: Dict[int, int]):
+        for article_id, amount in counts.items():
+            self.increment(article_id, amount)
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            counts = self.drain()
+            if not counts:
+                return 0
+            try:
+                if self._app is not None:
+                    with self._app.app_context():
+                        apply_view_counts(counts)
+                else:
+                    apply_view_counts(counts)
+            except Exception as e:
+                logger.error(f"Error flushing {len(counts)} view counts: {str(e)}")
+                self.failed_flushes += 1
+                self.restore(counts)
+                return 0
+            self.flushes += 1
+            self.flushed_views += sum(counts.values())
+            return len(counts)
+
+    def ensure_flusher(self, app):
+        """Start the background flush thread for ``app`` once; later calls are free."""
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._app = app
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='view-counter-flush')
+            self._thread.daemon = True
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 1)
+            self._thread = None
+        self.flush()
+
+    def get_stats(self) -> Dict:
+        return {
+            'backend': self.backend,
+            'flush_interval_seconds': self.flush_interval,
+            'flushes': self.flushes,
+            'flushed_views': self.flushed_views,
+            'failed_flushes': self.failed_flushes
+        }
+
+class MemoryViewCounter(ViewCounter):
+    backend = 'memory'
+
+    def __init__(self, flush_interval: float = 5.0):
+        super().__init__(flush_interval)
+        self._counts: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, article_id: int, amount: int = 1) -> int:
+        with self._lock:
+            count = self._counts[article_id] = self._counts.get(article_id, 0) + amount
+        return count
+
+    def pending(self, article_id: int) -> int:
+        return self._counts.get(article_id, 0)
+
+    def drain(self) -> Dict[int, int]:
+        with self._lock:
+            counts, self._counts = self._counts, {}
+        return counts
+
+class RedisViewCounter(ViewCounter):
+    """Buffer shared by every worker process through one Redis hash.
+
+    A flush renames the hash to a private key before reading it, so views
+    recorded during the flush land in a fresh hash. A worker that dies
+    mid-flush leaves its renamed key behind, and the next flush picks it up.
+
+    While Redis is unreachable views go to an in-process buffer that the
+    next flush writes along with the shared hash, so an outage costs at
+    most view counts, never an article read.
+    """
+
+    backend = 'redis'
+
+    def __init__(self, url: str = 'redis://localhost:6379/0', flush_interval: float = 5.0,
+                 key: str = 'news:views:pending', client=None):
+        super().__init__(flush_interval)
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.key = key
+        self.local = MemoryViewCounter(flush_interval)
+        self.redis_errors = 0
+        self._redis_down = False
+
+    def _redis_failed(self, error: Exception):
+        self.redis_errors += 1
+        # سطر واحد عند الانقطاع لا سطر لكل قراءة
+        if not self._redis_down:
+            logger.error(f"Redis view counter unavailable, buffering views in this process: {str(error)}")
+        self._redis_down = True
+
+    def increment(self, article_id: int, amount: int = 1) -> int:
+        try:
+            count = int(self.client.hincrby(self.key, article_id, amount))
+        except RedisError as e:
+            self._redis_failed(e)
+            return self.local.increment(article_id, amount)
+        self._redis_down = False
+        return count + self.local.pending(article_id)
+
+    def pending(self, article_id: int) -> int:
+        try:
+            shared = int(self.client.hget(self.key, article_id) or 0)
+        except RedisError as e:
+            self._redis_failed(e)
+            shared = 0
+        return shared + self.local.pending(article_id)
+
+    def get_stats(self) -> Dict:
+        stats = super().get_stats()
+        stats['redis_errors'] = self.redis_errors
+        return stats
+
+    def drain(self) -> Dict[int, int]:
+        counts = self.local.drain()
+        try:
+            shared = self._drain_shared()
+        except RedisError as e:
+            # المفاتيح المُعاد تسميتها تبقى في Redis ويلتقطها التفريغ التالي
+            self._redis_failed(e)
+            return counts
+        for article_id, amount in shared.items():
+            counts[article_id] = counts.get(article_id, 0) + amount
+        return counts
+
+    def _drain_shared(self) -> Dict[int, int]:
+        try:
+            self.client.rename(self.key, f"{self.key}:flushing:{uuid.uuid4().hex}")
+        except Exception:
+            # لا يوجد مفتاح: لم تُسجَّل مشاهدات منذ آخر تفريغ
+            pass
+
+        counts: Dict[int, int] = {}
+        for key in list(self.client.scan_iter(match=f"{self.key}:flushing:*")):
+            # القراءة والحذف في معاملة واحدة حتى لا يحتسب عاملان المفتاح نفسه مرتين
+            pipeline = self.client.pipeline(transaction=True)
+            pipeline.hgetall(key)
+            pipeline.delete(key)
+            values, _ = pipeline.execute()
+            for article_id, amount in values.items():
+                counts[int(article_id)] = counts.get(int(article_id), 0) + int(amount)
+        return counts
+
+def create_view_counter() -> ViewCounter:
+    backend = os.getenv('VIEW_COUNTER_BACKEND', 'memory').lower()
+    flush_interval = float(os.getenv('VIEW_FLUSH_INTERVAL', '5'))
+
+    if backend == 'redis':
+        try:
+            return RedisViewCounter(os.getenv('REDIS_URL', 'redis://localhost:6379/0'), flush_interval)
+        except Exception as e:
+            logger.error(f"Redis view counter unavailable, using in-process buffer: {str(e)}")
+    return MemoryViewCounter(flush_interval)
+
+_view_counter = None
+_view_counter_lock = threading.Lock()
+
+def get_view_counter() -> ViewCounter:
+    global _view_counter
+    if _view_counter is None:
+        with _view_counter_lock:
+            if _view_counter is None:
+                _view_counter = create_view_counter()
+    return _view_counter
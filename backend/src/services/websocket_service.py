@@ -1,30 +1,96 @@
+import copy
+import os
 import threading
 import time
+import uuid
 from datetime import datetime
-from flask_socketio import emit
+from typing import Dict, List, Optional
+from flask import request
+from flask_socketio import emit, join_room, leave_room, rooms
 import logging
+from .change_feed import ChangeFeed, CoalescingBuffer, diff_state
+from .realtime_broker import CHANGES_CHANNEL, Broker, get_broker, publish_change
+from ..models.database import db
+from ..models.news import NewsCategory, NewsSource
 
 logger = logging.getLogger(__name__)
 
+ALL_TOPIC = 'all'
+
+def valid_topic(topic: str) -> bool:
+    """``all``, ``breaking``, ``category:<category>`` or ``source:<source id>``, checked for form only."""
+    if topic in (ALL_TOPIC, 'breaking'):
+        return True
+    kind, _, value = str(topic).partition(':')
+    if kind == 'category':
+        return value in {category.value for category in NewsCategory}
+    if kind == 'source':
+        return value.isdigit()
+    return False
+
+def article_topics(article: Dict) -> List[str]:
+    topics = [f"category:{article['category']}", f"source:{article['source_id']}"]
+    if article.get('breaking'):
+        topics.append('breaking')
+    return topics
+
 class WebSocketService:
-    def __init__(self, socketio, automation_service):
+    """Pushes changes to dashboards as numbered deltas, per topic, instead of periodic full broadcasts.
+
+    Clients are in Socket.IO rooms named after topics: ``all`` (the default:
+    stats and every new article), ``breaking``, ``category:<category>`` and
+    ``source:<id>``. Each change is split by topic once and emitted once per
+    room, after a short coalescing window that merges bursts into a single
+    delta. Every topic numbers its deltas separately, so a client sees a
+    contiguous sequence for each topic it follows. A client that sees a gap,
+    or reconnects, sends ``resync`` with the topic and the last number it
+    applied and receives the missed deltas or a new snapshot.
+
+    Changes arrive through the real-time broker, so with several web workers
+    each one runs this service and serves its own clients. Sequence numbers
+    belong to one worker; snapshots carry that worker's ``epoch``, and a
+    client that comes back with another worker's epoch gets a snapshot.
+    Only the process that has the automation service publishes stats.
+
+    Every topic keeps a feed with its recent history for as long as the
+    process runs, so ``source:<id>`` is only accepted for sources that exist;
+    otherwise a client could create feeds without limit by walking ids.
+    """
+
+    def __init__(self, socketio, automation_service, broker: Optional[Broker] = None,
+                 poll_interval: float = 5, coalesce_window: Optional[float] = None,
+                 state_refresh_interval: float = 60):
         self.socketio = socketio
         self.automation_service = automation_service
+        self.broker = broker or get_broker()
+        self.epoch = uuid.uuid4().hex[:12]
+        self.poll_interval = poll_interval
+        self.state_refresh_interval = state_refresh_interval
+        if coalesce_window is None:
+            coalesce_window = float(os.getenv('WEBSOCKET_COALESCE_SECONDS', '1'))
+        self.buffer = CoalescingBuffer(self._publish_to_topic, window=coalesce_window)
+        self.topic_feeds: Dict[str, ChangeFeed] = {}
+        self.known_sources = set()
         self.is_running = False
         self.update_thread = None
+        self._stop = threading.Event()
+        self._last_stats = {}
+        self._published_stats = None
+        self._published_at = 0.0
+        self._stats_lock = threading.Lock()
+        self._topics_lock = threading.Lock()
         
         self.setup_event_handlers()
         self.start_real_time_updates()
 
     def setup_event_handlers(self):
         @self.socketio.on('connect')
-        def handle_connect():
+        def handle_connect(auth=None):
             logger.info('Client connected to WebSocket')
             emit('connected', {'message': 'Connected to real-time updates'})
-            
-            if self.automation_service:
-                status = self.automation_service.get_automation_status()
-                emit('stats_update', status.get('stats', {}))
+            # عند إعادة الاتصال يرسل العميل مواضيعه وآخر رقم طبّقه لكل منها، فيستلم ما فاته فقط
+            auth = auth if isinstance(auth, dict) else {}
+            self.join_topics(auth.get('topics') or [ALL_TOPIC], auth.get('since'), auth.get('epoch'))
 
         @self.socketio.on('disconnect')
         def handle_disconnect():
@@ -32,15 +98,98 @@ class WebSocketService:
 
         @self.socketio.on('request_stats')
         def handle_stats_request():
-            if self.automation_service:
-                status = self.automation_service.get_automation_status()
-                emit('stats_update', status.get('stats', {}))
+            emit('snapshot', self.snapshot(ALL_TOPIC))
+
+        @self.socketio.on('subscribe')
+        def handle_subscribe(data=None):
+            data = data if isinstance(data, dict) else {}
+            self.join_topics(data.get('topics') or [], data.get('since'), data.get('epoch'))
+
+        @self.socketio.on('resync')
+        def handle_resync(data=None):
+            data = data if isinstance(data, dict) else {}
+            topic = data.get('topic', ALL_TOPIC)
+            if self.allowed_topic(topic):
+                self.catch_up(topic, data.get('since'), data.get('epoch'))
+
+    def join_topics(self, requested: List[str], since: Optional[Dict] = None, epoch: Optional[str] = None):
+        """Make the current client's rooms exactly ``requested`` and bring each topic up to date.
+
+        A subscription replaces the previous one, so a sports widget sends
+        ``['category:sports']`` alone and stops receiving everything else.
+        """
+        requested = list(dict.fromkeys(requested))
+        topics = [topic for topic in requested if self.allowed_topic(topic)]
+        current = set(rooms()) - {request.sid}
+        for topic in current - set(topics):
+            leave_room(topic)
+        for topic in topics:
+            if topic not in current:
+                join_room(topic)
+        emit('subscribed', {'topics': topics, 'rejected': [topic for topic in requested if topic not in topics]})
+        since = since if isinstance(since, dict) else {}
+        for topic in topics:
+            self.catch_up(topic, since.get(topic), epoch)
+
+    def allowed_topic(self, topic: str) -> bool:
+        if not valid_topic(topic):
+            return False
+        kind, _, value = str(topic).partition(':')
+        if kind != 'source':
+            return True
+        source_id = int(value)
+        if source_id in self.known_sources:
+            return True
+        try:
+            exists = db.session.get(NewsSource, source_id) is not None
+        except Exception as e:
+            logger.error(f'Error looking up source {source_id}: {str(e)}')
+            return False
+        if exists:
+            self.known_sources.add(source_id)
+        return exists
+
+    def catch_up(self, topic: str, since=None, epoch: Optional[str] = None):
+        """Send the deltas of ``topic`` after ``since``, or a snapshot when they are gone or ``since`` is unknown."""
+        try:
+            # أرقام عامل آخر لا تعني شيئاً هنا
+            known = since is not None and epoch == self.epoch
+            changes = self.topic_feed(topic).since(int(since)) if known else None
+        except (TypeError, ValueError):
+            changes = None
+        if changes is None:
+            emit('snapshot', self.snapshot(topic))
+            return
+        for change in changes:
+            emit('delta', change)
+
+    def topic_feed(self, topic: str) -> ChangeFeed:
+        feed = self.topic_feeds.get(topic)
+        if feed is None:
+            with self._topics_lock:
+                feed = self.topic_feeds.get(topic)
+                if feed is None:
+                    feed = ChangeFeed(history=200, topic=topic)
+                    feed.subscribe(lambda change: self.socketio.emit('delta', change, to=topic))
+                    self.topic_feeds[topic] = feed
+        return feed
+
+    def snapshot(self, topic: str = ALL_TOPIC) -> Dict:
+        """Sequence number of ``topic`` and, for ``all``, the full stats; later deltas apply on top of it."""
+        snapshot = {'topic': topic, 'seq': self.topic_feed(topic).seq, 'epoch': self.epoch}
+        if topic == ALL_TOPIC:
+            self.publish_stats_changes()
+            with self._stats_lock:
+                snapshot['stats'] = copy.deepcopy(self._last_stats)
+        return snapshot
 
     def start_real_time_updates(self):
         if self.is_running:
             return
         
         self.is_running = True
+        self._stop.clear()
+        self.broker.subscribe(CHANGES_CHANNEL, self._route)
         self.update_thread = threading.Thread(target=self._update_loop)
         self.update_thread.daemon = True
         self.update_thread.start()
@@ -48,49 +197,95 @@ class WebSocketService:
 
     def stop_real_time_updates(self):
         self.is_running = False
+        self._stop.set()
         if self.update_thread:
             self.update_thread.join(timeout=5)
+        self.broker.unsubscribe(CHANGES_CHANNEL, self._route)
+        self.buffer.flush()
         logger.info('Stopped real-time WebSocket updates')
 
     def _update_loop(self):
         while self.is_running:
             try:
-                self._send_stats_update()
-                time.sleep(30)
+                self.publish_stats_changes()
+                self._stop.wait(self.poll_interval)
             except Exception as e:
                 logger.error(f'Error in WebSocket update loop: {str(e)}')
                 time.sleep(60)
 
-    def _send_stats_update(self):
+    def publish_stats_changes(self) -> bool:
+        """Publish the automation stats when they changed, and every ``state_refresh_interval`` regardless.
+
+        The broker carries the full stats, which are small, so a worker that
+        started late converges on the next refresh; each worker diffs them
+        against what its clients have and sends only the changed fields.
+        """
         if not self.automation_service:
-            return
+            return False
         
         try:
-            status = self.automation_service.get_automation_status()
-            self.socketio.emit('stats_update', status.get('stats', {}))
+            stats = copy.deepcopy(self.automation_service.get_automation_status().get('stats', {}))
+            now = time.time()
+            with self._stats_lock:
+                if stats == self._published_stats and now - self._published_at < self.state_refresh_interval:
+                    return False
+                self._published_stats = stats
+                self._published_at = now
+            publish_change('stats', stats, self.broker)
+            return True
         except Exception as e:
-            logger.error(f'Error sending stats update: {str(e)}')
+            logger.error(f'Error publishing stats changes: {str(e)}')
+            return False
+
+    def _route(self, change: Dict):
+        """Split a change from the broker into per-topic payloads and queue them for their rooms."""
+        if change['type'] == 'stats':
+            with self._stats_lock:
+                changes = diff_state(self._last_stats, change['data'])
+                self._last_stats = change['data']
+            if changes:
+                self.buffer.add(ALL_TOPIC, 'stats', changes)
+            return
+        if change['type'] in ('alert', 'activity_update'):
+            self.socketio.emit(change['type'], change['data'])
+            return
+        if change['type'] != 'articles':
+            self.buffer.add(ALL_TOPIC, change['type'], change['data'])
+            return
+        
+        data = change['data']
+        self.buffer.add(ALL_TOPIC, 'articles', {'ids': list(data.get('ids', []))})
+        by_topic: Dict[str, List[int]] = {}
+        for article in data.get('articles', []):
+            self.known_sources.add(article['source_id'])
+            for topic in article_topics(article):
+                by_topic.setdefault(topic, []).append(article['id'])
+        for topic, ids in by_topic.items():
+            self.buffer.add(topic, 'articles', {'ids': ids})
+
+    def _publish_to_topic(self, topic: str, kind: str, data: Dict):
+        self.topic_feed(topic).publish(kind, data)
 
     def send_activity_update(self, activity_data):
         try:
-            self.socketio.emit('activity_update', {
+            publish_change('activity_update', {
                 'id': int(time.time()),
                 'type': activity_data.get('type', 'info'),
                 'title': activity_data.get('title', ''),
                 'time': datetime.utcnow().isoformat(),
                 'status': activity_data.get('status', 'info')
-            })
+            }, self.broker)
         except Exception as e:
             logger.error(f'Error sending activity update: {str(e)}')
 
     def send_alert(self, alert_data):
         try:
-            self.socketio.emit('alert', {
+            publish_change('alert', {
                 'id': int(time.time()),
                 'type': alert_data.get('type', 'info'),
                 'message': alert_data.get('message', ''),
                 'timestamp': datetime.utcnow().isoformat(),
                 'severity': alert_data.get('severity', 'info')
-            })
+            }, self.broker)
         except Exception as e:
             logger.error(f'Error sending alert: {str(e)}')
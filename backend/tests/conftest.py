@@ -3,6 +3,7 @@ import os
 import sys
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 @pytest.fixture
 def app():
@@ -28,3 +29,30 @@ def client(app):
 def runner(app):
     """A test runner for the app's Click commands."""
     return app.test_cli_runner()
+
+@pytest.fixture
+def db_app():
+    """Minimal app with the news blueprints bound to an in-memory SQLite database."""
+    from flask import Flask
+    from src.models.database import db
+    from src.routes.news import news_bp
+    from src.routes.analytics import analytics_bp
+
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    db.init_app(app)
+    app.register_blueprint(news_bp, url_prefix='/api/news')
+    app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        # المشاهدات المخزَّنة تُكتب قبل حذف قاعدة البيانات، ولا ينتقل العدّاد ولا الردود المخزنة إلى الاختبار التالي
+        from src.services import response_cache, view_counter
+        response_cache.invalidate_responses()
+        if view_counter._view_counter is not None:
+            view_counter._view_counter.stop()
+            view_counter._view_counter = None
+        db.session.remove()
+        db.drop_all()
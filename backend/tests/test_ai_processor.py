@@ -0,0 +1,421 @@
+import pytest
+import sys
+import os
+import time
+import json
+import openai
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.services.ai_processor import MultiAIProcessor
+from src.services.llm_cache import MemoryLLMCache, SQLiteLLMCache, make_cache_key
+from src.services.ai_router import ProviderRouter, CircuitBreaker
+
+@pytest.fixture
+def processor(monkeypatch):
+    monkeypatch.setenv('OPENAI_API_KEY', 'test-key')
+    monkeypatch.setenv('LLM_CACHE_BACKEND', 'memory')
+    monkeypatch.setattr(openai, 'api_key', 'test-key', raising=False)
+    processor = MultiAIProcessor()
+    processor.development_mode = False
+    return processor
+
+def fake_llm(delay_for):
+    def call(prompt, max_tokens=500):
+        for marker, delay in delay_for.items():
+            if marker in prompt:
+                time.sleep(delay)
+        if 'درجة المشاعر' in prompt:
+            return '0.5'
+        if 'صنف المقال' in prompt:
+            return 'economy'
+        return 'نتيجة، وسم ثاني، وسم ثالث'
+    return call
+
+class TestConcurrentArticleProcessing:
+    @pytest.fixture(autouse=True)
+    def per_task_mode(self, processor):
+        processor.analysis_mode = 'per_task'
+
+    def test_latency_is_close_to_slowest_call(self, processor, monkeypatch):
+        monkeypatch.setattr(processor, 'call_openai_api', fake_llm({'': 0.2}))
+
+        start = time.time()
+        results = processor.process_article_complete('عنوان', 'محتوى الخبر')
+        elapsed = time.time() - start
+
+        assert elapsed < 0.2 * 3
+        assert results['category'] == 'economy'
+        assert results['sentiment_score'] == 0.5
+        assert results['incomplete_tasks'] == []
+
+    def test_deadline_returns_partial_results(self, processor, monkeypatch):
+        monkeypatch.setattr(processor, 'call_openai_api', fake_llm({'حلل المشاعر': 2}))
+        processor.article_deadline = 0.3
+
+        start = time.time()
+        results = processor.process_article_complete('عنوان', 'اقتصاد واستثمار')
+
+        assert time.time() - start < 1.5
+        assert results['incomplete_tasks'] == ['sentiment_score']
+        assert results['sentiment_score'] == 0.0
+        assert results['category'] == 'economy'
+
+    def test_sequential_mode_still_available(self, processor, monkeypatch):
+        monkeypatch.setattr(processor, 'call_openai_api', fake_llm({}))
+        processor.concurrent_processing = False
+
+        results = processor.process_article_complete('عنوان', 'محتوى')
+        assert results['category'] == 'economy'
+        assert 'incomplete_tasks' not in results
+
+class TestCombinedAnalysis:
+    def test_single_call_when_reply_is_valid(self, processor, monkeypatch):
+        prompts = []
+        reply = json.dumps({
+            'summary': 'ملخص',
+            'rewritten_title': 'عنوان جديد',
+            'rewritten_content': 'محتوى جديد',
+            'category': 'Economy',
+            'sentiment_score': 1.7,
+            'bias_analysis': {'bias_detected': False, 'analysis': 'محايد', 'confidence': 0.9},
+            'tags': ['اقتصاد', 'استثمار', 'سوريا']
+        }, ensure_ascii=False)
+        monkeypatch.setattr(processor, 'call_openai_api', lambda prompt, max_tokens=500: prompts.append(prompt) or f"```json\n{reply}\n```")
+
+        results = processor.process_article_complete('عنوان', 'محتوى')
+
+        assert len(prompts) == 1
+        assert results['category'] == 'economy'
+        assert results['sentiment_score'] == 1.0
+        assert results['rewritten_title'] == 'عنوان جديد'
+        assert results['bias_analysis']['confidence'] == 0.9
+        assert results['fallback_tasks'] == []
+
+    def test_invalid_fields_fall_back_to_per_task_methods(self, processor, monkeypatch):
+        reply = json.dumps({'summary': 'ملخص', 'category': 'weather', 'sentiment_score': 'high', 'tags': []})
+
+        def call(prompt, max_tokens=500):
+            if 'JSON' in prompt:
+                return reply
+            return fake_llm({})(prompt, max_tokens)
+
+        monkeypatch.setattr(processor, 'call_openai_api', call)
+        results = processor.process_article_complete('عنوان', 'محتوى')
+
+        assert results['summary'] == 'ملخص'
+        assert results['category'] == 'economy'
+        assert results['sentiment_score'] == 0.5
+        assert set(results['fallback_tasks']) == {'rewrite', 'category', 'sentiment_score', 'bias_analysis', 'tags'}
+
+    def test_tags_must_be_a_list_or_a_string(self, processor):
+        for tags in ({'a': 'اقتصاد'}, 42, [{'tag': 'اقتصاد'}]):
+            parsed, failed = processor.parse_combined_analysis(json.dumps({'tags': tags}))
+            assert 'tags' not in parsed and 'tags' in failed
+        parsed, failed = processor.parse_combined_analysis(json.dumps({'tags': 'اقتصاد, سوريا'}))
+        assert parsed['tags'] == ['اقتصاد', 'سوريا']
+
+    def test_unparseable_reply_fails_every_field(self, processor):
+        parsed, failed = processor.parse_combined_analysis('not json')
+        assert parsed == {}
+        assert len(failed) == 6
+
+class _Completion:
+    calls = 0
+
+    @classmethod
+    def create(cls, **kwargs):
+        cls.calls += 1
+        choice = type('Choice', (), {'text': f" reply {cls.calls} "})
+        return type('Response', (), {'choices': [choice]})
+
+class TestLLMResponseCache:
+    def test_repeated_prompt_costs_one_api_call(self, processor, monkeypatch):
+        _Completion.calls = 0
+        monkeypatch.setattr(openai, 'Completion', _Completion)
+
+        assert processor.call_openai_api('نفس النص', max_tokens=50) == 'reply 1'
+        assert processor.call_openai_api('نفس النص', max_tokens=50) == 'reply 1'
+        assert processor.call_openai_api('نفس النص', max_tokens=60) == 'reply 2'
+        assert _Completion.calls == 2
+
+        stats = processor.get_cache_stats()
+        assert (stats['hits'], stats['misses']) == (1, 2)
+
+    def test_memory_lru_and_ttl(self, monkeypatch):
+        cache = MemoryLLMCache(ttl=60, max_entries=2)
+        cache.set('a', '1')
+        cache.set('b', '2')
+        cache.get('a')
+        cache.set('c', '3')
+        assert cache.get('b') is None
+        assert cache.get('a') == '1'
+        assert cache.evictions == 1
+
+        import src.services.llm_cache as llm_cache
+        now = llm_cache.time.time()
+        monkeypatch.setattr(llm_cache.time, 'time', lambda: now + 120)
+        assert cache.get('a') is None
+
+    def test_sqlite_cache_survives_restart(self, tmp_path):
+        path = str(tmp_path / 'llm_cache.db')
+        key = make_cache_key('claude', 'claude-3-sonnet', 'prompt', {'max_tokens': 10})
+        SQLiteLLMCache(path).set(key, 'cached reply', 'claude', 'claude-3-sonnet')
+
+        restarted = SQLiteLLMCache(path, max_entries=1)
+        assert restarted.get_or_call('claude', 'claude-3-sonnet', 'prompt', {'max_tokens': 10}, lambda: 'fresh') == 'cached reply'
+        restarted.get_or_call('claude', 'claude-3-sonnet', 'other prompt', {}, lambda: 'fresh')
+        assert len(restarted) == 1
+        assert restarted.get_stats()['evictions'] == 1
+
+def provider(reply, delay=0.0, calls=None):
+    def call(prompt, max_tokens):
+        if calls is not None:
+            calls.append(reply)
+        time.sleep(delay)
+        return reply
+    return call
+
+class TestProviderRouter:
+    def test_prefers_fastest_healthy_provider(self):
+        router = ProviderRouter(default_hedge_delay=5)
+        router.register('slow', provider('slow', 0.1))
+        router.register('fast', provider('fast', 0.01))
+
+        router.call('p')
+        router.call('p')
+        assert router.available_providers() == ['fast', 'slow']
+        assert router.call('p') == 'fast'
+
+    def test_circuit_breaker_skips_failing_provider(self):
+        calls = []
+        router = ProviderRouter(failure_threshold=2, reset_timeout=60)
+        router.register('broken', provider(None, calls=calls))
+        router.register('backup', provider('ok'))
+
+        for _ in range(4):
+            assert router.call('p') == 'ok'
+        assert len(calls) == 2
+        assert router.get_status()['providers']['broken']['state'] == 'open'
+
+    def test_half_open_probe_closes_breaker(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_slow_request_is_hedged(self):
+        router = ProviderRouter(min_hedge_delay=0.05, default_hedge_delay=0.05)
+        router.register('hung', provider('late', 1.0))
+        router.register('backup', provider('fast', 0.01))
+        router.providers['backup'].ewma_latency = 0.5
+
+        start = time.time()
+        assert router.call('p') == 'fast'
+        assert time.time() - start < 0.5
+        assert router.hedged_requests == 1
+
+    def test_hung_provider_is_bounded_by_timeout(self):
+        router = ProviderRouter(timeout=0.2)
+        router.register('hung', provider('late', 1.0))
+
+        start = time.time()
+        assert router.call('p') is None
+        assert time.time() - start < 0.5
+        assert router.get_status()['providers']['hung']['timeouts'] == 1
+
+    def test_timed_out_request_is_counted_once(self):
+        router = ProviderRouter(timeout=0.1)
+        router.register('hung', provider('late', 0.3))
+
+        assert router.call('p') is None
+        time.sleep(0.4)
+        status = router.get_status()['providers']['hung']
+        assert (status['timeouts'], status['failures'], status['successes']) == (1, 0, 0)
+        assert router.providers['hung'].breaker.consecutive_failures == 1
+
+    def test_queued_requests_are_not_timed_out_or_hedged(self):
+        router = ProviderRouter(timeout=0.3, min_hedge_delay=0.05, default_hedge_delay=0.05, max_workers=1)
+        router.register('first', provider('ok', 0.01))
+        router.register('second', provider('other', 0.01))
+
+        # المجمّع مشغول بطلب آخر أطول من مهلة التحوط
+        router.executor.submit(time.sleep, 0.2)
+        assert router.call('p') == 'ok'
+        assert router.hedged_requests == 0
+        assert router.get_status()['providers']['first']['timeouts'] == 0
+
+        router.executor.submit(time.sleep, 0.5)
+        assert router.call('p') is None
+        time.sleep(0.3)
+        status = router.get_status()['providers']
+        assert status['first']['state'] == 'closed'
+        assert status['first']['failures'] + status['first']['timeouts'] == 0
+
+    def test_article_tasks_fail_over_between_providers(self, processor, monkeypatch):
+        monkeypatch.setattr(processor, 'call_openai_api', lambda prompt, max_tokens=500: None)
+        processor.router.register('claude', lambda prompt, max_tokens: fake_llm({})(prompt))
+        processor.analysis_mode = 'per_task'
+
+        results = processor.process_article_complete('عنوان', 'محتوى')
+        assert results['category'] == 'economy'
+
+def fact_checker(reply, delay=0.0, calls=None):
+    def call(prompt, max_tokens=500):
+        if calls is not None:
+            calls.append(prompt)
+        time.sleep(delay)
+        return reply
+    return call
+
+class TestParallelFactCheck:
+    def _patch_models(self, processor, monkeypatch, **models):
+        for name, func in models.items():
+            monkeypatch.setattr(processor, f'call_{name}_api', func)
+
+    def test_research_queries_run_in_parallel(self, processor, monkeypatch):
+        self._patch_models(processor, monkeypatch,
+                           perplexity=fact_checker('بحث', 0.2),
+                           claude=fact_checker('تحليل', 0.2),
+                           gemini=fact_checker(None, 0.2))
+
+        start = time.time()
+        results = processor.research_with_multiple_models('الاقتصاد السوري')
+
+        assert time.time() - start < 0.2 * 2
+        assert results['models_used'] == ['perplexity', 'claude']
+        assert results['claude']['role'] == 'expert_analysis'
+
+    def test_stops_once_quorum_agrees(self, processor, monkeypatch):
+        slow_calls = []
+        self._patch_models(processor, monkeypatch,
+                           perplexity=fact_checker('مستوى المصداقية: عالي'),
+                           claude=fact_checker('مستوى المصداقية: عالية'),
+                           gemini=fact_checker('المصداقية عالي', 0.05),
+                           cohere=fact_checker('المصداقية منخفض', 1.5, slow_calls),
+                           mistral=fact_checker('المصداقية منخفض', 1.5, slow_calls))
+        processor.fact_check_quorum = 3
+
+        start = time.time()
+        results = processor.enhanced_fact_check_with_multiple_models('عنوان', 'خبر')
+
+        assert time.time() - start < 1.0
+        assert results['verdict'] == 'high'
+        assert results['early_exit'] is True
+        assert results['consensus_score'] == 1.0
+        assert results['verdict_votes'] == {'high': 3}
+        assert len(results['fact_check_results']) == 3
+
+    def test_majority_verdict_without_quorum(self, processor, monkeypatch):
+        self._patch_models(processor, monkeypatch,
+                           perplexity=fact_checker('المصداقية: متوسط'),
+                           claude=fact_checker('المصداقية: متوسطة'),
+                           gemini=fact_checker('المصداقية: منخفض'),
+                           cohere=fact_checker(None),
+                           mistral=fact_checker('API error'))
+
+        results = processor.enhanced_fact_check_with_multiple_models('عنوان', 'خبر')
+
+        assert results['verdict'] == 'medium'
+        assert results['early_exit'] is False
+        assert results['consensus_score'] == 2 / 3
+
+    def test_slow_models_do_not_block_past_timeout(self, processor, monkeypatch):
+        self._patch_models(processor, monkeypatch,
+                           perplexity=fact_checker('المصداقية: عالي'),
+                           claude=fact_checker('المصداقية: عالي', 2),
+                           gemini=fact_checker('المصداقية: عالي', 2),
+                           cohere=fact_checker(None),
+                           mistral=fact_checker(None))
+        processor.request_timeout = 0.3
+
+        start = time.time()
+        results = processor.enhanced_fact_check_with_multiple_models('عنوان', 'خبر')
+
+        assert time.time() - start < 1.5
+        assert [r['model'] for r in results['fact_check_results']] == ['perplexity']
+        assert results['verdict'] == 'high'
+
+    def test_extract_credibility_verdict(self, processor):
+        assert processor.extract_credibility_verdict('1. مستوى المصداقية: منخفض جداً') == 'low'
+        assert processor.extract_credibility_verdict('Credibility: HIGH') == 'high'
+        assert processor.extract_credibility_verdict('لا يمكن التحديد') is None
+        assert processor.extract_credibility_verdict('Credibility: see the highlight below, then follow up. Medium.') == 'medium'
+
+class TestBatchProcessing:
+    @pytest.fixture
+    def local_processor(self, monkeypatch):
+        monkeypatch.setenv('LLM_CACHE_BACKEND', 'memory')
+        for key in ['OPENAI_API_KEY', 'PERPLEXITY_API_KEY', 'CLAUDE_API_KEY', 'GEMINI_API_KEY',
+                    'COHERE_API_KEY', 'HUGGINGFACE_API_KEY', 'MISTRAL_API_KEY']:
+            monkeypatch.delenv(key, raising=False)
+        monkeypatch.setattr(openai, 'api_key', '', raising=False)
+        return MultiAIProcessor()
+
+    def test_matches_single_article_fallbacks(self, local_processor):
+        articles = [
+            ('نجاح الاستثمار في سوريا', 'الاستثمار في سوريا يحقق نجاحاً ممتازاً. الاستثمار الجديد مفيد للاقتصاد'),
+            ('أزمة في البطولة', 'فشل المنتخب في المباراة بسبب مشكلة في التدريب')
+        ]
+
+        batch = local_processor.process_articles_batch(articles)
+        single = [local_processor.process_article_complete(title, content) for title, content in articles]
+
+        assert len(batch) == 2
+        for batched, one in zip(batch, single):
+            assert batched['sentiment_score'] == one['sentiment_score']
+            assert batched['category'] == one['category']
+            assert batched['summary'] == one['summary']
+            assert batched['ai_enabled'] is False
+        assert batch[0]['sentiment_score'] > 0 > batch[1]['sentiment_score']
+        assert batch[0]['tags'][0] == 'الاستثمار'
+
+    def test_tfidf_prefers_terms_specific_to_an_article(self, local_processor):
+        shared = 'الحكومة تعلن قرارات جديدة اليوم'
+        articles = [
+            ('خبر', f'{shared} حول الكهرباء والكهرباء'),
+            ('خبر', f'{shared} حول المدارس والمدارس')
+        ]
+
+        batch = local_processor.process_articles_batch(articles)
+
+        assert batch[0]['tags'][0] == 'الكهرباء'
+        assert batch[1]['tags'][0] == 'المدارس'
+
+    def test_extractive_summary_picks_central_sentences(self, local_processor):
+        content = '. '.join([
+            'الطقس اليوم معتدل في معظم المناطق الساحلية',
+            'وزارة الاقتصاد تطلق خطة الاستثمار الصناعي الجديدة',
+            'خطة الاستثمار تشمل دعم الصناعة والاستثمار في الطاقة',
+            'المباراة انتهت بالتعادل بين الفريقين',
+            'الاستثمار الصناعي يحتاج إلى تمويل واستثمار مستمر'
+        ])
+
+        summary = local_processor.process_articles_batch([('الاستثمار', content)])[0]['summary']
+
+        assert 'المباراة' not in summary
+        assert summary.count('الاستثمار') >= 3
+
+    def test_uses_ai_per_article_when_providers_configured(self, processor, monkeypatch):
+        monkeypatch.setattr(processor, 'process_article_complete', lambda title, content: {'title': title})
+
+        assert processor.process_articles_batch([('أ', 'ب'), ('ج', 'د')]) == [{'title': 'أ'}, {'title': 'ج'}]
+
+    def test_provider_batch_does_not_starve_article_tasks(self, monkeypatch):
+        monkeypatch.setenv('OPENAI_API_KEY', 'test-key')
+        monkeypatch.setenv('LLM_CACHE_BACKEND', 'memory')
+        monkeypatch.setenv('AI_MAX_WORKERS', '4')
+        monkeypatch.setattr(openai, 'api_key', 'test-key', raising=False)
+        processor = MultiAIProcessor()
+        processor.development_mode = False
+        processor.analysis_mode = 'per_task'
+        processor.article_deadline = 2
+        monkeypatch.setattr(processor, 'call_openai_api', fake_llm({}))
+
+        start = time.time()
+        results = processor.process_articles_batch([(f'عنوان {n}', f'محتوى الخبر {n}') for n in range(8)])
+
+        assert time.time() - start < processor.article_deadline
+        assert [result['original_title'] for result in results] == [f'عنوان {n}' for n in range(8)]
+        assert all(result['incomplete_tasks'] == [] for result in results)
+        assert all(result['category'] == 'economy' for result in results)
@@ -0,0 +1,60 @@
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.services.arabic_text import (
+    AnalyzedText, normalize_arabic, light_stem, stem_phrase, split_sentences, clean_content
+)
+from src.services.keyword_matcher import CategoryMatcher
+
+class TestNormalization:
+    def test_folds_letter_variants_and_diacritics(self):
+        assert normalize_arabic('إِعَادَة الإعمـــار') == 'اعاده الاعمار'
+        assert normalize_arabic('مستشفى') == 'مستشفي'
+
+    def test_light_stem_joins_spelling_variants(self):
+        stems = {light_stem(normalize_arabic(word)) for word in ['سوريا', 'سورية', 'السوري', 'السورية']}
+        assert stems == {'سور'}
+        assert light_stem('كره') == 'كره'
+
+    def test_stem_phrase_handles_multi_word_terms(self):
+        assert stem_phrase('الذكاء الاصطناعي') == stem_phrase('ذكاء اصطناعي')
+
+    def test_clean_content_keeps_arabic_punctuation(self):
+        assert clean_content('مرحباً،   كيف الحال؟ ★') == 'مرحبا، كيف الحال؟'
+
+    def test_split_sentences(self):
+        assert split_sentences('الأولى. الثانية؟ الثالثة!\nالرابعة') == ['الأولى', 'الثانية', 'الثالثة', 'الرابعة']
+
+class TestAnalyzedText:
+    def test_views_are_computed_once(self):
+        analyzed = AnalyzedText('الاقتصاد السوري')
+        assert analyzed.stems is analyzed.stems
+        assert analyzed.stemmed_text == 'اقتصاد سور'
+
+    def test_keywords_group_by_stem_and_skip_stopwords(self):
+        analyzed = AnalyzedText('الاستثمار في سوريا. والاستثمار في سورية يزداد، وقال إن الاستثمار مهم')
+        keywords = analyzed.keywords(limit=2)
+        assert keywords == ['الاستثمار', 'سوريا']
+
+    def test_count_terms_matches_variants(self):
+        analyzed = AnalyzedText('تحسنت الأوضاع بعد أن نجحت الخطة')
+        assert analyzed.count_terms(['نجح', 'تحسن', 'فشل']) == 2
+
+    def test_count_terms_needs_whole_words(self):
+        # خطأ تُطوى إلى خطا، ويجب ألا توجد داخل خطابا
+        assert AnalyzedText('ألقى الرئيس خطاباً مهماً أمام البرلمان').count_terms(['خطأ', 'فشل']) == 0
+        assert AnalyzedText('وفشلوا بسبب خطأ في الحساب').count_terms(['خطأ', 'فشل']) == 2
+
+    def test_matcher_sees_spelling_variants(self):
+        matcher = CategoryMatcher({'syrian_affairs': ['سورية'], 'economy': ['أسهم']})
+        assert matcher.best_category('أخبار سوريا اليوم') == 'syrian_affairs'
+        assert matcher.best_category('ارتفاع الاسهم') == 'economy'
+
+    def test_split_tokenizes_sentences_in_one_pass(self):
+        text = 'الاقتصادُ السوري ينمو. الاستثمار في حلب!\nنهاية'
+        sentences = AnalyzedText.split(text)
+
+        assert [sentence.text for sentence in sentences] == split_sentences(text)
+        for sentence in sentences:
+            assert sentence.stems == AnalyzedText(sentence.text).stems
@@ -0,0 +1,72 @@
+import pytest
+import sys
+import os
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sqlalchemy import event
+from src.models.database import db
+from src.models.news import NewsArticle, NewsSource, NewsCategory, NewsStatus
+
+@pytest.fixture
+def article_app(db_app):
+    source = NewsSource(name='سانا', url='https://sana.sy')
+    db.session.add(source)
+    db.session.flush()
+    db.session.add_all([
+        NewsArticle(
+            title='خبر', summary='ملخص', content='نص طويل ' * 500, source_id=source.id,
+            category=NewsCategory.SYRIAN_AFFAIRS, status=status,
+            published_at=datetime.utcnow(), views=3, ai_processed=True
+        )
+        for status in (NewsStatus.BREAKING, NewsStatus.PUBLISHED)
+    ])
+    db.session.commit()
+    db.session.expunge_all()
+    return db_app
+
+def get_with_statements(app, url):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        response = app.test_client().get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+    return response, statements
+
+class TestSparseFieldsets:
+    @pytest.mark.parametrize('url', [
+        '/api/news/articles',
+        '/api/news/articles?cursor=',
+        '/api/news/articles/breaking',
+        '/api/news/articles/syrian-affairs',
+    ])
+    def test_lists_never_load_article_bodies(self, article_app, url):
+        response, statements = get_with_statements(article_app, url)
+        data = response.get_json()
+        articles = data if isinstance(data, list) else data['articles']
+
+        assert response.status_code == 200
+        assert articles and 'content' not in articles[0]
+        assert articles[0]['source'] == 'سانا'
+        assert not any('news_articles.content' in statement for statement in statements)
+
+    def test_fields_selects_keys_and_columns(self, article_app):
+        response, statements = get_with_statements(article_app, '/api/news/articles?fields=id,title')
+
+        assert all(article.keys() == {'id', 'title'} for article in response.get_json()['articles'])
+        select = statements[0]
+        assert 'news_articles.summary' not in select
+        assert 'news_sources' not in select
+
+    def test_unknown_or_body_fields_are_rejected(self, article_app):
+        client = article_app.test_client()
+        assert client.get('/api/news/articles?fields=id,content').status_code == 400
+        assert client.get('/api/news/articles/trending?fields=nope').status_code == 400
+
+    def test_full_body_comes_from_the_detail_route(self, article_app):
+        data = article_app.test_client().get('/api/news/articles/1').get_json()
+        assert data['content'].startswith('نص طويل')
@@ -0,0 +1,238 @@
+import pytest
+import sys
+import os
+import threading
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from flask import Flask
+from flask_socketio import SocketIO
+from src.models.database import db
+from src.services.change_feed import ChangeFeed, CoalescingBuffer, diff_state
+from src.services.realtime_broker import CHANGES_CHANNEL, InMemoryBroker
+from src.services.websocket_service import WebSocketService
+
+class FakeAutomation:
+    def __init__(self):
+        self.stats = {'total_scraped': 0, 'total_processed': 0, 'last_run': None, 'pipeline': {'queued': 0}}
+
+    def get_automation_status(self):
+        return {'stats': self.stats}
+
+@pytest.fixture
+def realtime():
+    app = Flask(__name__)
+    socketio = SocketIO(app)
+    automation = FakeAutomation()
+    broker = InMemoryBroker()
+    service = WebSocketService(socketio, automation, broker=broker, poll_interval=3600, coalesce_window=0)
+    yield app, socketio, automation, broker, service
+    service.stop_real_time_updates()
+
+def publish_articles(broker, *articles):
+    broker.publish(CHANGES_CHANNEL, {'type': 'articles', 'data': {
+        'ids': [article['id'] for article in articles],
+        'articles': [dict({'source_id': 1, 'breaking': False}, **article) for article in articles]
+    }})
+
+def events(client, name):
+    return [event['args'][0] for event in client.get_received() if event['name'] == name]
+
+class TestDiffState:
+    def test_only_changed_fields_are_kept(self):
+        previous = {'a': 1, 'b': 2, 'nested': {'x': 1, 'y': 2}}
+        current = {'a': 1, 'b': 3, 'nested': {'x': 1, 'y': 5}, 'c': None}
+        assert diff_state(previous, current) == {'b': 3, 'nested': {'y': 5}, 'c': None}
+        assert diff_state(current, current) == {}
+
+class TestChangeFeed:
+    def test_since_returns_missed_changes_or_none(self):
+        feed = ChangeFeed(history=3)
+        for n in range(5):
+            feed.publish('articles', {'ids': [n]})
+        assert [change['seq'] for change in feed.since(3)] == [4, 5]
+        assert feed.since(5) == []
+        assert feed.since(1) is None
+        assert feed.since(9) is None
+
+class TestCoalescingBuffer:
+    def test_burst_is_merged_into_one_change_per_topic_and_kind(self):
+        delivered = []
+        buffer = CoalescingBuffer(lambda topic, kind, data: delivered.append((topic, kind, data)), window=3600)
+        buffer.add('all', 'articles', {'ids': [1]})
+        buffer.add('all', 'stats', {'total_scraped': 1, 'pipeline': {'queued': 1}})
+        buffer.add('all', 'articles', {'ids': [2, 1]})
+        buffer.add('all', 'stats', {'total_scraped': 2})
+        buffer.add('category:sports', 'articles', {'ids': [2]})
+        assert delivered == []
+
+        buffer.flush('all')
+        assert delivered == [
+            ('all', 'articles', {'ids': [1, 2]}),
+            ('all', 'stats', {'total_scraped': 2, 'pipeline': {'queued': 1}}),
+        ]
+        buffer.flush()
+        assert delivered[-1] == ('category:sports', 'articles', {'ids': [2]})
+        assert buffer.merged == 2
+
+    def test_window_elapses_without_a_manual_flush(self):
+        delivered = threading.Event()
+        buffer = CoalescingBuffer(lambda topic, kind, data: delivered.set(), window=0.01)
+        buffer.add('all', 'articles', {'ids': [1]})
+        assert delivered.wait(2)
+
+class TestWebSocketService:
+    def test_connect_sends_a_snapshot(self, realtime):
+        app, socketio, automation, broker, service = realtime
+        client = socketio.test_client(app)
+        snapshot = events(client, 'snapshot')[0]
+        assert snapshot['topic'] == 'all'
+        assert snapshot['stats']['total_scraped'] == 0
+        assert snapshot['seq'] == service.topic_feed('all').seq
+
+    def test_nothing_is_sent_while_nothing_changes(self, realtime):
+        app, socketio, automation, broker, service = realtime
+        client = socketio.test_client(app)
+        client.get_received()
+        for _ in range(3):
+            service.publish_stats_changes()
+        assert client.get_received() == []
+
+    def test_changes_are_sent_as_numbered_deltas(self, realtime):
+        app, socketio, automation, broker, service = realtime
+        client = socketio.test_client(app)
+        seq = events(client, 'snapshot')[0]['seq']
+
+        automation.stats['total_scraped'] = 12
+        automation.stats['pipeline']['queued'] = 3
+        service.publish_stats_changes()
+        publish_articles(broker, {'id': 41, 'category': 'sports'}, {'id': 42, 'category': 'politics'})
+
+        deltas = events(client, 'delta')
+        assert [delta['seq'] for delta in deltas] == [seq + 1, seq + 2]
+        assert deltas[0]['data'] == {'total_scraped': 12, 'pipeline': {'queued': 3}}
+        assert deltas[1] == {'seq': seq + 2, 'type': 'articles', 'topic': 'all', 'data': {'ids': [41, 42]}}
+
+    def test_resync_replays_missed_deltas_or_sends_a_snapshot(self, realtime):
+        app, socketio, automation, broker, service = realtime
+        client = socketio.test_client(app)
+        seq = events(client, 'snapshot')[0]['seq']
+        publish_articles(broker, {'id': 1, 'category': 'sports'})
+        publish_articles(broker, {'id': 2, 'category': 'sports'})
+        client.get_received()
+
+        client.emit('resync', {'topic': 'all', 'since': seq + 1, 'epoch': service.epoch})
+        assert [delta['data']['ids'] for delta in events(client, 'delta')] == [[2]]
+
+        for n in range(250):
+            publish_articles(broker, {'id': n, 'category': 'sports'})
+        client.get_received()
+        client.emit('resync', {'topic': 'all', 'since': seq, 'epoch': service.epoch})
+        received = client.get_received()
+        assert [event['name'] for event in received] == ['snapshot']
+        assert received[0]['args'][0]['seq'] == service.topic_feed('all').seq
+
+    def test_subscribers_only_get_their_topics(self, realtime):
+        app, socketio, automation, broker, service = realtime
+        sports = socketio.test_client(app)
+        sports.get_received()
+        sports.emit('subscribe', {'topics': ['category:sports', 'weather']})
+        received = sports.get_received()
+        subscribed = [event['args'][0] for event in received if event['name'] == 'subscribed'][0]
+        assert subscribed == {'topics': ['category:sports'], 'rejected': ['weather']}
+        dashboard = socketio.test_client(app)
+        dashboard.get_received()
+
+        publish_articles(broker, {'id': 1, 'category': 'politics', 'breaking': True}, {'id': 2, 'category': 'sports'})
+        publish_articles(broker, {'id': 3, 'category': 'politics'})
+
+        sports_deltas = events(sports, 'delta')
+        assert [(delta['topic'], delta['seq'], delta['data']['ids']) for delta in sports_deltas] == [('category:sports', 1, [2])]
+        assert [delta['data']['ids'] for delta in events(dashboard, 'delta')] == [[1, 2], [3]]
+
+    def test_only_existing_sources_can_be_followed(self, realtime):
+        app, socketio, automation, broker, service = realtime
+        publish_articles(broker, {'id': 1, 'category': 'sports', 'source_id': 3})
+        client = socketio.test_client(app)
+        client.get_received()
+        feeds = set(service.topic_feeds)
+
+        for source_id in range(100, 150):
+            client.emit('resync', {'topic': f'source:{source_id}', 'since': 0, 'epoch': service.epoch})
+        client.emit('subscribe', {'topics': ['source:3', 'source:404']})
+
+        subscribed = events(client, 'subscribed')[0]
+        assert subscribed == {'topics': ['source:3'], 'rejected': ['source:404']}
+        assert set(service.topic_feeds) == feeds
+
+    def test_sources_in_the_database_can_be_followed(self, db_app):
+        from src.models.news import NewsSource
+
+        source = NewsSource(name='سانا', url='https://sana.sy')
+        db.session.add(source)
+        db.session.commit()
+        socketio = SocketIO(db_app)
+        service = WebSocketService(socketio, None, broker=InMemoryBroker(), poll_interval=3600, coalesce_window=0)
+        try:
+            client = socketio.test_client(db_app)
+            client.emit('subscribe', {'topics': [f'source:{source.id}', f'source:{source.id + 1}']})
+            subscribed = events(client, 'subscribed')[-1]
+            assert subscribed == {'topics': [f'source:{source.id}'], 'rejected': [f'source:{source.id + 1}']}
+        finally:
+            service.stop_real_time_updates()
+
+    def test_reconnecting_client_only_gets_what_it_missed(self, realtime):
+        app, socketio, automation, broker, service = realtime
+        publish_articles(broker, {'id': 1, 'category': 'sports'})
+        publish_articles(broker, {'id': 2, 'category': 'sports'})
+
+        auth = {'topics': ['category:sports'], 'since': {'category:sports': 1}, 'epoch': service.epoch}
+        client = socketio.test_client(app, auth=auth)
+        received = client.get_received()
+        assert [event['name'] for event in received] == ['connected', 'subscribed', 'delta']
+        assert received[-1]['args'][0]['data'] == {'ids': [2]}
+
+        # الأرقام نفسها من عامل آخر لا تصلح هنا
+        client = socketio.test_client(app, auth=dict(auth, epoch='another'))
+        assert [event['name'] for event in client.get_received()] == ['connected', 'subscribed', 'snapshot']
+
+    def test_each_room_is_emitted_to_once_per_change(self, realtime, monkeypatch):
+        app, socketio, automation, broker, service = realtime
+        clients = [socketio.test_client(app) for _ in range(3)]
+        for client in clients:
+            client.emit('subscribe', {'topics': ['category:sports', 'breaking']})
+
+        rooms = []
+        emit = socketio.emit
+        monkeypatch.setattr(socketio, 'emit', lambda event, *args, **kwargs: (rooms.append(kwargs.get('to')), emit(event, *args, **kwargs)))
+        publish_articles(broker, {'id': 7, 'category': 'sports', 'breaking': True})
+        assert sorted(rooms) == ['all', 'breaking', 'category:sports', 'source:1']
+
+class TestSavePublishesArticles:
+    def test_saved_article_ids_reach_the_broker(self, db_app):
+        from src.models.database import db
+        from src.models.news import NewsSource
+        from src.services.automation_service import AutomationService
+        from src.services.realtime_broker import get_broker
+        from src.services.news_scraper import NewsArticleData
+
+        source = NewsSource(name='سانا', url='https://sana.sy')
+        db.session.add(source)
+        db.session.commit()
+        article = NewsArticleData()
+        article.title = 'عنوان'
+        article.content = 'محتوى الخبر'
+        article.url = 'https://example.com/1'
+        article.published_at = datetime.utcnow()
+
+        messages = []
+        broker = get_broker()
+        broker.subscribe(CHANGES_CHANNEL, messages.append)
+        try:
+            outcomes = AutomationService(db_app).save_articles_bulk([(article, {}, source)])
+        finally:
+            broker.unsubscribe(CHANGES_CHANNEL, messages.append)
+        article_id = outcomes[0]['article_id']
+        assert messages == [{'type': 'articles', 'data': {
+            'ids': [article_id],
+            'articles': [{'id': article_id, 'category': 'general', 'source_id': source.id, 'breaking': False}]
+        }}]
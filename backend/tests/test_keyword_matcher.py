@@ -0,0 +1,78 @@
+import pytest
+import sys
+import os
+import json
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.services.keyword_matcher import KeywordAutomaton, CategoryMatcher, load_lexicon, get_category_matcher
+
+class TestKeywordAutomaton:
+    def test_finds_overlapping_terms_in_one_pass(self):
+        automaton = KeywordAutomaton()
+        for term in ['سوري', 'سوريا', 'ريا', 'دمشق']:
+            automaton.add(term, term)
+        automaton.build()
+
+        matches = [(start, label) for start, _, label, _ in automaton.iter_matches('سوريا ودمشق')]
+        assert matches == [(0, 'سوري'), (0, 'سوريا'), (2, 'ريا'), (7, 'دمشق')]
+
+    def test_arabic_terms_match_inside_words(self):
+        automaton = KeywordAutomaton()
+        automaton.add('سوري', 'syrian_affairs')
+        automaton.add('حكومة', 'politics')
+
+        labels = [label for _, _, label, _ in automaton.iter_matches('الحكومة السورية')]
+        assert labels == ['politics', 'syrian_affairs']
+
+    def test_ascii_terms_need_word_boundaries(self):
+        automaton = KeywordAutomaton()
+        automaton.add('ai', 'technology')
+
+        assert list(automaton.iter_matches('Chain of rain')) == []
+        assert [label for _, _, label, _ in automaton.iter_matches('New AI model')] == ['technology']
+
+    def test_token_bounded_terms_only_match_whole_words(self):
+        automaton = KeywordAutomaton()
+        automaton.add('فن', 'culture', token_bounded=True)
+        automaton.build()
+
+        assert list(automaton.iter_matches('الفندق الكبير')) == []
+        assert [label for _, _, label, _ in automaton.iter_matches('الفن والفنان')] == ['culture', 'culture']
+
+class TestCategoryMatcher:
+    def test_weighted_scores_pick_the_strongest_category(self):
+        matcher = CategoryMatcher({
+            'politics': {'وزير': 1.0},
+            'economy': {'اقتصاد': 1.0, 'استثمار': 1.0}
+        })
+
+        text = 'وزير الاقتصاد يعلن خطة استثمار'
+        assert matcher.scores(text) == {'politics': 1.0, 'economy': 2.0}
+        assert matcher.best_category(text) == 'economy'
+
+    def test_short_default_terms_do_not_fire_inside_other_words(self):
+        matcher = CategoryMatcher(load_lexicon())
+        assert matcher.best_category('الفندق الكبير') == 'general'
+        assert matcher.best_category('استهدف القصف الطريق') == 'general'
+        assert matcher.best_category('كلية الطب') == 'health'
+
+    def test_ties_follow_lexicon_order_and_default(self):
+        matcher = CategoryMatcher({'politics': ['حكومة'], 'economy': ['تجارة']})
+
+        assert matcher.best_category('حكومة تجارة') == 'politics'
+        assert matcher.best_category('لا شيء هنا') == 'general'
+
+    def test_longest_term_wins_at_the_same_position(self):
+        matcher = CategoryMatcher({'syrian_affairs': ['سوري', 'سورية']})
+
+        assert matcher.scores('الحكومة السورية') == {'syrian_affairs': 1.0}
+
+    def test_lexicon_loaded_from_json(self, tmp_path):
+        path = tmp_path / 'lexicon.json'
+        path.write_text(json.dumps({'sports': ['ملعب']}, ensure_ascii=False), encoding='utf-8')
+
+        matcher = CategoryMatcher(load_lexicon(str(path)))
+        assert matcher.best_category('افتتاح الملعب الجديد') == 'sports'
+
+    def test_shared_matcher_is_built_once(self):
+        assert get_category_matcher() is get_category_matcher()
+        assert get_category_matcher().best_category('مباراة المنتخب في البطولة') == 'sports'
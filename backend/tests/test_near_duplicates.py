@@ -0,0 +1,70 @@
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.services.near_duplicates import MinHasher, NearDuplicateIndex
+
+STORY = ("أعلنت وزارة الاقتصاد السورية اليوم عن خطة جديدة لدعم الصادرات الزراعية وتخفيض الرسوم الجمركية "
+         "على المواد الأولية المستوردة بهدف تنشيط الإنتاج المحلي وتحسين سعر صرف الليرة في الأسواق خلال الأشهر المقبلة")
+REWORDED = "دمشق - سانا: " + STORY.replace("اليوم", "الأحد").replace("المقبلة", "القادمة")
+OTHER = ("فاز المنتخب السوري لكرة القدم على نظيره الأردني بهدفين مقابل هدف في المباراة التي أقيمت على ملعب "
+         "الجلاء في دمشق ضمن تصفيات كأس العالم بحضور جماهيري كبير")
+
+class TestMinHasher:
+    def test_signatures_are_stable_across_instances(self):
+        shingles = MinHasher().shingles(STORY)
+        assert (MinHasher().signature(shingles) == MinHasher().signature(shingles)).all()
+
+    def test_shingles_ignore_diacritics_and_spelling_variants(self):
+        hasher = MinHasher()
+        assert hasher.shingles('وزارة الاقتصاد السورية تعلن خطة') == hasher.shingles('وزارةُ الإقتصاد السوريه تعلن خطة')
+
+class TestNearDuplicateIndex:
+    def test_reworded_copy_joins_the_first_story(self):
+        index = NearDuplicateIndex()
+        first = index.assign('https://sana.sy/1', STORY)
+        copy = index.assign('https://halab.today/7', REWORDED)
+
+        assert first.duplicate_of is None
+        assert first.cluster_id == 'https://sana.sy/1'
+        assert copy.duplicate_of == 'https://sana.sy/1'
+        assert copy.cluster_id == 'https://sana.sy/1'
+        assert copy.similarity >= index.threshold
+        assert index.cluster_size('https://sana.sy/1') == 2
+
+    def test_different_story_starts_its_own_cluster(self):
+        index = NearDuplicateIndex()
+        index.assign('a', STORY)
+        match = index.assign('b', OTHER)
+
+        assert match.duplicate_of is None
+        assert index.cluster_count() == 2
+
+    def test_short_texts_are_not_indexed(self):
+        index = NearDuplicateIndex()
+        assert index.assign('a', 'عاجل: انفجار في دمشق').cluster_id is None
+        assert index.assign('b', 'عاجل: انفجار في دمشق').duplicate_of is None
+        assert len(index) == 0
+
+    def test_reassigning_a_key_does_not_match_itself(self):
+        index = NearDuplicateIndex()
+        index.assign('a', STORY)
+        assert index.assign('a', STORY).duplicate_of is None
+        assert len(index) == 1
+
+    def test_oldest_entries_are_evicted(self):
+        index = NearDuplicateIndex(max_entries=1)
+        index.assign('a', STORY)
+        index.assign('b', OTHER)
+
+        assert len(index) == 1
+        assert index.cluster_of('a') is None
+        assert index.match(REWORDED).duplicate_of is None
+        assert index.get_stats()['evictions'] == 1
+
+    def test_load_clusters_stored_articles(self):
+        index = NearDuplicateIndex()
+        assert index.load([('a', STORY), ('b', REWORDED), ('c', OTHER)]) == 3
+        assert index.loaded
+        assert index.cluster_of('b') == 'a'
+        assert index.cluster_count() == 2
@@ -0,0 +1,187 @@
+import pytest
+import sys
+import os
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.services.news_scraper import NewsScraper
+from src.services.feed_cache import FeedValidatorStore
+from src.services.seen_urls import SeenUrlIndex, normalize_url
+
+RSS_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>Test Feed</title>
+<item><title>خبر أول</title><link>{base}/article/1</link><description>ملخص أول</description>
+<pubDate>Mon, 06 Jan 2025 10:00:00 +0000</pubDate></item>
+<item><title>خبر ثاني</title><link>{base}/article/2</link><description>ملخص ثاني</description>
+<pubDate>Mon, 06 Jan 2025 11:00:00 +0000</pubDate></item>
+</channel></rss>"""
+
+ARTICLE_TEMPLATE = """<html><head><title>Article {n}</title></head><body>
+<h1>عنوان المقال {n}</h1>
+<article><p>الحكومة السورية في دمشق تعلن عن خطة اقتصادية جديدة للاستثمار رقم {n}.</p></article>
+</body></html>"""
+
+class _NewsHandler(BaseHTTPRequestHandler):
+    requests_seen = []
+    feed_etag = '"feed-v1"'
+    article_status = {}
+
+    def do_GET(self):
+        self.requests_seen.append(self.path)
+        base = f"http://{self.headers['Host']}"
+        if self.path == '/rss.xml' and self.headers.get('If-None-Match') == self.feed_etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        if self.path == '/rss.xml':
+            body = RSS_TEMPLATE.format(base=base)
+            content_type = 'application/rss+xml'
+        elif self.path.startswith('/article/'):
+            n = self.path.rsplit('/', 1)[-1]
+            status = self.article_status.get(n)
+            if status is not None and status >= 400:
+                self.send_response(status)
+                self.end_headers()
+                return
+            body = '<html><body><h1>صفحة فارغة</h1></body></html>' if status == 204 else ARTICLE_TEMPLATE.format(n=n)
+            content_type = 'text/html'
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        payload = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        if self.path == '/rss.xml':
+            self.send_header('ETag', self.feed_etag)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def news_server():
+    _NewsHandler.requests_seen = []
+    _NewsHandler.article_status = {}
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _NewsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def scraper(news_server, tmp_path):
+    scraper = NewsScraper()
+    scraper.feed_validators = FeedValidatorStore(str(tmp_path / 'feed_validators.json'))
+    scraper.news_sources = {
+        'local': {
+            'name': 'Local Test Source',
+            'rss_url': f"{news_server}/rss.xml",
+            'base_url': news_server,
+            'language': 'ar',
+            'country': 'سوريا'
+        }
+    }
+    yield scraper
+    scraper.engine.close()
+
+class TestAsyncFetchEngine:
+    def test_fetch_rss_feed(self, scraper, news_server):
+        articles = scraper.fetch_rss_feed(f"{news_server}/rss.xml")
+        assert [a['link'] for a in articles] == [f"{news_server}/article/1", f"{news_server}/article/2"]
+
+    def test_scrape_source(self, scraper):
+        articles = scraper.scrape_source('local')
+        assert len(articles) == 2
+        assert all(a.source_name == 'Local Test Source' for a in articles)
+        assert all(a.content and a.published_at for a in articles)
+
+    def test_scrape_all_sources_shares_one_loop(self, scraper):
+        results = scraper.scrape_all_sources()
+        loop = scraper.engine._loop
+        assert set(results.keys()) == {'local'}
+        assert len(results['local']) == 2
+
+        scraper.scrape_all_sources()
+        assert scraper.engine._loop is loop
+
+    def test_unreachable_source_returns_empty(self, scraper):
+        scraper.news_sources['local']['rss_url'] = 'http://127.0.0.1:9/rss.xml'
+        assert scraper.scrape_source('local') == []
+
+class TestConditionalFeedFetch:
+    def test_unchanged_feed_is_not_reparsed(self, scraper, news_server, monkeypatch):
+        rss_url = f"{news_server}/rss.xml"
+        assert len(scraper.fetch_rss_feed(rss_url)) == 2
+        scraper.feed_validators.commit(rss_url)
+
+        parsed = []
+        monkeypatch.setattr(scraper, '_parse_rss_feed', lambda content: parsed.append(content) or [])
+        assert scraper.fetch_rss_feed(rss_url) == []
+        assert parsed == []
+
+    def test_validators_survive_restart(self, scraper, news_server, tmp_path):
+        rss_url = f"{news_server}/rss.xml"
+        scraper.fetch_rss_feed(rss_url)
+        scraper.feed_validators.commit(rss_url)
+
+        restarted = FeedValidatorStore(str(tmp_path / 'feed_validators.json'))
+        assert restarted.request_headers(rss_url) == {'If-None-Match': '"feed-v1"'}
+
+    def test_scrape_source_skips_articles_when_feed_unchanged(self, scraper):
+        assert len(scraper.scrape_source('local')) == 2
+        scraper.confirm_feed('local')
+        _NewsHandler.requests_seen = []
+
+        assert scraper.scrape_source('local') == []
+        assert _NewsHandler.requests_seen == ['/rss.xml']
+
+    def test_feed_is_read_again_until_its_articles_are_stored(self, scraper):
+        assert len(scraper.scrape_source('local')) == 2
+        # الدورة فشلت قبل الحفظ: لا يُرسل ETag فيُعاد جلب المقالات
+        assert len(scraper.scrape_source('local')) == 2
+        scraper.discard_feed('local')
+        assert len(scraper.scrape_source('local')) == 2
+
+    def test_page_without_content_does_not_keep_the_feed_uncached(self, scraper):
+        # 204 هنا تعني صفحة تُجلب بنجاح لكن لا محتوى فيها
+        _NewsHandler.article_status = {'2': 204}
+        assert len(scraper.scrape_source('local')) == 1
+        scraper.confirm_feed('local')
+        _NewsHandler.requests_seen = []
+
+        assert scraper.scrape_source('local') == []
+        assert _NewsHandler.requests_seen == ['/rss.xml']
+
+    def test_failed_download_reads_the_feed_again(self, scraper):
+        _NewsHandler.article_status = {'2': 503}
+        assert len(scraper.scrape_source('local')) == 1
+        scraper.confirm_feed('local')
+
+        _NewsHandler.article_status = {}
+        assert len(scraper.scrape_source('local')) == 2
+
+class TestSeenUrlIndex:
+    def test_normalization_ignores_tracking_and_fragments(self):
+        assert normalize_url('HTTPS://Example.com/news/1/?utm_source=x&id=5#top') == 'https://example.com/news/1?id=5'
+        assert normalize_url('https://example.com/news?fbclid=x&source=2&ref=a') == 'https://example.com/news?ref=a&source=2'
+
+    def test_membership(self):
+        index = SeenUrlIndex()
+        index.load(['https://example.com/a', None])
+        index.add('https://example.com/b/')
+        assert 'https://example.com/a?utm_medium=rss' in index
+        assert 'https://example.com/b' in index
+        assert 'https://example.com/c' not in index
+        assert len(index) == 2
+
+    def test_seen_entries_are_never_downloaded(self, scraper, news_server):
+        scraper.seen_urls.add(f"{news_server}/article/1")
+
+        articles = scraper.scrape_source('local')
+        assert [a.url for a in articles] == [f"{news_server}/article/2"]
+        assert '/article/1' not in _NewsHandler.requests_seen
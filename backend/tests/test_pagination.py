@@ -0,0 +1,93 @@
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sqlalchemy import desc
+from src.models.database import db
+from src.models.news import NewsArticle, NewsSource, NewsCategory, NewsStatus
+from src.services.pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_page
+
+@pytest.fixture
+def articles(db_app):
+    source = NewsSource(name='سانا', url='https://sana.sy')
+    db.session.add(source)
+    db.session.flush()
+    base = datetime(2025, 1, 6, 10, 0)
+    rows = []
+    for n in range(23):
+        # أوقات نشر متكررة ومقالات بلا تاريخ لاختبار حسم التعادل والذيل
+        published_at = base + timedelta(minutes=n // 3) if n < 20 else None
+        rows.append(NewsArticle(
+            title=f'خبر {n}', content='نص', source_id=source.id, published_at=published_at,
+            category=NewsCategory.SYRIAN_AFFAIRS if n % 2 else NewsCategory.GENERAL,
+            status=NewsStatus.PUBLISHED
+        ))
+    db.session.add_all(rows)
+    db.session.commit()
+    return rows
+
+def walk(client, url):
+    seen, cursor = [], ''
+    while True:
+        data = client.get(f'{url}&cursor={cursor}').get_json()
+        seen.extend(article['id'] for article in data['articles'])
+        if not data['pagination']['has_more']:
+            return seen, data['pagination']
+        cursor = data['pagination']['next_cursor']
+
+class TestCursorTokens:
+    def test_round_trip(self):
+        published_at = datetime(2025, 1, 6, 10, 30)
+        assert decode_cursor(encode_cursor(published_at, 42)) == (published_at, 42)
+        assert decode_cursor(encode_cursor(None, 7)) == (None, 7)
+
+    def test_garbage_is_rejected(self):
+        with pytest.raises(InvalidCursor):
+            decode_cursor('not-a-cursor')
+
+class TestKeysetPagination:
+    def test_pages_cover_every_row_once_in_order(self, db_app, articles):
+        ids, _ = walk(db_app.test_client(), '/api/news/articles?per_page=4')
+
+        dated = NewsArticle.query.filter(NewsArticle.published_at.isnot(None)).order_by(
+            desc(NewsArticle.published_at), desc(NewsArticle.id)).all()
+        undated = NewsArticle.query.filter(NewsArticle.published_at.is_(None)).order_by(desc(NewsArticle.id)).all()
+        assert ids == [article.id for article in dated + undated]
+
+    def test_syrian_affairs_cursor_mode(self, db_app, articles):
+        ids, _ = walk(db_app.test_client(), '/api/news/articles/syrian-affairs?per_page=3')
+        assert len(ids) == len(set(ids)) == sum(1 for n in range(23) if n % 2)
+
+    def test_totals_are_optional(self, db_app, articles):
+        client = db_app.test_client()
+        assert 'total' not in client.get('/api/news/articles?cursor=').get_json()['pagination']
+
+        pagination = client.get('/api/news/articles?cursor=&include_total=approx').get_json()['pagination']
+        assert pagination['total'] == 23
+        assert pagination['total_is_approximate'] is True
+
+    def test_page_mode_is_unchanged(self, db_app, articles):
+        pagination = db_app.test_client().get('/api/news/articles?page=2&per_page=5').get_json()['pagination']
+        assert pagination == {'page': 2, 'pages': 5, 'per_page': 5, 'total': 23}
+
+    def test_invalid_cursor_is_a_client_error(self, db_app, articles):
+        assert db_app.test_client().get('/api/news/articles?cursor=bogus').status_code == 400
+
+    def test_deep_page_is_an_index_range_scan(self, db_app, articles):
+        statements = []
+        from sqlalchemy import event
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT'):
+                statements.append((statement, parameters))
+
+        event.listen(db.engine, 'before_cursor_execute', capture)
+        try:
+            keyset_page(NewsArticle.query, NewsArticle, 4, token=encode_cursor(datetime(2025, 1, 6, 10, 3), 10))
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', capture)
+
+        statement, parameters = statements[0]
+        plan = db.session.connection().exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+        assert any('ix_news_articles_published_at_id' in row[-1] and 'published_at<' in row[-1] for row in plan)
@@ -0,0 +1,63 @@
+import pytest
+import sys
+import os
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.models.database import db
+from src.models.news import NewsArticle, NewsSource
+from src.services.automation_service import AutomationService
+from src.services.news_scraper import NewsArticleData
+
+def make_article(n, title=None):
+    article = NewsArticleData()
+    article.title = title or f"عنوان {n}"
+    article.content = f"محتوى الخبر رقم {n}"
+    article.url = f"https://example.com/{n}"
+    article.published_at = datetime(2025, 1, 6, 10, n)
+    return article
+
+@pytest.fixture
+def service(db_app):
+    service = AutomationService(db_app)
+    source = NewsSource(name='سانا', url='https://sana.sy', language='ar', country='سوريا')
+    db.session.add(source)
+    db.session.commit()
+    service.source = db.session.get(NewsSource, source.id)
+    return service
+
+class TestBulkSave:
+    def test_outcomes_per_row(self, service):
+        assert service.save_article_to_db(make_article(1), {}, service.source)
+
+        batch = [
+            (make_article(1), {}, service.source),
+            (make_article(2), {'category': 'sports', 'tags': ['كرة']}, service.source),
+            (make_article(2), {}, service.source),
+            (make_article(3), {}, None),
+        ]
+        outcomes = service.save_articles_bulk(batch)
+
+        assert [o['status'] for o in outcomes] == ['duplicate', 'saved', 'duplicate', 'error']
+        assert outcomes[1]['article_id'] is not None
+        assert NewsArticle.query.count() == 2
+        assert 'https://example.com/2' in service.scraper.seen_urls
+
+    def test_one_lookup_and_one_commit_per_batch(self, service, db_app):
+        from sqlalchemy import event
+        statements = []
+        commits = []
+
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engine = db.engine
+        event.listen(engine, 'before_cursor_execute', count_statement)
+        event.listen(engine, 'commit', lambda conn: commits.append(conn))
+        try:
+            outcomes = service.save_articles_bulk([(make_article(n), {}, service.source) for n in range(20)])
+        finally:
+            event.remove(engine, 'before_cursor_execute', count_statement)
+
+        assert all(o['status'] == 'saved' for o in outcomes)
+        assert len([s for s in statements if s.lstrip().upper().startswith('SELECT')]) == 1
+        assert len(commits) == 1
@@ -0,0 +1,152 @@
+import pytest
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.services.news_scraper import NewsArticleData
+from src.services.pipeline import ScrapingPipeline
+from src.services.near_duplicates import NearDuplicateIndex
+
+class _FakeScraper:
+    def __init__(self, articles_per_source):
+        self.news_sources = {
+            key: {'name': key, 'base_url': f'https://{key}.example', 'language': 'ar', 'country': 'سوريا'}
+            for key in articles_per_source
+        }
+        self.articles_per_source = articles_per_source
+        self.seen_urls = set()
+
+    def scrape_source(self, source_key):
+        if self.articles_per_source[source_key] is None:
+            raise RuntimeError('feed down')
+        articles = []
+        for i in range(self.articles_per_source[source_key]):
+            article = NewsArticleData()
+            article.title = f'{source_key} {i}'
+            article.content = 'محتوى'
+            article.url = f'https://{source_key}.example/{i}'
+            articles.append(article)
+        return articles
+
+class _FakeAIProcessor:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def process_article_complete(self, title, content):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        return {'summary': title, 'category': 'general'}
+
+class _FakeService:
+    def __init__(self, articles_per_source, ai_delay=0.0):
+        self.scraper = _FakeScraper(articles_per_source)
+        self.ai_processor = _FakeAIProcessor(ai_delay)
+        self.ai_processing_enabled = True
+        self.max_articles_per_source = 10
+        self.stats = {'total_published': 0, 'errors': 0}
+        self.saved = []
+        self.writer_threads = set()
+        self.batches = []
+
+    def get_or_create_source(self, name, url, language, country):
+        return name
+
+    def save_articles_bulk(self, batch):
+        self.writer_threads.add(threading.current_thread().name)
+        self.batches.append(len(batch))
+        for article_data, ai_results, source in batch:
+            self.saved.append((source, article_data.title, ai_results['summary']))
+        return [{'status': 'saved'} for _ in batch]
+
+class TestScrapingPipeline:
+    def test_all_articles_flow_through_every_stage(self):
+        service = _FakeService({'sana': 3, 'bbc': 2})
+        results = ScrapingPipeline(service, fetch_workers=2, ai_workers=2, queue_size=1).run(['sana', 'bbc'])
+
+        assert results['sana']['articles_found'] == 3
+        assert results['sana']['articles_processed'] == 3
+        assert results['sana']['articles_saved'] == 3
+        assert results['bbc']['articles_saved'] == 2
+        assert len(service.saved) == 5
+        assert service.stats['total_published'] == 5
+        assert service.writer_threads == {'pipeline-db-0'}
+
+    def test_ai_stage_runs_concurrently(self):
+        service = _FakeService({'sana': 8}, ai_delay=0.05)
+        start = time.time()
+        ScrapingPipeline(service, fetch_workers=1, ai_workers=4, queue_size=2).run(['sana'])
+
+        assert service.ai_processor.max_active > 1
+        assert time.time() - start < 8 * 0.05
+
+    def test_source_errors_are_isolated(self):
+        service = _FakeService({'sana': None, 'bbc': 1})
+        results = ScrapingPipeline(service).run(['sana', 'bbc'])
+
+        assert results['sana']['errors'] == 1
+        assert results['bbc']['articles_saved'] == 1
+        assert service.stats['errors'] == 1
+
+    def test_writer_batches_rows(self):
+        service = _FakeService({'sana': 10})
+        ScrapingPipeline(service, ai_workers=4, queue_size=20, batch_size=4, flush_interval=1).run(['sana'])
+
+        assert sum(service.batches) == 10
+        assert max(service.batches) <= 4
+        assert len(service.batches) < 10
+
+    def test_near_duplicates_skip_the_ai_stage(self):
+        service = _FakeService({'sana': 1, 'bbc': 1})
+        story = ('أعلنت وزارة الاقتصاد السورية عن خطة جديدة لدعم الصادرات الزراعية وتخفيض الرسوم الجمركية '
+                 'على المواد الأولية المستوردة بهدف تنشيط الإنتاج المحلي وتحسين سعر صرف الليرة')
+        original_scrape = service.scraper.scrape_source
+
+        def scrape_source(source_key):
+            articles = original_scrape(source_key)
+            articles[0].content = story if source_key == 'sana' else story + ' في الأسواق المحلية'
+            return articles
+
+        service.scraper.scrape_source = scrape_source
+        service.story_index = NearDuplicateIndex()
+        results = ScrapingPipeline(service, fetch_workers=1).run(['sana', 'bbc'])
+
+        assert results['sana']['articles_saved'] == 1
+        assert results['bbc']['near_duplicates'] == 1
+        assert results['bbc']['articles_processed'] == 0
+        assert len(service.saved) == 1
+        assert service.scraper.seen_urls == {'https://bbc.example/0'}
+
+    def test_story_is_released_when_its_first_copy_is_not_saved(self):
+        service = _FakeService({'sana': 1, 'bbc': 1})
+        story = ('أعلنت وزارة الاقتصاد السورية عن خطة جديدة لدعم الصادرات الزراعية وتخفيض الرسوم الجمركية '
+                 'على المواد الأولية المستوردة بهدف تنشيط الإنتاج المحلي وتحسين سعر صرف الليرة')
+        original_scrape = service.scraper.scrape_source
+
+        def scrape_source(source_key):
+            articles = original_scrape(source_key)
+            articles[0].content = story if source_key == 'sana' else story + ' في الأسواق المحلية'
+            return articles
+
+        service.scraper.scrape_source = scrape_source
+        service.story_index = NearDuplicateIndex()
+        save = service.save_articles_bulk
+        service.save_articles_bulk = lambda batch: [{'status': 'error'} for _ in batch]
+        results = ScrapingPipeline(service, fetch_workers=1, flush_interval=1).run(['sana', 'bbc'])
+
+        assert results['sana']['errors'] == 1
+        assert results['bbc']['near_duplicates'] == 1
+        assert len(service.story_index) == 0
+        assert service.scraper.seen_urls == set()
+
+        # الدورة التالية تجد القصة من جديد
+        service.save_articles_bulk = save
+        results = ScrapingPipeline(service, fetch_workers=1).run(['bbc'])
+        assert results['bbc']['articles_saved'] == 1
@@ -0,0 +1,73 @@
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sqlalchemy import event
+from src.models.database import db
+from src.models.news import NewsArticle, NewsSource, NewsCategory, NewsStatus
+from src.services.response_cache import invalidate_responses
+from src.services.search_index import get_search_index
+
+@pytest.fixture
+def populated_app(db_app):
+    now = datetime.utcnow()
+    sources = [NewsSource(name=f'مصدر {i}', url=f'https://source{i}.example') for i in range(5)]
+    db.session.add_all(sources)
+    db.session.flush()
+    db.session.add_all([
+        NewsArticle(
+            title=f'خبر {n}', content='نص', source_id=sources[n % 5].id,
+            category=NewsCategory.SYRIAN_AFFAIRS if n % 2 else NewsCategory.POLITICS,
+            status=NewsStatus.BREAKING if n % 7 == 0 else NewsStatus.PUBLISHED,
+            published_at=now - timedelta(hours=n), views=n
+        )
+        for n in range(40)
+    ])
+    db.session.commit()
+    # البحث لا يفهرس شيئاً بنفسه، فتُفهرس المقالات هنا كما يفعل الترحيل
+    get_search_index(db.engine).backfill(db.session)
+    db.session.expunge_all()
+    invalidate_responses()
+    return db_app
+
+def count_statements(app, url):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        response = app.test_client().get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+    assert response.status_code == 200
+    return response.get_json(), len(statements)
+
+class TestStatementCounts:
+    @pytest.mark.parametrize('url,limit', [
+        ('/api/news/articles?per_page=20', 2),
+        ('/api/news/articles?cursor=&per_page=20', 1),
+        ('/api/news/articles/breaking', 1),
+        ('/api/news/articles/trending', 1),
+        ('/api/news/articles/syrian-affairs?per_page=20', 2),
+        ('/api/news/articles/search?q=خبر&per_page=20', 3),
+        ('/api/news/sources', 1),
+    ])
+    def test_listing_cost_does_not_grow_with_rows(self, populated_app, url, limit):
+        data, statements = count_statements(populated_app, url)
+        assert statements <= limit
+
+    def test_search_is_measured_against_indexed_articles(self, populated_app):
+        data, _ = count_statements(populated_app, '/api/news/articles/search?q=خبر&per_page=20')
+        assert data['pagination']['total'] == 40
+        assert len(data['articles']) == 20
+
+    def test_sources_report_article_counts(self, populated_app):
+        data, _ = count_statements(populated_app, '/api/news/sources')
+        assert sorted(source['articles_count'] for source in data) == [8] * 5
+
+    def test_listing_includes_source_names(self, populated_app):
+        data, _ = count_statements(populated_app, '/api/news/articles?per_page=5')
+        assert all(article['source'].startswith('مصدر') for article in data['articles'])
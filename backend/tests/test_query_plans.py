@@ -0,0 +1,123 @@
+import pytest
+import sys
+import os
+import re
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sqlalchemy import event, inspect, text
+from src.models.database import db
+from src.models.migrations import MIGRATIONS, run_migrations
+
+# QUERY_PLAN_ROWS=1000000 يعيد الاختبار على قاعدة بحجم الإنتاج
+SEED_ROWS = int(os.getenv('QUERY_PLAN_ROWS', '5000'))
+TABLE_SCAN_RE = re.compile(r'\bSCAN news_articles\b')
+
+# /stats يعرض عدد مقالات الأرشيف كله ومجموع مشاهداتها، ولا سبيل إلى ذلك دون المرور على كل الصفوف.
+# هذان الاستعلامان وحدهما مسموح لهما بالمرور، على فهرس مغطٍّ لا على الجدول، والرد يُخدم من ذاكرة الردود المؤقتة
+WHOLE_ARCHIVE_AGGREGATES = {
+    '/api/news/stats': [
+        re.compile(r'SELECT count\(\*\) AS count_1\s+FROM \(SELECT news_articles\.id\b.*\sFROM news_articles\) AS anon_1', re.S),
+        re.compile(r'SELECT sum\(news_articles\.views\) AS sum_1\s+FROM news_articles'),
+    ],
+}
+
+HOT_ROUTES = [
+    '/api/news/articles/breaking',
+    '/api/news/articles/trending',
+    '/api/news/articles?category=syrian_affairs&status=published',
+    '/api/news/articles/syrian-affairs?cursor=',
+    '/api/news/stats',
+    '/api/news/sources',
+    '/api/analytics/?time_range=7days',
+    '/api/analytics/?time_range=90days',
+    '/api/analytics/real-time',
+]
+
+@pytest.fixture
+def seeded_app(db_app):
+    now = datetime.utcnow()
+    categories = ['POLITICS', 'ECONOMY', 'SPORTS', 'SYRIAN_AFFAIRS', 'INTERNATIONAL', 'TECHNOLOGY', 'HEALTH', 'CULTURE', 'GENERAL']
+    statuses = ['PUBLISHED'] * 17 + ['DRAFT', 'ARCHIVED', 'BREAKING']
+    connection = db.session.connection()
+    connection.exec_driver_sql(
+        'INSERT INTO news_sources (id, name, url, is_active) VALUES (?, ?, ?, ?)',
+        [(i, f'source {i}', f'https://source{i}.example', 1) for i in range(1, 31)]
+    )
+    # ثلاث سنوات من الأخبار بتوزيع منتظم، فالنوافذ الزمنية القصيرة تلتقط جزءاً صغيراً من الجدول
+    step = timedelta(days=3 * 365) / SEED_ROWS
+    connection.exec_driver_sql(
+        'INSERT INTO news_articles (title, content, category, status, source_id, published_at, '
+        'created_at, updated_at, views, content_hash, ai_processed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        [
+            (f'خبر {n}', 'نص', categories[n % len(categories)], statuses[n % len(statuses)], n % 30 + 1,
+             now - step * n, now - step * n, now - step * n, (n * 7919) % 5000, f'{n:032x}', 1)
+            for n in range(SEED_ROWS)
+        ]
+    )
+    db.session.commit()
+    run_migrations(db.engine)
+    return db_app
+
+def capture_plans(client, url):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+    assert response.status_code == 200, response.get_json()
+
+    connection = db.session.connection()
+    return [
+        (statement, [row[-1] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)])
+        for statement, parameters in statements
+    ]
+
+class TestMigrations:
+    def test_migrations_are_idempotent_and_recorded(self, db_app):
+        db.session.execute(text('DROP INDEX ix_news_articles_status_published_at'))
+        db.session.commit()
+
+        assert run_migrations(db.engine) == [name for name, _ in MIGRATIONS]
+        assert run_migrations(db.engine) == []
+        indexes = {index['name'] for index in inspect(db.engine).get_indexes('news_articles')}
+        assert 'ix_news_articles_status_published_at' in indexes
+
+    def test_each_migration_creates_only_its_own_indexes(self, db_app):
+        db.session.execute(text('DROP INDEX ix_news_articles_status_published_at'))
+        db.session.execute(text('DROP INDEX ix_news_articles_source_id'))
+        db.session.commit()
+        migrations = dict(MIGRATIONS)
+
+        with db.engine.begin() as connection:
+            migrations['0003_news_article_source_index'](connection)
+        indexes = {index['name'] for index in inspect(db.engine).get_indexes('news_articles')}
+        assert 'ix_news_articles_source_id' in indexes
+        assert 'ix_news_articles_status_published_at' not in indexes
+
+    def test_automation_applies_migrations_before_its_first_cycle(self, db_app):
+        from src.services.automation_service import AutomationService
+
+        service = AutomationService(db_app)
+        service.ensure_database_migrated()
+        applied = {row[0] for row in db.session.execute(text('SELECT name FROM schema_migrations'))}
+        assert applied == {name for name, _ in MIGRATIONS}
+        assert service.migrations_applied
+
+class TestHotQueryPlans:
+    @pytest.mark.parametrize('url', HOT_ROUTES)
+    def test_route_avoids_full_table_scans(self, seeded_app, url):
+        plans = capture_plans(seeded_app.test_client(), url)
+        assert plans
+        allowed = WHOLE_ARCHIVE_AGGREGATES.get(url, [])
+        for statement, plan in plans:
+            scans = [step for step in plan if TABLE_SCAN_RE.search(step)]
+            if any(pattern.fullmatch(statement.strip()) for pattern in allowed):
+                assert all('USING COVERING INDEX' in step for step in scans), f"{url}: {scans} in plan for {statement}"
+                continue
+            assert not scans, f"{url}: {scans} in plan for {statement}"
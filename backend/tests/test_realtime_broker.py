@@ -0,0 +1,197 @@
+import pytest
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from flask import Flask
+from flask_socketio import SocketIO
+from src.services.realtime_broker import CHANGES_CHANNEL, Broker, InMemoryBroker, RedisBroker, publish_change
+from src.services.websocket_service import WebSocketService
+
+class FakeAutomation:
+    def __init__(self):
+        self.stats = {'total_scraped': 0, 'last_run': None}
+
+    def get_automation_status(self):
+        return {'stats': self.stats}
+
+class FakePubSub:
+    def __init__(self, client):
+        self.client = client
+        self.handlers = {}
+        self.closed = False
+        self.subscribe_calls = 0
+        self.exception_handler = None
+
+    def subscribe(self, **handlers):
+        self.subscribe_calls += 1
+        self.handlers.update(handlers)
+        if self not in self.client.pubsubs:
+            self.client.pubsubs.append(self)
+
+    def run_in_thread(self, sleep_time=0, daemon=False, exception_handler=None):
+        self.exception_handler = exception_handler
+        return self
+
+    def stop(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+class FakeRedis:
+    """Delivers PUBLISH straight to the subscribed handlers, as Redis would from its listener thread."""
+
+    def __init__(self):
+        self.pubsubs = []
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return FakePubSub(self)
+
+    def publish(self, channel, payload):
+        for pubsub in self.pubsubs:
+            if channel in pubsub.handlers:
+                pubsub.handlers[channel]({'type': 'message', 'channel': channel.encode(), 'data': payload.encode()})
+
+def events(client, name):
+    return [event['args'][0] for event in client.get_received() if event['name'] == name]
+
+@pytest.fixture
+def workers():
+    """Two web workers on one broker; only the first runs the automation."""
+    broker = InMemoryBroker()
+    automation = FakeAutomation()
+    started = []
+    for automation_service in (automation, None):
+        app = Flask(__name__)
+        socketio = SocketIO(app)
+        service = WebSocketService(socketio, automation_service, broker=broker, poll_interval=3600, coalesce_window=0)
+        started.append((app, socketio, service))
+    yield broker, automation, started
+    for _, _, service in started:
+        service.stop_real_time_updates()
+
+class TestInMemoryBroker:
+    def test_subscribers_receive_a_copy_until_they_unsubscribe(self):
+        broker = InMemoryBroker()
+        received = []
+        broker.subscribe(CHANGES_CHANNEL, received.append)
+        message = {'type': 'articles', 'data': {'ids': [1]}}
+        broker.publish(CHANGES_CHANNEL, message)
+        broker.publish('other', message)
+        broker.unsubscribe(CHANGES_CHANNEL, received.append)
+        broker.publish(CHANGES_CHANNEL, message)
+
+        assert received == [message]
+        assert received[0] is not message
+        assert broker.get_stats() == {'backend': 'memory', 'channels': [], 'published': 3, 'delivered': 1}
+
+    def test_publish_change_never_raises(self):
+        class BrokenBroker(InMemoryBroker):
+            def publish(self, channel, message):
+                raise ConnectionError('down')
+
+        publish_change('articles', {'ids': [1]}, BrokenBroker())
+
+class TestRedisBroker:
+    def test_messages_go_through_redis_as_json(self):
+        client = FakeRedis()
+        publisher = RedisBroker(client=client)
+        subscriber = RedisBroker(client=client)
+        received = []
+        subscriber.subscribe(CHANGES_CHANNEL, received.append)
+        subscriber.subscribe(CHANGES_CHANNEL, lambda message: None)
+
+        publish_change('stats', {'total_scraped': 3}, publisher)
+        client.publish(CHANGES_CHANNEL, 'not json')
+
+        assert received == [{'type': 'stats', 'data': {'total_scraped': 3}}]
+        assert len(client.pubsubs) == 1
+        subscriber.close()
+        assert subscriber._pubsub is None
+
+    def test_listener_survives_a_connection_error(self):
+        client = FakeRedis()
+        broker = RedisBroker(client=client, reconnect_delay=0)
+        received = []
+        broker.subscribe(CHANGES_CHANNEL, received.append)
+        pubsub = client.pubsubs[0]
+        pubsub.handlers.clear()
+
+        # ما يفعله خيط redis-py عند انقطاع الاتصال
+        pubsub.exception_handler(ConnectionError('connection reset'), pubsub, pubsub)
+        publish_change('stats', {'total_scraped': 1}, broker)
+
+        assert received == [{'type': 'stats', 'data': {'total_scraped': 1}}]
+        assert broker.get_stats()['listener_errors'] == 1
+        broker.close()
+
+    def test_concurrent_first_subscribers_register_the_channel_once(self, monkeypatch):
+        register = Broker.subscribe
+
+        def slow_register(self, channel, callback):
+            time.sleep(0.05)
+            register(self, channel, callback)
+
+        monkeypatch.setattr(Broker, 'subscribe', slow_register)
+        client = FakeRedis()
+        broker = RedisBroker(client=client)
+        threads = [
+            threading.Thread(target=broker.subscribe, args=(CHANGES_CHANNEL, lambda message: None))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert client.pubsubs[0].subscribe_calls == 1
+        assert len(broker._callbacks[CHANGES_CHANNEL]) == 4
+        broker.close()
+
+class TestFanOut:
+    def test_clients_of_every_worker_receive_changes(self, workers):
+        broker, automation, started = workers
+        clients = [socketio.test_client(app) for app, socketio, _ in started]
+        for client in clients:
+            client.get_received()
+
+        automation.stats['total_scraped'] = 5
+        started[0][2].publish_stats_changes()
+        publish_change('articles', {'ids': [9], 'articles': [{'id': 9, 'category': 'sports', 'source_id': 1}]}, broker)
+
+        for client in clients:
+            stats, articles = events(client, 'delta')
+            # العامل الذي بدأ بعد أول نشر يستلم الحالة كاملة مع أول تغيير
+            assert stats['type'] == 'stats' and stats['data']['total_scraped'] == 5
+            assert (articles['type'], articles['data']) == ('articles', {'ids': [9]})
+
+    def test_worker_without_automation_serves_the_latest_stats(self, workers):
+        broker, automation, started = workers
+        automation.stats['total_scraped'] = 7
+        started[0][2].publish_stats_changes()
+
+        app, socketio, service = started[1]
+        snapshot = events(socketio.test_client(app), 'snapshot')[0]
+        assert snapshot['stats'] == {'total_scraped': 7, 'last_run': None}
+        assert snapshot['epoch'] == service.epoch != started[0][2].epoch
+
+    def test_alerts_reach_every_worker(self, workers):
+        broker, automation, started = workers
+        clients = [socketio.test_client(app) for app, socketio, _ in started]
+        started[0][2].send_alert({'message': 'مصدر متوقف', 'severity': 'warning'})
+
+        for client in clients:
+            alerts = events(client, 'alert')
+            assert [(alert['message'], alert['severity']) for alert in alerts] == [('مصدر متوقف', 'warning')]
+
+    def test_unchanged_stats_are_republished_after_the_refresh_interval(self, workers):
+        broker, automation, started = workers
+        service = started[0][2]
+        automation.stats['total_scraped'] = 1
+        assert service.publish_stats_changes()
+        assert not service.publish_stats_changes()
+        service.state_refresh_interval = 0
+        assert service.publish_stats_changes()
+        assert service._last_stats == automation.stats
@@ -0,0 +1,249 @@
+import pytest
+import sys
+import os
+import time
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sqlalchemy import event
+from src.models.database import db
+from src.models.news import NewsArticle, NewsSource, NewsStatus
+from src.services.automation_service import AutomationService
+from src.services.news_scraper import NewsArticleData
+from flask import Flask, abort, jsonify
+from src.services import response_cache
+from src.services.response_cache import (CachedResponse, MemoryResponseCache, RedisResponseCache, ResponseCache,
+                                         cached_response, create_response_cache, get_response_cache)
+
+class FakeRedis:
+    """Just enough of the redis-py client for the response cache."""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        value = self.values.get(key)
+        return str(value).encode() if value is not None else None
+
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key, 0)) + 1
+
+    def hgetall(self, key):
+        return dict(self.values.get(key, {}))
+
+    def scan_iter(self, match):
+        prefix = match.rstrip('*')
+        return (key for key in list(self.values) if key.startswith(prefix))
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def hset(self, key, mapping):
+        self.commands.append(lambda: self.client.values.__setitem__(key, {
+            field.encode(): value if isinstance(value, bytes) else value.encode() for field, value in mapping.items()
+        }))
+
+    def expire(self, key, seconds):
+        self.commands.append(lambda: True)
+
+    def execute(self):
+        return [command() for command in self.commands]
+
+@pytest.fixture
+def stats_app(db_app):
+    source = NewsSource(name='مصدر', url='https://source.example')
+    db.session.add(source)
+    db.session.flush()
+    db.session.add(NewsArticle(title='خبر', content='نص', source_id=source.id, status=NewsStatus.BREAKING,
+                               published_at=datetime.utcnow(), views=5))
+    db.session.commit()
+    return db_app
+
+def get_counting(app, url, headers=None):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        response = app.test_client().get(url, headers=headers or {})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+    return response, len(statements)
+
+class TestCachedRoutes:
+    @pytest.mark.parametrize('url', [
+        '/api/news/stats',
+        '/api/news/articles/breaking',
+        '/api/news/articles/trending',
+        '/api/analytics/',
+        '/api/analytics/real-time',
+    ])
+    def test_repeat_requests_skip_the_database(self, stats_app, url):
+        first, first_statements = get_counting(stats_app, url)
+        second, second_statements = get_counting(stats_app, url)
+        assert first.status_code == 200 and first_statements > 0
+        assert second.get_json() == first.get_json()
+        assert second_statements == 0
+        assert second.headers['ETag'] == first.headers['ETag']
+
+    def test_matching_etag_gets_304(self, stats_app):
+        first, _ = get_counting(stats_app, '/api/news/stats')
+        second, statements = get_counting(stats_app, '/api/news/stats', {'If-None-Match': first.headers['ETag']})
+        assert second.status_code == 304
+        assert second.get_data() == b''
+        assert statements == 0
+        assert get_response_cache().get_stats()['not_modified'] == 1
+
+    def test_argument_order_shares_an_entry(self, stats_app):
+        get_counting(stats_app, '/api/news/articles/breaking?fields=id,title&x=1')
+        _, statements = get_counting(stats_app, '/api/news/articles/breaking?x=1&fields=id,title')
+        assert statements == 0
+        _, statements = get_counting(stats_app, '/api/news/articles/breaking?fields=id')
+        assert statements > 0
+
+    def test_errors_are_not_cached(self, stats_app):
+        assert stats_app.test_client().get('/api/news/articles/trending?fields=nope').status_code == 400
+        assert len(get_response_cache()) == 0
+
+    def test_saving_articles_invalidates(self, stats_app):
+        first = stats_app.test_client().get('/api/news/stats').get_json()
+
+        service = AutomationService(stats_app)
+        article = NewsArticleData()
+        article.title = 'خبر جديد'
+        article.content = 'محتوى الخبر الجديد'
+        article.url = 'https://example.com/new'
+        article.published_at = datetime.utcnow()
+        outcomes = service.save_articles_bulk([(article, {}, NewsSource.query.first())])
+        assert outcomes[0]['status'] == 'saved'
+
+        second = stats_app.test_client().get('/api/news/stats').get_json()
+        assert second['total_articles'] == first['total_articles'] + 1
+
+class BrokenResponseCache(MemoryResponseCache):
+    def __init__(self, fail_on):
+        super().__init__()
+        self.fail_on = fail_on
+
+    def get(self, key, generation):
+        if 'get' in self.fail_on:
+            raise ConnectionError('cache down')
+        return super().get(key, generation)
+
+    def set(self, key, generation, entry, ttl=None):
+        if 'set' in self.fail_on:
+            raise ConnectionError('cache down')
+        super().set(key, generation, entry, ttl)
+
+@pytest.fixture
+def counted_app(monkeypatch):
+    def use_cache(cache):
+        monkeypatch.setattr(response_cache, '_response_cache', cache)
+        monkeypatch.setattr(response_cache, '_response_cache_created', True)
+
+    app = Flask(__name__)
+    app.calls = 0
+    app.use_cache = use_cache
+    use_cache(MemoryResponseCache())
+
+    @app.route('/missing')
+    @cached_response()
+    def missing():
+        app.calls += 1
+        abort(404)
+
+    @app.route('/ok')
+    @cached_response()
+    def ok():
+        app.calls += 1
+        return jsonify({'calls': app.calls})
+
+    return app
+
+class TestCachedResponse:
+    def test_aborting_view_runs_once(self, counted_app):
+        assert counted_app.test_client().get('/missing').status_code == 404
+        assert counted_app.calls == 1
+
+    def test_aborting_view_runs_once_when_cache_is_down(self, counted_app):
+        counted_app.use_cache(BrokenResponseCache(fail_on={'get'}))
+        assert counted_app.test_client().get('/missing').status_code == 404
+        assert counted_app.calls == 1
+
+    def test_failed_store_still_serves_the_rendered_response(self, counted_app):
+        counted_app.use_cache(BrokenResponseCache(fail_on={'set'}))
+        response = counted_app.test_client().get('/ok')
+        assert response.status_code == 200
+        assert response.get_json() == {'calls': 1}
+        assert counted_app.calls == 1
+
+    def test_redis_is_the_default_when_configured(self, monkeypatch):
+        monkeypatch.delenv('RESPONSE_CACHE_BACKEND', raising=False)
+        monkeypatch.setenv('REDIS_URL', 'redis://cache.example:6379/0')
+        monkeypatch.setattr(RedisResponseCache, '__init__', lambda self, url, **kwargs: setattr(self, 'url', url))
+        cache = create_response_cache()
+        assert isinstance(cache, RedisResponseCache)
+        assert cache.url == 'redis://cache.example:6379/0'
+
+        monkeypatch.delenv('REDIS_URL')
+        assert isinstance(create_response_cache(), MemoryResponseCache)
+
+class TestMemoryResponseCache:
+    def test_entries_expire(self):
+        cache = MemoryResponseCache(ttl=60)
+        entry = CachedResponse(b'{}', 'application/json', 'abc')
+        cache.set('/a', cache.generation(), entry, ttl=0.01)
+        time.sleep(0.02)
+        assert cache.get('/a', cache.generation()) is None
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = MemoryResponseCache(max_entries=2)
+        entry = CachedResponse(b'{}', 'application/json', 'abc')
+        for key in ('/a', '/b'):
+            cache.set(key, cache.generation(), entry)
+        cache.get('/a', cache.generation())
+        cache.set('/c', cache.generation(), entry)
+        assert cache.get('/b', cache.generation()) is None
+        assert cache.get('/a', cache.generation()) == entry
+
+    def test_response_rendered_before_invalidation_is_dropped(self):
+        cache = MemoryResponseCache()
+        generation = cache.generation()
+        cache.invalidate()
+        cache.set('/a', generation, CachedResponse(b'{}', 'application/json', 'abc'))
+        assert len(cache) == 0
+
+    def test_backend_missing_a_method_fails_when_built(self):
+        class NoInvalidation(ResponseCache):
+            def generation(self):
+                return 0
+
+            def get(self, key, generation):
+                return None
+
+            def set(self, key, generation, entry, ttl=None):
+                pass
+
+            def __len__(self):
+                return 0
+
+        with pytest.raises(TypeError, match='invalidate'):
+            NoInvalidation()
+
+class TestRedisResponseCache:
+    def test_invalidation_moves_every_worker_to_a_new_generation(self):
+        client = FakeRedis()
+        writer = RedisResponseCache(client=client)
+        reader = RedisResponseCache(client=client)
+        entry = CachedResponse(b'{"a": 1}', 'application/json', 'abc')
+
+        writer.set('/a', writer.generation(), entry)
+        assert reader.get('/a', reader.generation()) == entry
+        writer.invalidate()
+        assert reader.get('/a', reader.generation()) is None
@@ -0,0 +1,135 @@
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sqlalchemy import event
+from src.models.database import db
+from src.models.news import DailyRollup, HourlyRollup, NewsArticle, NewsCategory, NewsSource, NewsStatus
+from src.services import rollups
+from src.services.automation_service import AutomationService
+from src.services.news_scraper import NewsArticleData
+from src.services.view_counter import MemoryViewCounter
+
+@pytest.fixture
+def sources(db_app):
+    rows = [NewsSource(name=f'مصدر {i}', url=f'https://source{i}.example') for i in range(3)]
+    db.session.add_all(rows)
+    db.session.commit()
+    return [row.id for row in rows]
+
+def add_articles(sources, count, now):
+    categories = [NewsCategory.POLITICS, NewsCategory.SYRIAN_AFFAIRS, NewsCategory.ECONOMY]
+    db.session.add_all([
+        NewsArticle(title=f'خبر {n}', content='نص', source_id=sources[n % 3], category=categories[n % 3],
+                    status=NewsStatus.PUBLISHED, published_at=now - timedelta(hours=5 * n), views=n)
+        for n in range(count)
+    ])
+    db.session.commit()
+
+def snapshot(model):
+    return sorted(
+        (row.bucket, row.category.name, row.source_id, row.articles, row.views)
+        for row in model.query.all() if row.articles or row.views
+    )
+
+class TestRebuild:
+    def test_daily_rollup_matches_articles(self, sources):
+        now = datetime.utcnow()
+        add_articles(sources, 60, now)
+        assert rollups.rebuild(db.session, now=now) == 60
+
+        assert db.session.query(db.func.sum(DailyRollup.articles)).scalar() == 60
+        assert db.session.query(db.func.sum(DailyRollup.views)).scalar() == sum(range(60))
+        for row in HourlyRollup.query.all():
+            assert row.bucket >= now - rollups.HOURLY_RETENTION - timedelta(hours=1)
+
+class TestIncrementalUpdates:
+    def test_saves_and_view_flushes_match_a_rebuild(self, sources, db_app):
+        service = AutomationService(db_app)
+        source = db.session.get(NewsSource, sources[0])
+        batch = []
+        for n in range(5):
+            article = NewsArticleData()
+            article.title = f'عنوان {n}'
+            article.content = f'محتوى الخبر رقم {n}'
+            article.url = f'https://example.com/{n}'
+            article.published_at = datetime.utcnow() - timedelta(hours=n)
+            batch.append((article, {}, source))
+        outcomes = service.save_articles_bulk(batch)
+        assert [outcome['status'] for outcome in outcomes] == ['saved'] * 5
+
+        counter = MemoryViewCounter()
+        counter.increment(outcomes[0]['article_id'], 7)
+        counter.increment(outcomes[3]['article_id'], 2)
+        assert counter.flush() == 2
+
+        incremental = (snapshot(HourlyRollup), snapshot(DailyRollup))
+        rollups.rebuild(db.session)
+        db.session.commit()
+        assert (snapshot(HourlyRollup), snapshot(DailyRollup)) == incremental
+        assert db.session.query(db.func.sum(DailyRollup.views)).scalar() == 9
+
+    def test_rss_dates_with_a_utc_offset_are_counted(self, sources, db_app):
+        service = AutomationService(db_app)
+        source = db.session.get(NewsSource, sources[0])
+        recent = datetime.now(timezone(timedelta(hours=3))).replace(microsecond=0) - timedelta(hours=1)
+        batch = []
+        for n, published in enumerate([
+            datetime.strptime('Tue, 10 Jun 2025 04:00:00 +0300', '%a, %d %b %Y %H:%M:%S %z'),
+            datetime.strptime(recent.strftime('%a, %d %b %Y %H:%M:%S %z'), '%a, %d %b %Y %H:%M:%S %z')
+        ]):
+            article = NewsArticleData()
+            article.title = f'عنوان {n}'
+            article.content = f'محتوى الخبر رقم {n}'
+            article.url = f'https://example.com/{n}'
+            article.published_at = published
+            batch.append((article, {}, source))
+        outcomes = service.save_articles_bulk(batch)
+
+        assert [outcome['status'] for outcome in outcomes] == ['saved'] * 2
+        assert db.session.query(db.func.sum(DailyRollup.articles)).scalar() == 2
+        assert db.session.query(db.func.sum(HourlyRollup.articles)).scalar() == 1
+        stored = db.session.get(NewsArticle, outcomes[0]['article_id']).published_at
+        assert stored == datetime(2025, 6, 10, 1, 0)
+        assert DailyRollup.query.filter_by(bucket=datetime(2025, 6, 10)).one().articles == 1
+
+    def test_old_hourly_buckets_are_pruned(self, sources):
+        now = datetime.utcnow()
+        old = now - rollups.HOURLY_RETENTION - timedelta(days=1)
+        deltas = rollups.RollupDeltas(now=old)
+        deltas.add(old, NewsCategory.POLITICS, sources[0], articles=1)
+        rollups.apply_deltas(db.session, deltas)
+        assert rollups.prune_hourly(db.session, now=now) == 1
+        assert HourlyRollup.query.count() == 0
+        assert DailyRollup.query.count() == 1
+
+class TestAnalyticsRoute:
+    @pytest.mark.parametrize('time_range,days', [('7days', 7), ('30days', 30)])
+    def test_totals_come_from_rollups(self, sources, db_app, time_range, days):
+        now = datetime.utcnow()
+        add_articles(sources, 200, now)
+        rollups.rebuild(db.session)
+        db.session.commit()
+
+        start = rollups.day_bucket(now) - timedelta(days=days - 1)
+        expected = [article for article in NewsArticle.query.all() if article.published_at >= start]
+
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', capture)
+        try:
+            data = db_app.test_client().get(f'/api/analytics/?time_range={time_range}').get_json()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', capture)
+
+        assert data['overview']['totalArticles'] == len(expected)
+        assert data['overview']['totalViews'] == sum(article.views for article in expected)
+        assert sum(day['articles'] for day in data['chartData']) == len(expected)
+        assert round(sum(category['value'] for category in data['categoryData'])) == 100
+        assert sum(source['articles'] for source in data['sourceData']) == len(expected)
+        aggregates = [s for s in statements if 'sum(' in s.lower() or 'count(' in s.lower()]
+        assert aggregates and all('news_rollups_daily' in s for s in aggregates)
@@ -0,0 +1,189 @@
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sqlalchemy import event
+from src.models.database import db
+from src.models.news import NewsArticle, NewsSource, NewsStatus
+from src.services import view_counter as view_counter_module
+from src.services.view_counter import MemoryViewCounter, RedisViewCounter
+
+class FakeRedis:
+    """Just enough of the redis-py client for the view counter."""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def hincrby(self, key, field, amount):
+        bucket = self.hashes.setdefault(key, {})
+        bucket[str(field).encode()] = bucket.get(str(field).encode(), 0) + amount
+        return bucket[str(field).encode()]
+
+    def hget(self, key, field):
+        value = self.hashes.get(key, {}).get(str(field).encode())
+        return str(value).encode() if value is not None else None
+
+    def rename(self, source, destination):
+        if source not in self.hashes:
+            raise KeyError('no such key')
+        self.hashes[destination] = self.hashes.pop(source)
+
+    def scan_iter(self, match):
+        prefix = match.rstrip('*')
+        return (key for key in list(self.hashes) if key.startswith(prefix))
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+class DownRedis:
+    """A client whose every call fails, as when the Redis server is unreachable."""
+
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise view_counter_module.RedisError('connection refused')
+        return fail
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def hgetall(self, key):
+        self.commands.append(lambda: {field: str(value).encode() for field, value in self.client.hashes.get(key, {}).items()})
+
+    def delete(self, key):
+        self.commands.append(lambda: 1 if self.client.hashes.pop(key, None) is not None else 0)
+
+    def execute(self):
+        return [command() for command in self.commands]
+
+@pytest.fixture
+def articles(db_app):
+    source = NewsSource(name='مصدر', url='https://source.example')
+    db.session.add(source)
+    db.session.flush()
+    rows = [NewsArticle(title=f'خبر {n}', content='نص', source_id=source.id,
+                        status=NewsStatus.PUBLISHED, views=10) for n in range(3)]
+    db.session.add_all(rows)
+    db.session.commit()
+    return [row.id for row in rows]
+
+def stored_views(article_id):
+    db.session.expire_all()
+    return db.session.get(NewsArticle, article_id).views
+
+class TestMemoryViewCounter:
+    def test_increments_are_aggregated_per_article(self):
+        counter = MemoryViewCounter()
+        for _ in range(5):
+            counter.increment(1)
+        counter.increment(2, 3)
+        assert counter.pending(1) == 5
+        assert counter.drain() == {1: 5, 2: 3}
+        assert counter.pending(1) == 0
+
+    def test_flush_writes_every_article_in_one_statement(self, articles):
+        counter = MemoryViewCounter()
+        for _ in range(4):
+            counter.increment(articles[0])
+        counter.increment(articles[1])
+
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', capture)
+        try:
+            assert counter.flush() == 2
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', capture)
+
+        assert len([s for s in statements if s.startswith('UPDATE')]) == 1
+        assert stored_views(articles[0]) == 14
+        assert stored_views(articles[1]) == 11
+        assert stored_views(articles[2]) == 10
+        assert counter.get_stats()['flushed_views'] == 5
+
+    def test_failed_flush_keeps_counts_for_the_next_one(self, articles, monkeypatch):
+        counter = MemoryViewCounter()
+        counter.increment(articles[0], 3)
+
+        def fail(counts):
+            raise RuntimeError('database is locked')
+
+        monkeypatch.setattr(view_counter_module, 'apply_view_counts', fail)
+        assert counter.flush() == 0
+        assert counter.pending(articles[0]) == 3
+        assert counter.get_stats()['failed_flushes'] == 1
+
+        monkeypatch.undo()
+        counter.increment(articles[0])
+        assert counter.flush() == 1
+        assert stored_views(articles[0]) == 14
+
+class TestRedisViewCounter:
+    def test_flush_drains_shared_hash(self, articles):
+        counter = RedisViewCounter(client=FakeRedis())
+        counter.increment(articles[0], 2)
+        counter.increment(articles[0])
+        assert counter.pending(articles[0]) == 3
+        assert counter.flush() == 1
+        assert stored_views(articles[0]) == 13
+        assert counter.client.hashes == {}
+
+    def test_picks_up_batches_left_by_a_crashed_flush(self):
+        client = FakeRedis()
+        counter = RedisViewCounter(client=client)
+        client.hashes['news:views:pending:flushing:dead'] = {b'7': 4}
+        counter.increment(7)
+        assert counter.drain() == {7: 5}
+        assert counter.drain() == {}
+
+    def test_views_are_kept_in_process_while_redis_is_down(self, articles):
+        counter = RedisViewCounter(client=DownRedis())
+        assert counter.increment(articles[0]) == 1
+        assert counter.increment(articles[0], 2) == 3
+        assert counter.pending(articles[0]) == 3
+
+        assert counter.flush() == 1
+        assert stored_views(articles[0]) == 13
+        assert counter.get_stats()['redis_errors'] == 4
+
+class TestArticleViews:
+    def test_read_does_not_write(self, db_app, articles, monkeypatch):
+        counter = MemoryViewCounter(flush_interval=3600)
+        monkeypatch.setattr(view_counter_module, '_view_counter', counter)
+        client = db_app.test_client()
+        try:
+            statements = []
+
+            def capture(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+
+            event.listen(db.engine, 'before_cursor_execute', capture)
+            try:
+                first = client.get(f'/api/news/articles/{articles[0]}').get_json()
+                second = client.get(f'/api/news/articles/{articles[0]}').get_json()
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', capture)
+
+            assert not [s for s in statements if s.startswith('UPDATE')]
+            assert first['views'] == 11
+            assert second['views'] == 12
+            assert stored_views(articles[0]) == 10
+        finally:
+            counter.stop()
+
+        assert stored_views(articles[0]) == 12
+
+    def test_read_succeeds_while_redis_is_down(self, db_app, articles, monkeypatch):
+        counter = RedisViewCounter(client=DownRedis(), flush_interval=3600)
+        monkeypatch.setattr(view_counter_module, '_view_counter', counter)
+        try:
+            response = db_app.test_client().get(f'/api/news/articles/{articles[0]}')
+            assert response.status_code == 200
+            assert response.get_json()['views'] == 11
+        finally:
+            counter.stop()
+        assert stored_views(articles[0]) == 11
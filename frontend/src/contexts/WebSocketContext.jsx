@@ -1,8 +1,17 @@
-import React, { createContext, useContext, useEffect, useState } from 'react'
+import React, { createContext, useContext, useEffect, useRef, useState } from 'react'
 import io from 'socket.io-client'
 
 const WebSocketContext = createContext()
 
+const mergeChanges = (state, changes) => {
+  const merged = { ...state }
+  Object.entries(changes).forEach(([key, value]) => {
+    const isObject = value && typeof value === 'object' && !Array.isArray(value)
+    merged[key] = isObject ? mergeChanges(state[key] || {}, value) : value
+  })
+  return merged
+}
+
 export const useWebSocket = () => {
   const context = useContext(WebSocketContext)
   if (!context) {
@@ -16,13 +25,21 @@ export const WebSocketProvider = ({ children }) => {
   const [connected, setConnected] = useState(false)
   const [realTimeData, setRealTimeData] = useState({
     stats: null,
+    newArticleIds: [],
     activities: [],
     alerts: []
   })
+  // آخر رقم تسلسلي طُبِّق لكل موضوع؛ أي فجوة بعده تعني أن تغييرات فاتت فيُطلب ما بعده
+  const lastSeq = useRef({})
+  // الأرقام تخص عامل الخادم الذي أصدرها؛ إن تغيّر العامل بعد إعادة الاتصال يرسل لقطة جديدة
+  const epoch = useRef(null)
+  const topics = useRef(['all'])
 
   useEffect(() => {
     const newSocket = io('http://localhost:5000', {
-      transports: ['websocket', 'polling']
+      transports: ['websocket', 'polling'],
+      // يُستدعى عند كل اتصال وإعادة اتصال، فيستأنف الخادم كل موضوع من حيث توقف
+      auth: (cb) => cb({ topics: topics.current, since: lastSeq.current, epoch: epoch.current })
     })
 
     newSocket.on('connect', () => {
@@ -35,8 +52,36 @@ export const WebSocketProvider = ({ children }) => {
       console.log('WebSocket disconnected')
     })
 
-    newSocket.on('stats_update', (data) => {
-      setRealTimeData(prev => ({ ...prev, stats: data }))
+    newSocket.on('snapshot', (data) => {
+      if (data.epoch !== epoch.current) {
+        lastSeq.current = {}
+        epoch.current = data.epoch
+      }
+      lastSeq.current[data.topic] = data.seq
+      if (data.stats) {
+        setRealTimeData(prev => ({ ...prev, stats: data.stats }))
+      }
+    })
+
+    newSocket.on('delta', (change) => {
+      const topic = change.topic || 'all'
+      const seq = lastSeq.current[topic]
+      if (seq === undefined || change.seq <= seq) {
+        return
+      }
+      if (change.seq !== seq + 1) {
+        newSocket.emit('resync', { topic, since: seq, epoch: epoch.current })
+        return
+      }
+      lastSeq.current[topic] = change.seq
+      if (change.type === 'stats') {
+        setRealTimeData(prev => ({ ...prev, stats: mergeChanges(prev.stats || {}, change.data) }))
+      } else if (change.type === 'articles') {
+        setRealTimeData(prev => ({
+          ...prev,
+          newArticleIds: [...change.data.ids, ...prev.newArticleIds].slice(0, 50)
+        }))
+      }
     })
 
     newSocket.on('activity_update', (data) => {
@@ -64,7 +109,12 @@ export const WebSocketProvider = ({ children }) => {
     socket,
     connected,
     realTimeData,
-    emit: (event, data) => socket?.emit(event, data)
+    emit: (event, data) => socket?.emit(event, data),
+    // مثال: subscribe(['category:sports']) أو subscribe(['breaking', 'source:3'])
+    subscribe: (newTopics) => {
+      topics.current = newTopics
+      socket?.emit('subscribe', { topics: newTopics, since: lastSeq.current, epoch: epoch.current })
+    }
   }
 
   return (